@@ -0,0 +1,3 @@
+"""
+Package des benchmarks de performance
+"""
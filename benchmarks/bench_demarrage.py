@@ -0,0 +1,68 @@
+"""
+Profil des imports au demarrage de l'interface Tkinter
+Lance `python -X importtime` sur les modules charges avant l'affichage de
+la fenetre principale et verifie qu'aucun module lourd n'y figure.
+
+Lancer: python -m benchmarks.bench_demarrage [nb_modules_affiches]
+"""
+import os
+import subprocess
+import sys
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules importes par main.py jusqu'au premier affichage du tableau de bord
+MODULES_DEMARRAGE = ['main', 'ui.main_window', 'ui.components.dashboard']
+
+# Modules qui ne doivent etre charges qu'a la premiere utilisation
+MODULES_LOURDS = ('reportlab', 'openpyxl', 'PIL', 'flask', 'werkzeug', 'jinja2')
+
+
+def profiler_imports(modules=None):
+    """
+    Importe les modules dans un interpreteur neuf avec -X importtime
+
+    Returns:
+        Liste de tuples (module, temps propre us, temps cumule us, profondeur)
+    """
+    modules = modules or MODULES_DEMARRAGE
+    resultat = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {', '.join(modules)}"],
+        cwd=RACINE, capture_output=True, text=True
+    )
+    if resultat.returncode != 0:
+        raise RuntimeError(resultat.stderr)
+
+    imports = []
+    for ligne in resultat.stderr.splitlines():
+        if not ligne.startswith('import time:') or 'self [us]' in ligne:
+            continue
+        # Format: "import time:   <propre> |   <cumule> |   <indentation><module>"
+        propre, cumule, nom = ligne[len('import time:'):].split('|')
+        profondeur = (len(nom) - len(nom.lstrip()) - 1) // 2
+        imports.append((nom.strip(), int(propre), int(cumule), profondeur))
+    return imports
+
+
+def main():
+    nb_affiches = int(sys.argv[1]) if len(sys.argv) > 1 else 15
+    imports = profiler_imports()
+
+    total = sum(cumule for _, _, cumule, profondeur in imports if profondeur == 0)
+    print(f"Temps total d'import au demarrage : {total / 1000:.1f} ms "
+          f"({len(imports)} modules)")
+
+    print(f"\nModules les plus couteux (temps cumule) :")
+    for nom, propre, cumule, _ in sorted(imports, key=lambda i: -i[2])[:nb_affiches]:
+        print(f"  {cumule / 1000:8.1f} ms  {propre / 1000:8.1f} ms  {nom}")
+
+    lourds = sorted({nom for nom, _, _, _ in imports
+                     if nom.split('.')[0] in MODULES_LOURDS})
+    if lourds:
+        print(f"\nATTENTION modules lourds charges au demarrage : {', '.join(lourds)}")
+        sys.exit(1)
+    print("\nAucun module lourd charge au demarrage.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark de la generation PDF
+Compare le chemin "froid" (styles reconstruits pour chaque document)
+au renderer pre-chauffe partage entre les documents.
+
+Lancer: python -m benchmarks.bench_pdf [nb_documents]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import pdf_service
+from services.pdf_service import PdfService
+
+
+def _lignes_impayes(nombre=30):
+    """Donnees d'un rapport d'impayes d'une page, sans acces a la base"""
+    return [
+        {'nom': f"Nom{i}", 'prenom': f"Prenom{i}",
+         'nb_impayees': i % 4 + 1, 'montant_restant': 25.0 * (i % 4 + 1)}
+        for i in range(nombre)
+    ]
+
+
+def _reinitialiser_caches():
+    """Vide les caches de styles pour reproduire l'ancien comportement"""
+    pdf_service._styles_cache = None
+    pdf_service._styles_tables_cache = None
+    PdfService._renderer = None
+
+
+def mesurer(nb_documents=50, froid=False):
+    """
+    Genere nb_documents rapports d'impayes et mesure le temps moyen
+
+    Args:
+        nb_documents: Nombre de documents a generer
+        froid: Reconstruire les styles avant chaque document
+
+    Returns:
+        Temps moyen par document en millisecondes
+    """
+    lignes = _lignes_impayes()
+    ancien_dossier = pdf_service.PDF_OUTPUT_DIR
+
+    with tempfile.TemporaryDirectory() as dossier:
+        pdf_service.PDF_OUTPUT_DIR = dossier
+        try:
+            _reinitialiser_caches()
+            debut = time.perf_counter()
+            for _ in range(nb_documents):
+                if froid:
+                    _reinitialiser_caches()
+                PdfService.generer_pdf_impayes(lignes)
+            duree = time.perf_counter() - debut
+        finally:
+            pdf_service.PDF_OUTPUT_DIR = ancien_dossier
+
+    return duree / nb_documents * 1000
+
+
+def main():
+    nb_documents = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    froid = mesurer(nb_documents, froid=True)
+    chaud = mesurer(nb_documents, froid=False)
+
+    print(f"Documents generes      : {nb_documents}")
+    print(f"Styles reconstruits    : {froid:.2f} ms/document")
+    print(f"Renderer pre-chauffe   : {chaud:.2f} ms/document")
+    if chaud > 0:
+        print(f"Gain                   : x{froid / chaud:.2f}")
+
+
+if __name__ == '__main__':
+    main()
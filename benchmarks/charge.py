@@ -0,0 +1,266 @@
+"""
+Test de charge du serveur web de production
+Genere une base de test (benchmarks.generateur), lance le serveur (gunicorn
+ou waitress, voir wsgi.py) sur cette base puis envoie des requetes depuis
+plusieurs clients simultanes et affiche le debit (requetes par seconde) et
+les latences du tableau de bord, des listes, de l'enregistrement d'un
+paiement (POST) et du renvoi d'un formulaire deja enregistre (cle
+d'idempotence connue).
+
+Lancer: python -m benchmarks.charge [--serveur gunicorn|waitress]
+                                    [--workers W] [--threads T]
+                                    [--clients C] [--duree secondes]
+                                    [--adherents N] [--appels M]
+                                    [--sortie fichier.json]
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from urllib.parse import urlencode
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+
+from benchmarks.generateur import generer
+
+# Delai maximal de demarrage du serveur (secondes)
+DEMARRAGE_MAX = 60
+
+# En-tetes envoyes comme un navigateur (compression acceptee, sans cache)
+EN_TETES = {'Accept-Encoding': 'gzip'}
+
+
+def _port_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def demarrer_serveur(serveur, db_path, dossier, port, workers, threads):
+    """
+    Lance le serveur de production sur la base de test
+
+    Returns:
+        Le processus du serveur, pret a repondre
+    """
+    env = dict(os.environ,
+               DCOMITE_DATABASE=db_path,
+               DCOMITE_PDF_DIR=os.path.join(dossier, 'pdf'),
+               DCOMITE_WEB_HOST='127.0.0.1',
+               DCOMITE_WEB_PORT=str(port),
+               DCOMITE_WEB_WORKERS=str(workers),
+               DCOMITE_WEB_THREADS=str(threads),
+               DCOMITE_WEB_ACCESSLOG='')
+    if serveur == 'gunicorn':
+        commande = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app']
+    else:
+        commande = [sys.executable, 'wsgi.py']
+    journal = open(os.path.join(dossier, 'serveur.log'), 'w')
+    processus = subprocess.Popen(commande, cwd=RACINE, env=env,
+                                 stdout=journal, stderr=subprocess.STDOUT)
+
+    fin = time.time() + DEMARRAGE_MAX
+    while time.time() < fin:
+        if processus.poll() is not None:
+            break
+        try:
+            connexion = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            connexion.request('GET', '/dashboard')
+            if connexion.getresponse().status == 200:
+                connexion.close()
+                return processus
+        except OSError:
+            time.sleep(0.2)
+
+    processus.kill()
+    journal.close()
+    with open(os.path.join(dossier, 'serveur.log')) as f:
+        raise RuntimeError(f"Le serveur {serveur} n'a pas demarre :\n{f.read()}")
+
+
+def _requete_get(chemin):
+    def requete(connexion, i):
+        connexion.request('GET', chemin, headers=EN_TETES)
+        return connexion.getresponse()
+    requete.attendu = 200
+    return requete
+
+
+def _requete_paiement(cotisations, date_paiement, rejeu=False):
+    """
+    POST /paiements/nouveau de 1 EUR, sur les cotisations impayees a tour de
+    role, avec une cle d'idempotence neuve ; avec rejeu, les requetes
+    renvoient toujours les memes formulaires (deja enregistres)
+    """
+    def requete(connexion, i):
+        if rejeu:
+            i %= 16
+            cle = f"charge-rejeu-{i:08d}"
+        else:
+            cle = uuid.uuid4().hex
+        cotisation_id, adherent_id = cotisations[i % len(cotisations)]
+        corps = urlencode({
+            'cle_idempotence': cle,
+            'adherent_id': adherent_id,
+            'cotisation_id': cotisation_id,
+            'type_paiement': 'cotisation',
+            'montant': '1',
+            'date_paiement': date_paiement,
+            'mode_paiement': 'Especes',
+            'admin_id': 1,
+        })
+        connexion.request('POST', '/paiements/nouveau', body=corps, headers=dict(
+            EN_TETES, **{'Content-Type': 'application/x-www-form-urlencoded'}))
+        return connexion.getresponse()
+    requete.attendu = 302
+    return requete
+
+
+def charger(port, requete, clients, duree):
+    """
+    Envoie la requete en boucle depuis `clients` threads pendant `duree` secondes
+    (une connexion HTTP persistante par client)
+
+    Returns:
+        Dictionnaire des mesures (debit, latences en millisecondes, erreurs)
+    """
+    durees, erreurs = [], []
+    compteur = iter(range(10 ** 9))
+    verrou = threading.Lock()
+    depart = threading.Barrier(clients + 1)
+    fin = []
+
+    def client():
+        connexion = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        locales, echecs = [], 0
+        depart.wait()
+        while not fin:
+            with verrou:
+                i = next(compteur)
+            debut = time.perf_counter()
+            try:
+                reponse = requete(connexion, i)
+                reponse.read()
+                if reponse.status != requete.attendu:
+                    echecs += 1
+            except (OSError, http.client.HTTPException):
+                echecs += 1
+                connexion.close()
+                connexion = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                continue
+            locales.append((time.perf_counter() - debut) * 1000)
+        connexion.close()
+        with verrou:
+            durees.extend(locales)
+            erreurs.append(echecs)
+
+    fils = [threading.Thread(target=client) for _ in range(clients)]
+    for fil in fils:
+        fil.start()
+    depart.wait()
+    debut = time.perf_counter()
+    time.sleep(duree)
+    fin.append(True)
+    for fil in fils:
+        fil.join()
+    ecoule = time.perf_counter() - debut
+
+    durees.sort()
+    return {
+        'requetes': len(durees),
+        'requetes_par_seconde': round(len(durees) / ecoule, 1),
+        'mediane_ms': round(statistics.median(durees), 2) if durees else None,
+        'p95_ms': round(durees[int(0.95 * (len(durees) - 1))], 2) if durees else None,
+        'erreurs': sum(erreurs),
+    }
+
+
+def executer(serveur='gunicorn', workers=2, threads=8, clients=8, duree=10,
+             nb_adherents=500, nb_appels=40):
+    """
+    Genere la base, lance le serveur et mesure chaque scenario
+
+    Returns:
+        Dictionnaire pret a etre ecrit en JSON
+    """
+    with tempfile.TemporaryDirectory() as dossier:
+        db_path = os.path.join(dossier, 'charge.db')
+        comptes = generer(db_path, nb_adherents, nb_appels)
+
+        conn = sqlite3.connect(db_path)
+        cotisations = conn.execute(
+            "SELECT id, adherent_id FROM cotisations WHERE statut != 'paye' ORDER BY id"
+        ).fetchall()
+        annee = conn.execute("SELECT MAX(annee) FROM annees").fetchone()[0]
+        conn.close()
+
+        scenarios = [
+            ('dashboard', _requete_get('/dashboard')),
+            ('liste_adherents', _requete_get('/adherents/')),
+            ('liste_paiements', _requete_get('/paiements/')),
+            ('liste_impayes', _requete_get('/paiements/impayes')),
+            ('paiement_post', _requete_paiement(cotisations, f"{annee}-12-01")),
+            ('paiement_rejeu', _requete_paiement(cotisations, f"{annee}-12-01", rejeu=True)),
+        ]
+
+        port = _port_libre()
+        processus = demarrer_serveur(serveur, db_path, dossier, port, workers, threads)
+        resultats = {}
+        try:
+            for nom, requete in scenarios:
+                resultats[nom] = mesure = charger(port, requete, clients, duree)
+                print(f"  {nom:18} {mesure['requetes_par_seconde']:9.1f} req/s  "
+                      f"mediane {mesure['mediane_ms']:8.2f} ms  p95 {mesure['p95_ms']:8.2f} ms  "
+                      f"erreurs {mesure['erreurs']}")
+        finally:
+            processus.terminate()
+            processus.wait(timeout=30)
+
+    return {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'parametres': {'serveur': serveur, 'workers': workers, 'threads': threads,
+                       'clients': clients, 'duree': duree,
+                       'adherents': nb_adherents, 'appels': nb_appels},
+        'lignes': comptes,
+        'resultats': resultats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge du serveur web")
+    parser.add_argument('--serveur', choices=('gunicorn', 'waitress'),
+                        default='waitress' if os.name == 'nt' else 'gunicorn')
+    parser.add_argument('--workers', type=int, default=2,
+                        help="Processus gunicorn (ignore par waitress)")
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--clients', type=int, default=8, help="Clients simultanes")
+    parser.add_argument('--duree', type=float, default=10, help="Duree de chaque scenario (s)")
+    parser.add_argument('--adherents', type=int, default=500)
+    parser.add_argument('--appels', type=int, default=40)
+    parser.add_argument('--sortie', help="Fichier JSON des resultats")
+    args = parser.parse_args()
+
+    print(f"Test de charge : {args.serveur}, {args.workers} worker(s) x {args.threads} threads, "
+          f"{args.clients} clients, {args.duree:g} s par scenario")
+    rapport = executer(args.serveur, args.workers, args.threads, args.clients, args.duree,
+                       args.adherents, args.appels)
+
+    if args.sortie:
+        with open(args.sortie, 'w', encoding='utf-8') as f:
+            json.dump(rapport, f, indent=2)
+        print(f"\nResultats ecrits dans {args.sortie}")
+
+
+if __name__ == '__main__':
+    main()
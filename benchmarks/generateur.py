@@ -0,0 +1,204 @@
+"""
+Generateur de donnees de benchmark
+Remplit une base neuve (schema.sql et migrations) avec un jeu de donnees
+deterministe : adherents, appels de fonds, cotisations, paiements, depenses
+et historique, dans des proportions proches d'une tontine reelle.
+Les montants sont en centimes, comme dans la base migree.
+
+Lancer: python -m benchmarks.generateur chemin.db [nb_adherents] [nb_appels]
+"""
+import os
+import random
+import sqlite3
+import sys
+from datetime import date, timedelta
+
+from database.migrations import migrer
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA_PATH = os.path.join(RACINE, 'database', 'schema.sql')
+
+NOMS = ['Diallo', 'Sow', 'Ba', 'Traore', 'Keita', 'Camara', 'Toure', 'Diop',
+        'Ndiaye', 'Fall', 'Cisse', 'Sylla', 'Konate', 'Kone', 'Coulibaly',
+        'Sangare', 'Barry', 'Bah', 'Balde', 'Kante', 'Doumbia', 'Diarra']
+PRENOMS = ['Awa', 'Moussa', 'Fatou', 'Mamadou', 'Aminata', 'Ibrahima',
+           'Mariam', 'Ousmane', 'Kadiatou', 'Abdoulaye', 'Aissata', 'Boubacar',
+           'Hawa', 'Seydou', 'Oumou', 'Lamine', 'Djeneba', 'Souleymane']
+MODES = ['Especes', 'Cheque', 'Virement', 'Mobile Money']
+PAYS = ['Senegal', 'Mali', 'Guinee', "Cote d'Ivoire", 'France']
+RELATIONS = ['Pere', 'Mere', 'Epoux', 'Epouse', 'Enfant', 'Frere', 'Soeur']
+
+# Proportions observees sur une tontine en fonctionnement
+TAUX_ACTIFS = 0.9            # adherents encore actifs
+TAUX_FRAIS_ENTREE = 0.15     # adherents inscrits avec des frais d'entree
+APPELS_PAR_AN = 8            # un appel de fonds par deces
+REPARTITION_RECENTS = (0.60, 0.15)   # appels ouverts : paye, partiel (reste: non paye)
+TAUX_PAIEMENT_EN_DEUX_FOIS = 0.2
+
+
+def _date_aleatoire(rng, debut, fin):
+    return debut + timedelta(days=rng.randint(0, max(0, (fin - debut).days)))
+
+
+def generer(db_path, nb_adherents=500, nb_appels=40, seed=42, annee_debut=2020):
+    """
+    Cree et remplit une base de benchmark
+
+    Args:
+        db_path: Chemin du fichier SQLite a creer (remplace s'il existe)
+        nb_adherents: Nombre d'adherents
+        nb_appels: Nombre d'appels de fonds (un deces chacun)
+        seed: Graine du generateur aleatoire (meme graine = meme base)
+        annee_debut: Premiere annee des donnees
+
+    Returns:
+        Dictionnaire du nombre de lignes par table
+    """
+    rng = random.Random(seed)
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    conn = sqlite3.connect(db_path)
+    with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+        conn.executescript(f.read())
+    migrer(conn, afficher=lambda message: None)
+
+    nb_annees = max(1, -(-nb_appels // APPELS_PAR_AN))
+    debut = date(annee_debut, 1, 1)
+    fin = date(annee_debut + nb_annees - 1, 12, 31)
+
+    # Annees (la derniere est active)
+    conn.executemany(
+        "INSERT INTO annees (id, annee, active) VALUES (?, ?, ?)",
+        [(i + 1, annee_debut + i, int(i == nb_annees - 1)) for i in range(nb_annees)]
+    )
+
+    # Adherents : la plupart inscrits avant la premiere annee
+    adherents = []
+    historique = []
+    for adherent_id in range(1, nb_adherents + 1):
+        nom, prenom = rng.choice(NOMS), rng.choice(PRENOMS)
+        if rng.random() < 0.7:
+            date_entree = _date_aleatoire(rng, debut - timedelta(days=3650), debut)
+        else:
+            date_entree = _date_aleatoire(rng, debut, fin)
+        actif = int(rng.random() < TAUX_ACTIFS)
+        date_sortie = _date_aleatoire(rng, date_entree, fin) if not actif else None
+        frais = rng.choice([2000, 3000, 5000]) if rng.random() < TAUX_FRAIS_ENTREE else 0
+        frais_paye = 1 if not frais else int(rng.random() < 0.5)
+        adherents.append((adherent_id, nom, prenom, f"06{rng.randint(0, 99999999):08d}",
+                          f"{prenom.lower()}.{nom.lower()}{adherent_id}@exemple.fr",
+                          date_entree.isoformat(),
+                          date_sortie.isoformat() if date_sortie else None,
+                          actif, frais, frais_paye))
+        historique.append((adherent_id, 'inscription', f"Inscription de {prenom} {nom}",
+                           None, None, date_entree.isoformat()))
+    conn.executemany("""
+        INSERT INTO adherents (id, nom, prenom, telephone, email, date_entree,
+                               date_sortie, actif, frais_entree, frais_entree_paye)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, adherents)
+
+    # Appels de fonds, cotisations et paiements
+    appels, cotisations, contributions, depenses = [], [], [], []
+    cotisation_id = 0
+    for appel_id in range(1, nb_appels + 1):
+        annee_index = (appel_id - 1) // APPELS_PAR_AN
+        annee = annee_debut + annee_index
+        lancement = _date_aleatoire(rng, date(annee, 1, 1), date(annee, 12, 31))
+        montant = rng.choice([1000, 1500, 2000, 2500])
+        # Seuls les appels de la derniere annee restent ouverts
+        ouvert = annee_index == nb_annees - 1
+        appels.append((appel_id, annee, montant, f"Deces #{appel_id}",
+                       rng.randint(1, 5), lancement.isoformat(), int(not ouvert)))
+
+        # Le deces a l'origine de l'appel
+        defunt = rng.choice(adherents)
+        frais = [rng.choice([0, 80000, 150000, 250000]), rng.choice([0, 60000, 90000]),
+                 rng.choice([0, 10000, 15000]), rng.choice([0, 5000, 8000]), 0, 0, 0]
+        depenses.append((annee_index + 1, defunt[0], 0, f"Defunt #{appel_id}",
+                         rng.choice(RELATIONS), lancement.isoformat(),
+                         rng.choice(PAYS), *frais, sum(frais)))
+
+        for adherent in adherents:
+            entree, sortie = adherent[5], adherent[6]
+            if entree > lancement.isoformat() or (sortie and sortie < lancement.isoformat()):
+                continue
+            cotisation_id += 1
+            tirage = rng.random()
+            if not ouvert or tirage < REPARTITION_RECENTS[0]:
+                paye, statut = montant, 'paye'
+            elif tirage < sum(REPARTITION_RECENTS):
+                paye, statut = montant // 2, 'partiel'
+            else:
+                paye, statut = 0, 'non_paye'
+            cotisations.append((cotisation_id, appel_id, adherent[0], montant, paye, statut))
+            historique.append((adherent[0], 'paiement_cotisation',
+                               f"Appel de fond {annee} : {montant / 100:.2f} EUR a payer",
+                               montant, None, lancement.isoformat()))
+
+            # Les paiements (en une ou deux fois)
+            if paye:
+                versements = [paye]
+                if statut == 'paye' and rng.random() < TAUX_PAIEMENT_EN_DEUX_FOIS:
+                    versements = [paye // 2, paye - paye // 2]
+                for versement in versements:
+                    jour = _date_aleatoire(rng, lancement, lancement + timedelta(days=60))
+                    admin = rng.randint(1, 5)
+                    contributions.append((adherent[0], cotisation_id, versement,
+                                          jour.isoformat(), rng.choice(MODES), admin))
+                    historique.append((adherent[0], 'paiement_cotisation',
+                                       f"Paiement de {versement / 100:.2f} pour appel de fonds #{appel_id}",
+                                       versement, admin, jour.isoformat()))
+
+    conn.executemany("""
+        INSERT INTO appels_de_fonds (id, annee, montant, description, admin_id,
+                                     date_lancement, cloture)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, appels)
+    conn.executemany("""
+        INSERT INTO cotisations (id, appel_id, adherent_id, montant_du, montant_paye, statut)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, cotisations)
+    conn.executemany("""
+        INSERT INTO contributions (adherent_id, cotisation_id, montant, date_paiement,
+                                   mode_paiement, admin_id)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, contributions)
+    conn.executemany("""
+        INSERT INTO depenses (annee_id, adherent_id, defunt_est_adherent, defunt_nom,
+                              defunt_relation, date_deces, pays_destination,
+                              transport_services, billet_avion, imam, mairie,
+                              autre1, autre2, autre3, montant)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, depenses)
+    conn.executemany("""
+        INSERT INTO historique (adherent_id, type_evenement, description, montant,
+                                admin_id, created_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, historique)
+    # Base neuve : le journal des sauvegardes incrementales repart a vide
+    conn.execute("DELETE FROM journal_modifications")
+    conn.commit()
+
+    comptes = {
+        table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        for table in ('adherents', 'annees', 'appels_de_fonds', 'cotisations',
+                      'contributions', 'depenses', 'historique')
+    }
+    conn.close()
+    return comptes
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__.strip().splitlines()[-1])
+        sys.exit(1)
+    nb_adherents = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    nb_appels = int(sys.argv[3]) if len(sys.argv) > 3 else 40
+    for table, nombre in generer(sys.argv[1], nb_adherents, nb_appels).items():
+        print(f"{table:16} {nombre:8d}")
+
+
+if __name__ == '__main__':
+    main()
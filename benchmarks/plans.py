@@ -0,0 +1,115 @@
+"""
+Verification des plans d'execution
+Execute les requetes reelles des modeles sur une base generee, puis verifie
+avec EXPLAIN QUERY PLAN qu'elles utilisent les index prevus pour elles
+(database/migrations.py). Sort en erreur si un plan a change.
+
+Lancer: python -m benchmarks.plans
+"""
+import os
+import sys
+import tempfile
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+
+from benchmarks.generateur import generer
+
+
+def _cas():
+    """
+    Requetes a verifier
+
+    Returns:
+        Liste de tuples (nom, fonction, table, etapes attendues, etapes interdites)
+    """
+    from models.appel import AppelDeFonds
+    from models.cle_idempotence import CleIdempotence
+    from models.cotisation import Cotisation
+    from models.historique import Historique
+    from models.releve import Releve
+    from services.depense_service import DepenseService
+    from services.statistique_service import StatistiqueService
+
+    return [
+        ('impayes_par_adherent', Cotisation.get_impayes_par_adherent, 'releves_adherents',
+         ['COVERING INDEX idx_releves_impayes'], ['SCAN cotisations']),
+        ('releve_adherent', lambda: Releve.get_for_adherent(1), 'releves_adherents',
+         ['USING INTEGER PRIMARY KEY (rowid=?)'], ['SCAN releves_adherents']),
+        ('impayees_adherent', lambda: Cotisation.get_impayees_adherent(1), 'cotisations',
+         ['INDEX idx_cotisations_impayees (adherent_id=?)'], ['SCAN c']),
+        ('stats_appel', lambda: AppelDeFonds.get_by_id(1).get_stats(), 'cotisations',
+         ['COVERING INDEX idx_cotisations_appel_stats (appel_id=?)'], []),
+        ('stats_appels', AppelDeFonds.get_all_with_stats, 'cotisations',
+         ['COVERING INDEX idx_cotisations_appel_stats'], ['SCAN cotisations\n']),
+        ('historique_adherent', lambda: Historique.get_for_adherent(1), 'historique',
+         ['INDEX idx_historique_adherent_date (adherent_id=?)'], ['TEMP B-TREE']),
+        ('depenses_par_mois', lambda: DepenseService.get_depenses_par_mois(1), 'rollup_mensuel',
+         ['USING PRIMARY KEY (annee=?'], ['SCAN rollup_mensuel']),
+        ('cle_idempotence',
+         lambda: CleIdempotence.executer(CleIdempotence.nouvelle(), lambda: None),
+         'cles_idempotence',
+         ['COVERING INDEX idx_cles_idempotence_expiration (expire_le<?)'],
+         ['SCAN cles_idempotence']),
+        ('alertes_non_payees', StatistiqueService.get_alertes, "statut = 'non_paye'",
+         ['COVERING INDEX idx_cotisations_statut (statut=?)'], []),
+    ]
+
+
+def verifier():
+    """
+    Verifie chaque cas et affiche le plan des requetes concernees
+
+    Returns:
+        Nombre de cas en echec
+    """
+    from database.db_manager import DatabaseManager
+
+    with tempfile.TemporaryDirectory() as dossier:
+        db_path = os.path.join(dossier, 'plans.db')
+        generer(db_path, nb_adherents=200, nb_appels=16)
+        db = DatabaseManager(db_path)
+
+        executees = []
+        ecouteur = lambda query, params, duree_ms, nb_lignes: executees.append((query, params))
+        db.ajouter_ecouteur(ecouteur)
+
+        echecs = 0
+        try:
+            for nom, fonction, motif, attendues, interdites in _cas():
+                executees.clear()
+                fonction()
+                # Plans des requetes de ce cas qui portent sur la table (ou le motif)
+                plans = [
+                    '\n'.join(ligne[3] for ligne in db.get_connection().execute(
+                        f"EXPLAIN QUERY PLAN {query}", params or ()))
+                    for query, params in executees if motif in query
+                ]
+                plan = '\n'.join(plans) + '\n'
+                manquantes = [e for e in attendues if e not in plan]
+                presentes = [e.strip() for e in interdites if e in plan]
+                ok = plans and not manquantes and not presentes
+                echecs += not ok
+                print(f"{'OK   ' if ok else 'ECHEC'} {nom}")
+                if not ok:
+                    for etape in manquantes:
+                        print(f"      attendu : {etape}")
+                    for etape in presentes:
+                        print(f"      interdit : {etape}")
+                    print('      ' + plan.strip().replace('\n', '\n      '))
+        finally:
+            db.retirer_ecouteur(ecouteur)
+            db.close()
+    return echecs
+
+
+def main():
+    echecs = verifier()
+    if echecs:
+        print(f"\n{echecs} plan(s) non conforme(s)")
+        sys.exit(1)
+    print("\nTous les plans utilisent les index prevus.")
+
+
+if __name__ == '__main__':
+    main()
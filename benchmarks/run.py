@@ -0,0 +1,196 @@
+"""
+Benchmark des chemins critiques de l'application
+Genere une base de test (benchmarks.generateur), chronometre les requetes
+et traitements les plus sollicites puis ecrit les resultats en JSON pour
+comparer les versions entre elles.
+
+Lancer: python -m benchmarks.run [--adherents N] [--appels M]
+                                 [--repetitions R] [--sortie fichier.json]
+                                 [--comparer ancien.json]
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+
+from benchmarks.generateur import generer
+from config import APP_VERSION
+
+DOSSIER_RESULTATS = os.path.join(RACINE, 'benchmarks', 'resultats')
+
+# Ecart a partir duquel une mesure est signalee par --comparer
+SEUIL_REGRESSION = 1.3
+
+
+def _version_git():
+    """Commit courant, ou None hors d'un depot git"""
+    try:
+        resultat = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                                  cwd=RACINE, capture_output=True, text=True)
+    except OSError:
+        return None
+    return resultat.stdout.strip() or None
+
+
+def chronometrer(fonction, repetitions):
+    """
+    Appelle fonction(i) pour i dans range(repetitions) et mesure chaque appel
+
+    Returns:
+        Dictionnaire des statistiques en millisecondes
+    """
+    durees = []
+    for i in range(repetitions):
+        debut = time.perf_counter()
+        fonction(i)
+        durees.append((time.perf_counter() - debut) * 1000)
+    return {
+        'repetitions': repetitions,
+        'min_ms': round(min(durees), 3),
+        'mediane_ms': round(statistics.median(durees), 3),
+        'moyenne_ms': round(statistics.mean(durees), 3),
+        'max_ms': round(max(durees), 3),
+    }
+
+
+def executer(nb_adherents=500, nb_appels=40, repetitions=20):
+    """
+    Genere la base puis chronometre chaque chemin critique
+
+    Returns:
+        Dictionnaire pret a etre ecrit en JSON
+    """
+    with tempfile.TemporaryDirectory() as dossier:
+        db_path = os.path.join(dossier, 'bench.db')
+        comptes = generer(db_path, nb_adherents, nb_appels)
+
+        # Les modeles et services utilisent le singleton : il pointe sur la base de test
+        from database.db_manager import DatabaseManager
+        DatabaseManager(db_path)
+
+        from services import pdf_service, pdf_cache
+        pdf_service.PDF_OUTPUT_DIR = os.path.join(dossier, 'pdf')
+        pdf_cache.PDF_OUTPUT_DIR = pdf_service.PDF_OUTPUT_DIR
+
+        from models.adherent import Adherent
+        from models.appel import AppelDeFonds
+        from models.contribution import Contribution
+        from models.cotisation import Cotisation
+        from services.statistique_service import StatistiqueService
+        from services.rapport_service import RapportService
+        from services.pdf_service import PdfService
+
+        db = DatabaseManager()
+        annee_active, annee_active_id = db.fetch_one(
+            "SELECT annee, id FROM annees ORDER BY annee DESC LIMIT 1")
+        recherches = ['Dia', 'sow', 'Kadiatou', 'exemple.fr', '0612', 'zz']
+        impayees = [Cotisation._from_row(row) for row in db.fetch_all(
+            "SELECT * FROM cotisations WHERE statut != 'paye' ORDER BY id LIMIT ?",
+            (repetitions,)
+        )]
+        contributions = [Contribution._from_row(row) for row in db.fetch_all(
+            "SELECT * FROM contributions ORDER BY id DESC LIMIT ?", (repetitions,)
+        )]
+        lignes_impayes = Cotisation.get_impayes_par_adherent()
+
+        # Les ecritures en dernier : elles modifient la base mesuree
+        cas = [
+            ('statistiques_dashboard', repetitions,
+             lambda i: StatistiqueService.get_statistiques_dashboard()),
+            ('alertes', repetitions, lambda i: StatistiqueService.get_alertes()),
+            ('adherent_search', repetitions,
+             lambda i: Adherent.search(recherches[i % len(recherches)])),
+            ('impayes_par_adherent', repetitions,
+             lambda i: Cotisation.get_impayes_par_adherent()),
+            ('rapport_annuel', max(1, repetitions // 4),
+             lambda i: RapportService.rapport_annuel(annee_active_id)),
+            ('rapport_contributions', max(1, repetitions // 4),
+             lambda i: RapportService.rapport_contributions(annee_active_id)),
+            ('pdf_paiement', len(contributions),
+             lambda i: PdfService.generer_pdf_paiement(contributions[i])),
+            ('pdf_impayes', max(1, repetitions // 4),
+             lambda i: PdfService.generer_pdf_impayes(lignes_impayes)),
+            ('enregistrer_paiement', len(impayees),
+             lambda i: impayees[i].enregistrer_paiement(
+                 5.0, f"{annee_active}-12-01", 'Especes', admin_id=1)),
+            ('appel_create', max(1, repetitions // 10),
+             lambda i: AppelDeFonds.create(annee_active, 10.0, f"Benchmark {i}", admin_id=1)),
+        ]
+
+        resultats = {}
+        for nom, nb, fonction in cas:
+            resultats[nom] = chronometrer(fonction, nb)
+            print(f"  {nom:24} {resultats[nom]['mediane_ms']:10.2f} ms (mediane sur {nb})")
+
+        db.close()
+
+    return {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'version': APP_VERSION,
+        'git': _version_git(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'parametres': {'adherents': nb_adherents, 'appels': nb_appels,
+                       'repetitions': repetitions},
+        'lignes': comptes,
+        'resultats': resultats,
+    }
+
+
+def comparer(ancien, nouveau):
+    """Affiche l'evolution des medianes et signale les regressions"""
+    print(f"\nComparaison avec {ancien.get('git') or ancien.get('date')} :")
+    regressions = 0
+    for nom, mesure in nouveau['resultats'].items():
+        reference = ancien.get('resultats', {}).get(nom)
+        if not reference or not reference['mediane_ms']:
+            print(f"  {nom:24} (nouvelle mesure)")
+            continue
+        ratio = mesure['mediane_ms'] / reference['mediane_ms']
+        alerte = '  <-- REGRESSION' if ratio > SEUIL_REGRESSION else ''
+        regressions += bool(alerte)
+        print(f"  {nom:24} {reference['mediane_ms']:10.2f} -> "
+              f"{mesure['mediane_ms']:10.2f} ms  x{ratio:.2f}{alerte}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des chemins critiques")
+    parser.add_argument('--adherents', type=int, default=500)
+    parser.add_argument('--appels', type=int, default=40)
+    parser.add_argument('--repetitions', type=int, default=20)
+    parser.add_argument('--sortie', help="Fichier JSON (defaut: benchmarks/resultats/)")
+    parser.add_argument('--comparer', help="Resultats JSON d'une version precedente")
+    args = parser.parse_args()
+
+    print(f"Benchmark : {args.adherents} adherents, {args.appels} appels de fonds")
+    rapport = executer(args.adherents, args.appels, args.repetitions)
+
+    sortie = args.sortie
+    if not sortie:
+        os.makedirs(DOSSIER_RESULTATS, exist_ok=True)
+        horodatage = datetime.now().strftime('%Y%m%d_%H%M%S')
+        sortie = os.path.join(DOSSIER_RESULTATS,
+                              f"bench_{horodatage}_{rapport['git'] or 'local'}.json")
+    with open(sortie, 'w', encoding='utf-8') as f:
+        json.dump(rapport, f, indent=2)
+    print(f"\nResultats ecrits dans {sortie}")
+
+    if args.comparer:
+        with open(args.comparer, 'r', encoding='utf-8') as f:
+            if comparer(json.load(f), rapport):
+                sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,10 +5,11 @@ import os
 
 # Chemins
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATABASE_PATH = os.path.join(BASE_DIR, 'data', 'tontine.db')
+DATABASE_PATH = os.environ.get('DCOMITE_DATABASE', os.path.join(BASE_DIR, 'data', 'tontine.db'))
 BACKUP_DIR = os.path.join(BASE_DIR, 'backups')
 EXPORTS_DIR = os.path.join(BASE_DIR, 'exports')
-PDF_OUTPUT_DIR = os.path.join(os.path.expanduser('~'), 'Desktop', 'dcomite_history')
+PDF_OUTPUT_DIR = os.environ.get('DCOMITE_PDF_DIR',
+                                os.path.join(os.path.expanduser('~'), 'Desktop', 'dcomite_history'))
 
 # Application
 APP_NAME = "Death Comitee"
@@ -17,6 +18,28 @@ APP_VERSION = "1.0.0"
 # Base de données
 DB_TIMEOUT = 30
 
+# Sauvegardes (database/backup.py)
+BACKUP_RETENTION = 7            # Sauvegardes complètes conservées (avec leurs incrémentales)
+BACKUP_INCREMENTALES_MAX = 24   # Incrémentales avant qu'une complète soit refaite
+BACKUP_PAGES_PAR_ETAPE = 256    # Pages copiées par étape de la sauvegarde en ligne
+BACKUP_PAUSE = 0.01             # Pause entre deux étapes (secondes)
+
+# Profilage SQL (débogage) : DCOMITE_SQL_PROFILING=1 pour l'activer
+SQL_PROFILING = os.environ.get('DCOMITE_SQL_PROFILING', '0') == '1'
+SQL_SLOW_QUERY_MS = float(os.environ.get('DCOMITE_SQL_SLOW_MS', '50'))
+LOGS_DIR = os.path.join(BASE_DIR, 'logs')
+SQL_SLOW_LOG = os.path.join(LOGS_DIR, 'requetes_lentes.log')
+SQL_PROFILE_PATH = os.path.join(LOGS_DIR, 'profil_sql.json')
+
+# Serveur web de production (wsgi.py, gunicorn.conf.py)
+WEB_HOST = os.environ.get('DCOMITE_WEB_HOST', '127.0.0.1')
+WEB_PORT = int(os.environ.get('DCOMITE_WEB_PORT', '8000'))
+WEB_WORKERS = int(os.environ.get('DCOMITE_WEB_WORKERS', '2'))   # Processus (gunicorn)
+WEB_THREADS = int(os.environ.get('DCOMITE_WEB_THREADS', '8'))   # Threads par processus
+# Tableaux de bord en direct (/dashboard/flux) par processus : chacun occupe un
+# thread tant qu'il est ouvert, au-dela la page n'est plus mise a jour en direct
+WEB_SSE_MAX = int(os.environ.get('DCOMITE_WEB_SSE_MAX', str(max(1, WEB_THREADS // 2))))
+
 # Interface
 WINDOW_WIDTH = 1200
 WINDOW_HEIGHT = 800
@@ -0,0 +1,442 @@
+"""
+Archives des années clôturées
+Les cotisations, contributions, dépenses et l'historique d'une année close
+sont déplacés dans une base d'archive propre à l'année (archives/archive_<année>.db,
+à côté de la base principale), attachée le temps du transfert avec ATTACH.
+
+La base principale ne garde que des totaux (tables archives_annees,
+archives_appels et archives_adherents, voir database/migrations.py) : les
+agrégats globaux restent exacts sans parcourir l'ancien détail, et le détail
+d'une année archivée est relu à la demande dans son archive (Archives.fetch_all).
+
+Lancer: python -m database.archives liste [--db chemin]
+        python -m database.archives archiver 2021 [--vacuum] [--db chemin]
+        python -m database.archives restaurer 2021 [--db chemin]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+
+from database import rollup
+from database.backup import exiger_complete
+from database.db_manager import DatabaseManager
+from database.migrations import recalculer_releves
+
+# Dossier des archives, à côté de la base principale
+NOM_DOSSIER = 'archives'
+
+# Tables déplacées, dans l'ordre d'insertion (les cotisations avant leurs contributions)
+TABLES = ('cotisations', 'contributions', 'depenses', 'historique')
+
+# Lignes d'une année par table (archive.cotisations est déjà rempli pour les contributions)
+_SELECTIONS = {
+    'cotisations': """
+        SELECT * FROM main.cotisations
+        WHERE appel_id IN (SELECT id FROM main.appels_de_fonds WHERE annee = :annee)
+    """,
+    'contributions': """
+        SELECT * FROM main.contributions
+        WHERE cotisation_id IN (SELECT id FROM archive.cotisations)
+           OR (cotisation_id IS NULL AND strftime('%Y', date_paiement) = :annee_texte)
+    """,
+    'depenses': "SELECT * FROM main.depenses WHERE annee_id = :annee_id",
+    'historique': "SELECT * FROM main.historique WHERE strftime('%Y', created_at) = :annee_texte",
+}
+
+# Index des relectures (détail d'un adhérent, d'un appel, d'une année)
+_INDEX = {
+    'cotisations': ('adherent_id', 'appel_id'),
+    'contributions': ('adherent_id',),
+    'depenses': ('adherent_id', 'annee_id'),
+    'historique': ('adherent_id',),
+}
+
+_TOTAUX = """
+    INSERT INTO main.archives_appels (appel_id, annee, total, nb_paye, nb_partiel,
+                                      nb_non_paye, total_collecte, total_attendu)
+    SELECT appel_id, :annee,
+           COUNT(*),
+           SUM(CASE WHEN statut = 'paye' THEN 1 ELSE 0 END),
+           SUM(CASE WHEN statut = 'partiel' THEN 1 ELSE 0 END),
+           SUM(CASE WHEN statut = 'non_paye' THEN 1 ELSE 0 END),
+           COALESCE(SUM(montant_paye), 0),
+           COALESCE(SUM(montant_du), 0)
+    FROM archive.cotisations
+    GROUP BY appel_id;
+
+    INSERT INTO main.archives_adherents (annee, adherent_id, nb_cotisations, total_du,
+                                         total_paye, nb_contributions, total_contributions,
+                                         nb_depenses, total_depenses, nb_historique,
+                                         dernier_paiement)
+    SELECT :annee, adherent_id, SUM(nb_cotisations), SUM(du), SUM(paye),
+           SUM(nb_contributions), SUM(contributions), SUM(nb_depenses), SUM(depenses),
+           SUM(nb_historique), MAX(date_paiement)
+    FROM (
+        SELECT adherent_id, 1 as nb_cotisations, montant_du as du, montant_paye as paye,
+               0 as nb_contributions, 0 as contributions, 0 as nb_depenses,
+               0 as depenses, 0 as nb_historique, NULL as date_paiement
+        FROM archive.cotisations
+        UNION ALL
+        SELECT adherent_id, 0, 0, 0, 1, montant, 0, 0, 0, date_paiement
+        FROM archive.contributions
+        UNION ALL
+        SELECT adherent_id, 0, 0, 0, 0, 0, 1, montant, 0, NULL FROM archive.depenses
+        UNION ALL
+        SELECT adherent_id, 0, 0, 0, 0, 0, 0, 0, 1, NULL FROM archive.historique
+    )
+    GROUP BY adherent_id;
+
+    INSERT INTO main.archives_annees (annee, annee_id, fichier, nb_cotisations,
+                                      nb_contributions, nb_depenses, nb_historique,
+                                      total_attendu, total_collecte,
+                                      total_contributions, total_depenses)
+    SELECT :annee, :annee_id, :fichier,
+           (SELECT COUNT(*) FROM archive.cotisations),
+           (SELECT COUNT(*) FROM archive.contributions),
+           (SELECT COUNT(*) FROM archive.depenses),
+           (SELECT COUNT(*) FROM archive.historique),
+           (SELECT COALESCE(SUM(montant_du), 0) FROM archive.cotisations),
+           (SELECT COALESCE(SUM(montant_paye), 0) FROM archive.cotisations),
+           (SELECT COALESCE(SUM(montant), 0) FROM archive.contributions),
+           (SELECT COALESCE(SUM(montant), 0) FROM archive.depenses);
+"""
+
+
+class Archives:
+    """Relecture du détail des années archivées"""
+
+    # ATTACH / DETACH sur la connexion partagée : une archive à la fois
+    _verrou = threading.RLock()
+
+    @staticmethod
+    def dossier(db_path=None):
+        """Dossier des archives de la base (défaut: base du DatabaseManager)"""
+        db_path = db_path or DatabaseManager().db_path
+        return os.path.join(os.path.dirname(os.path.abspath(db_path)), NOM_DOSSIER)
+
+    @staticmethod
+    def chemin(annee, db_path=None):
+        """Fichier d'archive d'une année"""
+        return os.path.join(Archives.dossier(db_path), f"archive_{int(annee)}.db")
+
+    @staticmethod
+    def annees(adherent_id=None):
+        """
+        Années archivées
+
+        Args:
+            adherent_id: Uniquement les années où cet adhérent a des lignes archivées
+
+        Returns:
+            Liste d'années, la plus récente en premier
+        """
+        db = DatabaseManager()
+        if adherent_id is None:
+            rows = db.fetch_all("SELECT annee FROM archives_annees ORDER BY annee DESC")
+        else:
+            rows = db.fetch_all(
+                "SELECT annee FROM archives_adherents WHERE adherent_id = ? ORDER BY annee DESC",
+                (adherent_id,)
+            )
+        return [row['annee'] for row in rows]
+
+    @staticmethod
+    def annee_archivee(annee=None, annee_id=None):
+        """
+        Année archivée correspondant à un numéro d'année ou à un id de la table annees
+
+        Returns:
+            Numéro de l'année si elle est archivée, sinon None
+        """
+        db = DatabaseManager()
+        if annee_id is not None:
+            row = db.fetch_one("SELECT annee FROM archives_annees WHERE annee_id = ?", (annee_id,))
+        else:
+            row = db.fetch_one("SELECT annee FROM archives_annees WHERE annee = ?", (annee,))
+        return row['annee'] if row else None
+
+    @staticmethod
+    def annee_appel(appel_id):
+        """Année d'archive d'un appel de fonds archivé, sinon None"""
+        db = DatabaseManager()
+        row = db.fetch_one("SELECT annee FROM archives_appels WHERE appel_id = ?", (appel_id,))
+        return row['annee'] if row else None
+
+    @staticmethod
+    def fetch_all(annee, query, params=None):
+        """
+        Exécute une requête sur l'archive d'une année
+
+        Args:
+            annee: Année archivée
+            query: Requête SELECT ; les tables archivées sont préfixées par
+                   "archive." (les autres tables restent celles de la base principale)
+            params: Paramètres de la requête
+
+        Returns:
+            Liste de lignes (Row objects), vide si l'archive est introuvable
+        """
+        chemin = Archives.chemin(annee)
+        if not os.path.exists(chemin):
+            print(f"Archive introuvable: {chemin}")
+            return []
+
+        db = DatabaseManager()
+        conn = db.get_connection()
+        with Archives._verrou:
+            conn.execute("ATTACH DATABASE ? AS archive", (chemin,))
+            try:
+                return db.fetch_all(query, params)
+            finally:
+                conn.execute("DETACH DATABASE archive")
+
+    @staticmethod
+    def iter_annee(annee, query, params=None):
+        """
+        Parcourt les lignes d'une requête portant sur une année : dans la base
+        principale (par lots, DatabaseManager.iter_all), ou dans l'archive de
+        l'année si elle est archivée
+
+        Args:
+            annee: Numéro de l'année
+            query: Requête dont les tables archivables sont préfixées par
+                   {schema} (ex: "FROM {schema}cotisations")
+            params: Paramètres de la requête
+
+        Returns:
+            Itérateur de lignes (Row objects)
+        """
+        if Archives.annee_archivee(annee) is not None:
+            return iter(Archives.fetch_all(annee, query.format(schema='archive.'), params))
+        return DatabaseManager().iter_all(query.format(schema=''), params)
+
+    @staticmethod
+    def fetch_all_adherent(adherent_id, query, params=None):
+        """
+        Exécute une requête sur chaque archive contenant des lignes de l'adhérent
+
+        Returns:
+            Lignes de toutes ces archives, la plus récente année en premier
+        """
+        rows = []
+        for annee in Archives.annees(adherent_id):
+            rows.extend(Archives.fetch_all(annee, query, params))
+        return rows
+
+
+# ----------------------------------------------------------------------
+# Archivage et restauration (connexion dédiée, une transaction)
+# ----------------------------------------------------------------------
+
+def _connexion(db_path):
+    conn = sqlite3.connect(db_path, timeout=30.0)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+
+def _adherents_annee(conn, annee):
+    """Adhérents ayant des totaux archivés pour l'année"""
+    return [ligne[0] for ligne in conn.execute(
+        "SELECT adherent_id FROM main.archives_adherents WHERE annee = ?", (annee,)
+    )]
+
+
+def archiver_annee(annee, db_path=None, vacuum=False, afficher=print):
+    """
+    Déplace le détail d'une année clôturée dans son archive
+
+    Une année est archivable si elle n'est pas active, si tous ses appels de
+    fonds sont clôturés et si toutes ses cotisations sont payées.
+
+    Args:
+        annee: Numéro de l'année
+        db_path: Base principale (défaut: base du DatabaseManager)
+        vacuum: Compacter la base principale après le transfert
+        afficher: Fonction d'affichage de la progression
+
+    Returns:
+        Dictionnaire du nombre de lignes archivées par table
+    """
+    annee = int(annee)
+    db_path = db_path or DatabaseManager().db_path
+    chemin = Archives.chemin(annee, db_path)
+    conn = _connexion(db_path)
+    try:
+        ligne = conn.execute("SELECT id, active FROM annees WHERE annee = ?", (annee,)).fetchone()
+        if ligne is None:
+            raise ValueError(f"Année {annee} introuvable")
+        if ligne['active']:
+            raise ValueError(f"L'année {annee} est l'année active")
+        if conn.execute("SELECT 1 FROM archives_annees WHERE annee = ?", (annee,)).fetchone():
+            raise ValueError(f"L'année {annee} est déjà archivée")
+        ouverts = conn.execute(
+            "SELECT COUNT(*) FROM appels_de_fonds WHERE annee = ? AND cloture = 0", (annee,)
+        ).fetchone()[0]
+        if ouverts:
+            raise ValueError(f"{ouverts} appel(s) de fonds {annee} non clôturé(s)")
+        impayees = conn.execute("""
+            SELECT COUNT(*) FROM cotisations
+            WHERE statut != 'paye'
+              AND appel_id IN (SELECT id FROM appels_de_fonds WHERE annee = ?)
+        """, (annee,)).fetchone()[0]
+        if impayees:
+            raise ValueError(f"{impayees} cotisation(s) {annee} non soldée(s)")
+        if os.path.exists(chemin):
+            raise ValueError(f"Le fichier {chemin} existe déjà")
+
+        os.makedirs(os.path.dirname(chemin), exist_ok=True)
+        params = {'annee': annee, 'annee_texte': str(annee), 'annee_id': ligne['id'],
+                  'fichier': os.path.basename(chemin)}
+
+        conn.execute("ATTACH DATABASE ? AS archive", (chemin,))
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            comptes = {}
+            for table in TABLES:
+                conn.execute(f"CREATE TABLE archive.{table} AS SELECT * FROM main.{table} WHERE 0")
+                for colonne in _INDEX[table]:
+                    conn.execute(f"CREATE INDEX archive.idx_{table}_{colonne} "
+                                 f"ON {table}({colonne})")
+                comptes[table] = conn.execute(
+                    f"INSERT INTO archive.{table} {_SELECTIONS[table]}", params
+                ).rowcount
+
+            for instruction in _TOTAUX.split(';'):
+                if instruction.strip():
+                    conn.execute(instruction, params)
+
+            # Suppression dans la base principale (contributions avant leurs cotisations)
+            for table in reversed(TABLES):
+                supprimees = conn.execute(
+                    f"DELETE FROM main.{table} WHERE id IN (SELECT id FROM archive.{table})"
+                ).rowcount
+                if supprimees != comptes[table]:
+                    raise sqlite3.DatabaseError(
+                        f"{table}: {comptes[table]} ligne(s) archivée(s), {supprimees} supprimée(s)"
+                    )
+            # Les triggers ont retiré les lignes archivées des relevés : on y
+            # réintègre les totaux de l'année
+            recalculer_releves(conn, _adherents_annee(conn, annee))
+            # Les agrégats mensuels gardent les lignes archivées
+            rollup.ajouter(conn, 'archive')
+            exiger_complete(conn)
+            conn.commit()
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.execute("DETACH DATABASE archive")
+            os.remove(chemin)
+            raise
+        conn.execute("DETACH DATABASE archive")
+
+        for table, nombre in comptes.items():
+            afficher(f"  {table:14} {nombre:8d} ligne(s) archivée(s)")
+        afficher(f"Année {annee} archivée dans {chemin}")
+
+        if vacuum:
+            conn.execute("VACUUM")
+            afficher("Base principale compactée")
+        return comptes
+    finally:
+        conn.close()
+
+
+def restaurer_annee(annee, db_path=None, afficher=print):
+    """
+    Réintègre le détail d'une année archivée dans la base principale
+
+    L'archive est conservée, renommée en archive_<année>.db.restauree.
+
+    Returns:
+        Dictionnaire du nombre de lignes restaurées par table
+    """
+    annee = int(annee)
+    db_path = db_path or DatabaseManager().db_path
+    chemin = Archives.chemin(annee, db_path)
+    conn = _connexion(db_path)
+    try:
+        if not conn.execute("SELECT 1 FROM archives_annees WHERE annee = ?", (annee,)).fetchone():
+            raise ValueError(f"L'année {annee} n'est pas archivée")
+        if not os.path.exists(chemin):
+            raise ValueError(f"Archive introuvable: {chemin}")
+
+        conn.execute("ATTACH DATABASE ? AS archive", (chemin,))
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # Les triggers réintègrent les lignes restaurées dans les agrégats mensuels
+            rollup.ajouter(conn, 'archive', signe=-1)
+            comptes = {}
+            for table in TABLES:
+                colonnes = ', '.join(
+                    ligne['name'] for ligne in conn.execute(f"PRAGMA archive.table_info({table})")
+                )
+                comptes[table] = conn.execute(
+                    f"INSERT INTO main.{table} ({colonnes}) SELECT {colonnes} FROM archive.{table}"
+                ).rowcount
+            adherents = _adherents_annee(conn, annee)
+            for table in ('archives_appels', 'archives_adherents', 'archives_annees'):
+                conn.execute(f"DELETE FROM main.{table} WHERE annee = ?", (annee,))
+            recalculer_releves(conn, adherents)
+            exiger_complete(conn)
+            conn.commit()
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            conn.execute("DETACH DATABASE archive")
+
+        os.replace(chemin, f"{chemin}.restauree")
+        for table, nombre in comptes.items():
+            afficher(f"  {table:14} {nombre:8d} ligne(s) restaurée(s)")
+        afficher(f"Année {annee} restaurée")
+        return comptes
+    finally:
+        conn.close()
+
+
+def main():
+    from config import DATABASE_PATH
+
+    parser = argparse.ArgumentParser(description="Archives des années clôturées")
+    parser.add_argument('action', choices=['liste', 'archiver', 'restaurer'])
+    parser.add_argument('annee', nargs='?', type=int)
+    parser.add_argument('--db', default=DATABASE_PATH, help="Base principale")
+    parser.add_argument('--vacuum', action='store_true',
+                        help="Compacter la base principale après l'archivage")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"Base introuvable : {args.db}")
+        sys.exit(1)
+
+    try:
+        if args.action == 'liste':
+            conn = _connexion(args.db)
+            try:
+                lignes = conn.execute("SELECT * FROM archives_annees ORDER BY annee").fetchall()
+            finally:
+                conn.close()
+            if not lignes:
+                print("Aucune année archivée")
+            for ligne in lignes:
+                print(f"{ligne['annee']}  {ligne['fichier']:22} archivée le {ligne['archivee_le']}  "
+                      f"{ligne['nb_cotisations']} cotisation(s), "
+                      f"{ligne['nb_contributions']} contribution(s), "
+                      f"{ligne['nb_depenses']} dépense(s), {ligne['nb_historique']} événement(s)")
+        elif args.annee is None:
+            parser.error("année obligatoire")
+        elif args.action == 'archiver':
+            archiver_annee(args.annee, args.db, vacuum=args.vacuum)
+        else:
+            restaurer_annee(args.annee, args.db)
+    except (ValueError, sqlite3.Error) as e:
+        print(f"Erreur : {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
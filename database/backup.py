@@ -0,0 +1,553 @@
+"""
+Sauvegardes de la base de données
+- complète : copie en ligne (API backup de SQLite) par étapes de quelques
+  pages séparées d'une courte pause, pour ne pas bloquer l'application,
+  puis compression gzip ;
+- incrémentale : lignes modifiées depuis la sauvegarde précédente, relevées
+  par les triggers de la table journal_modifications (migration 4) ;
+- rétention : seules les BACKUP_RETENTION dernières sauvegardes complètes
+  (et leurs incrémentales) sont conservées ;
+- restauration vérifiée : somme de contrôle de chaque fichier, application
+  de la chaîne complète + incrémentales sur une copie, integrity_check et
+  foreign_key_check, puis remplacement de la base.
+
+Les sauvegardes sont décrites dans <dossier>/sauvegardes.json.
+
+Lancer: python -m database.backup auto|complete|incrementale [--db chemin] [--dossier chemin]
+        python -m database.backup liste|verifier [--fichier nom]
+        python -m database.backup restaurer [--fichier nom] [--db chemin]
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from config import (BACKUP_DIR, BACKUP_RETENTION, BACKUP_INCREMENTALES_MAX,
+                    BACKUP_PAGES_PAR_ETAPE, BACKUP_PAUSE, DB_TIMEOUT)
+from database.migrations import recalculer_releves
+
+MANIFESTE = 'sauvegardes.json'
+
+# Lignes relues par requête lors d'une sauvegarde incrémentale
+TAILLE_LOT = 500
+
+# Marqueur du journal : la prochaine sauvegarde doit être complète
+MARQUEUR_COMPLETE = '*'
+
+
+# ----------------------------------------------------------------------
+# Manifeste et fichiers
+# ----------------------------------------------------------------------
+
+def _lire_manifeste(dossier):
+    chemin = os.path.join(dossier, MANIFESTE)
+    if not os.path.exists(chemin):
+        return []
+    with open(chemin, 'r', encoding='utf-8') as f:
+        return json.load(f)['sauvegardes']
+
+
+def _ecrire_manifeste(dossier, sauvegardes):
+    chemin = os.path.join(dossier, MANIFESTE)
+    with open(f"{chemin}.tmp", 'w', encoding='utf-8') as f:
+        json.dump({'sauvegardes': sauvegardes}, f, indent=2, ensure_ascii=False)
+    os.replace(f"{chemin}.tmp", chemin)
+
+
+def _nom_libre(dossier, type_sauvegarde, extension):
+    horodatage = datetime.now().strftime('%Y%m%d_%H%M%S')
+    nom = f"tontine_{type_sauvegarde}_{horodatage}{extension}"
+    numero = 2
+    while os.path.exists(os.path.join(dossier, nom)):
+        nom = f"tontine_{type_sauvegarde}_{horodatage}_{numero}{extension}"
+        numero += 1
+    return os.path.join(dossier, nom)
+
+
+def _sha256(chemin):
+    empreinte = hashlib.sha256()
+    with open(chemin, 'rb') as f:
+        for bloc in iter(lambda: f.read(1 << 20), b''):
+            empreinte.update(bloc)
+    return empreinte.hexdigest()
+
+
+def _entree(chemin, type_sauvegarde, base, journal_id, version, **autres):
+    return dict({
+        'fichier': os.path.basename(chemin),
+        'type': type_sauvegarde,
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'base': base,
+        'journal_id': journal_id,
+        'version': version,
+        'taille': os.path.getsize(chemin),
+        'sha256': _sha256(chemin),
+    }, **autres)
+
+
+def _chaine(sauvegardes, fichier=None):
+    """
+    Sauvegarde complète suivie de ses incrémentales, jusqu'à fichier inclus
+    (défaut: la chaîne de la dernière sauvegarde)
+    """
+    if not sauvegardes:
+        return []
+    if fichier is None:
+        fichier = sauvegardes[-1]['fichier']
+    cible = next((s for s in sauvegardes if s['fichier'] == fichier), None)
+    if cible is None:
+        raise ValueError(f"Sauvegarde inconnue : {fichier}")
+    chaine = []
+    for sauvegarde in sauvegardes:
+        if sauvegarde['base'] == cible['base']:
+            chaine.append(sauvegarde)
+        if sauvegarde is cible:
+            break
+    return chaine
+
+
+# ----------------------------------------------------------------------
+# Journal des modifications
+# ----------------------------------------------------------------------
+
+def _dernier_journal(conn):
+    """Dernier id attribué dans journal_modifications (None sans journal)"""
+    try:
+        if not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'journal_modifications'"
+        ).fetchone():
+            return None
+        row = conn.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'journal_modifications'"
+        ).fetchone()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else 0
+
+
+def exiger_complete(conn):
+    """
+    Note dans le journal que la prochaine sauvegarde doit être complète
+    (modification que le journal ne suit pas : archivage d'une année...).
+    À appeler dans la transaction de la modification.
+    """
+    if _dernier_journal(conn) is not None:
+        conn.execute("INSERT INTO journal_modifications (table_nom, ligne_id) VALUES (?, 0)",
+                     (MARQUEUR_COMPLETE,))
+
+
+def _purger_journal(conn, journal_id):
+    """Supprime les entrées du journal couvertes par une sauvegarde"""
+    if journal_id:
+        conn.execute("DELETE FROM journal_modifications WHERE id <= ?", (journal_id,))
+        conn.commit()
+
+
+def _chemin_base(conn):
+    return conn.execute("PRAGMA database_list").fetchone()[2]
+
+
+# ----------------------------------------------------------------------
+# Sauvegardes
+# ----------------------------------------------------------------------
+
+def sauvegarde_complete(conn, dossier=None, pages=BACKUP_PAGES_PAR_ETAPE, pause=BACKUP_PAUSE,
+                        garder=BACKUP_RETENTION, afficher=print):
+    """
+    Sauvegarde complète compressée
+
+    Args:
+        conn: Connexion à la base (la connexion de l'application : ses propres
+              écritures pendant la copie n'obligent pas à la recommencer)
+        dossier: Dossier des sauvegardes (défaut: BACKUP_DIR)
+        pages: Pages copiées par étape
+        pause: Pause entre deux étapes (secondes)
+        garder: Nombre de sauvegardes complètes conservées
+        afficher: Fonction d'affichage
+
+    Returns:
+        Chemin du fichier de sauvegarde (.db.gz)
+    """
+    dossier = dossier or BACKUP_DIR
+    os.makedirs(dossier, exist_ok=True)
+    chemin = _nom_libre(dossier, 'complete', '.db.gz')
+    temporaire = f"{chemin}.tmp"
+    if conn.in_transaction:
+        conn.commit()
+
+    def progression(statut, restantes, total):
+        if pause and restantes:
+            time.sleep(pause)
+
+    debut = time.perf_counter()
+    copie = sqlite3.connect(temporaire)
+    try:
+        conn.backup(copie, pages=pages, progress=progression)
+        journal_id = _dernier_journal(copie)
+        version = copie.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        copie.close()
+
+    try:
+        with open(temporaire, 'rb') as source, gzip.open(chemin, 'wb', compresslevel=6) as cible:
+            shutil.copyfileobj(source, cible, 1 << 20)
+        taille_base = os.path.getsize(temporaire)
+    finally:
+        os.remove(temporaire)
+
+    sauvegardes = _lire_manifeste(dossier)
+    entree = _entree(chemin, 'complete', os.path.basename(chemin), journal_id, version,
+                     taille_base=taille_base)
+    sauvegardes.append(entree)
+    _ecrire_manifeste(dossier, sauvegardes)
+    _purger_journal(conn, journal_id)
+
+    afficher(f"Sauvegarde complète créée: {chemin} "
+             f"({taille_base // 1024} Ko -> {entree['taille'] // 1024} Ko, "
+             f"{time.perf_counter() - debut:.1f} s)")
+    appliquer_retention(dossier, garder, afficher)
+    return chemin
+
+
+def sauvegarde_incrementale(conn, dossier=None, afficher=print, **options):
+    """
+    Sauvegarde des lignes modifiées depuis la sauvegarde précédente
+
+    Une sauvegarde complète est faite à la place s'il n'y en a pas encore,
+    si le schéma a changé depuis ou si une modification non suivie par le
+    journal a eu lieu (archivage, restauration).
+
+    Args:
+        conn: Connexion à la base
+        dossier: Dossier des sauvegardes (défaut: BACKUP_DIR)
+        afficher: Fonction d'affichage
+        options: Options de sauvegarde_complete
+
+    Returns:
+        Chemin du fichier créé, ou None s'il n'y a rien à sauvegarder
+    """
+    dossier = dossier or BACKUP_DIR
+    chaine = _chaine(_lire_manifeste(dossier))
+    if not chaine:
+        afficher("Aucune sauvegarde complète : sauvegarde complète")
+        return sauvegarde_complete(conn, dossier, afficher=afficher, **options)
+    base, precedente = chaine[0], chaine[-1]
+    if conn.in_transaction:
+        conn.commit()
+
+    # Lecture sur une connexion dédiée, dans une transaction : instantané cohérent
+    lecture = sqlite3.connect(_chemin_base(conn), timeout=DB_TIMEOUT)
+    lecture.row_factory = sqlite3.Row
+    try:
+        lecture.execute("BEGIN")
+        journal_id = _dernier_journal(lecture)
+        version = lecture.execute("PRAGMA user_version").fetchone()[0]
+        raison = None
+        if journal_id is None or precedente['journal_id'] is None:
+            raison = "journal des modifications absent"
+        elif version != base['version']:
+            raison = "schéma modifié"
+        elif journal_id < precedente['journal_id']:
+            raison = "journal antérieur à la dernière sauvegarde"
+        elif lecture.execute(
+            "SELECT 1 FROM journal_modifications WHERE id > ? AND table_nom = ?",
+            (precedente['journal_id'], MARQUEUR_COMPLETE)
+        ).fetchone():
+            raison = "modification hors journal"
+        if raison:
+            lecture.rollback()
+            lecture.close()
+            afficher(f"Sauvegarde complète nécessaire ({raison})")
+            return sauvegarde_complete(conn, dossier, afficher=afficher, **options)
+
+        modifiees = {}
+        for row in lecture.execute("""
+            SELECT DISTINCT table_nom, ligne_id FROM journal_modifications
+            WHERE id > ? AND id <= ?
+            ORDER BY table_nom, ligne_id
+        """, (precedente['journal_id'], journal_id)):
+            modifiees.setdefault(row['table_nom'], []).append(row['ligne_id'])
+        if not modifiees:
+            afficher("Aucune modification depuis la dernière sauvegarde")
+            return None
+
+        chemin = _nom_libre(dossier, 'incrementale', '.jsonl.gz')
+        nb_lignes = 0
+        with gzip.open(chemin, 'wt', encoding='utf-8', compresslevel=6) as f:
+            f.write(json.dumps({'base': base['fichier'], 'depuis': precedente['journal_id'],
+                                'journal_id': journal_id, 'version': version}) + '\n')
+            for table, ids in modifiees.items():
+                for i in range(0, len(ids), TAILLE_LOT):
+                    lot = ids[i:i + TAILLE_LOT]
+                    lignes = {row['id']: dict(row) for row in lecture.execute(
+                        f"SELECT * FROM {table} WHERE id IN ({','.join('?' * len(lot))})", lot
+                    )}
+                    for ligne_id in lot:
+                        # Ligne absente : supprimée depuis la sauvegarde précédente
+                        f.write(json.dumps({'table': table, 'id': ligne_id,
+                                            'ligne': lignes.get(ligne_id)}) + '\n')
+                    nb_lignes += len(lot)
+        lecture.rollback()
+    finally:
+        lecture.close()
+
+    sauvegardes = _lire_manifeste(dossier)
+    sauvegardes.append(_entree(chemin, 'incrementale', base['fichier'], journal_id, version,
+                               lignes=nb_lignes))
+    _ecrire_manifeste(dossier, sauvegardes)
+    _purger_journal(conn, journal_id)
+    afficher(f"Sauvegarde incrémentale créée: {chemin} ({nb_lignes} ligne(s))")
+    return chemin
+
+
+def sauvegarde_auto(conn, dossier=None, incrementales_max=BACKUP_INCREMENTALES_MAX,
+                    afficher=print, **options):
+    """
+    Sauvegarde incrémentale, ou complète après incrementales_max incrémentales
+
+    Returns:
+        Chemin du fichier créé, ou None s'il n'y a rien à sauvegarder
+    """
+    dossier = dossier or BACKUP_DIR
+    chaine = _chaine(_lire_manifeste(dossier))
+    if chaine and len(chaine) - 1 < incrementales_max:
+        return sauvegarde_incrementale(conn, dossier, afficher=afficher, **options)
+    return sauvegarde_complete(conn, dossier, afficher=afficher, **options)
+
+
+def appliquer_retention(dossier=None, garder=BACKUP_RETENTION, afficher=print):
+    """
+    Supprime les sauvegardes complètes au-delà des garder plus récentes,
+    avec leurs incrémentales
+
+    Returns:
+        Liste des fichiers supprimés
+    """
+    dossier = dossier or BACKUP_DIR
+    sauvegardes = _lire_manifeste(dossier)
+    completes = [s['fichier'] for s in sauvegardes if s['type'] == 'complete']
+    conservees = set(completes[-garder:]) if garder > 0 else set(completes)
+    supprimees = [s['fichier'] for s in sauvegardes if s['base'] not in conservees]
+    if not supprimees:
+        return []
+    _ecrire_manifeste(dossier, [s for s in sauvegardes if s['base'] in conservees])
+    for fichier in supprimees:
+        chemin = os.path.join(dossier, fichier)
+        if os.path.exists(chemin):
+            os.remove(chemin)
+    afficher(f"Rétention: {len(supprimees)} ancienne(s) sauvegarde(s) supprimée(s)")
+    return supprimees
+
+
+# ----------------------------------------------------------------------
+# Restauration
+# ----------------------------------------------------------------------
+
+def _reconstruire(chaine, dossier, chemin, afficher):
+    """Reconstruit la base de la chaîne dans chemin et la vérifie"""
+    for sauvegarde in chaine:
+        fichier = os.path.join(dossier, sauvegarde['fichier'])
+        if not os.path.exists(fichier):
+            raise ValueError(f"Fichier de sauvegarde manquant : {sauvegarde['fichier']}")
+        if _sha256(fichier) != sauvegarde['sha256']:
+            raise ValueError(f"Somme de contrôle invalide : {sauvegarde['fichier']}")
+
+    with gzip.open(os.path.join(dossier, chaine[0]['fichier']), 'rb') as source, \
+            open(chemin, 'wb') as cible:
+        shutil.copyfileobj(source, cible, 1 << 20)
+
+    # Clés étrangères désactivées pendant l'application (ordre des lignes quelconque),
+    # vérifiées à la fin
+    conn = sqlite3.connect(chemin)
+    try:
+        for sauvegarde in chaine[1:]:
+            nb_lignes = 0
+            with gzip.open(os.path.join(dossier, sauvegarde['fichier']), 'rt',
+                           encoding='utf-8') as f:
+                f.readline()
+                conn.execute("BEGIN")
+                for ligne in f:
+                    modification = json.loads(ligne)
+                    table, valeurs = modification['table'], modification['ligne']
+                    if valeurs is None:
+                        conn.execute(f"DELETE FROM {table} WHERE id = ?", (modification['id'],))
+                    else:
+                        # UPDATE puis INSERT plutôt que INSERT OR REPLACE : les triggers
+                        # de modification ou d'insertion tiennent les agrégats (une
+                        # clause de conflit externe remplacerait aussi celles des triggers)
+                        autres = [colonne for colonne in valeurs if colonne != 'id']
+                        modifiees = conn.execute(
+                            f"UPDATE {table} SET {', '.join(f'{c} = ?' for c in autres)} "
+                            f"WHERE id = ?",
+                            [valeurs[colonne] for colonne in autres] + [modification['id']]
+                        ).rowcount
+                        if not modifiees:
+                            conn.execute(
+                                f"INSERT INTO {table} ({', '.join(valeurs)}) "
+                                f"VALUES ({', '.join('?' * len(valeurs))})",
+                                list(valeurs.values())
+                            )
+                    nb_lignes += 1
+                conn.commit()
+            afficher(f"  {sauvegarde['fichier']}: {nb_lignes} ligne(s) appliquée(s)")
+
+        # Les relevés de compte (tenus par triggers) ne sont pas journalisés :
+        # recalculés d'après les lignes appliquées
+        if len(chaine) > 1 and conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'releves_adherents'").fetchone():
+            conn.execute("BEGIN")
+            recalculer_releves(conn)
+            conn.commit()
+
+        integrite = conn.execute("PRAGMA integrity_check").fetchone()[0]
+        if integrite != 'ok':
+            raise ValueError(f"Base restaurée corrompue : {integrite}")
+        orphelines = conn.execute("PRAGMA foreign_key_check").fetchall()
+        if orphelines:
+            raise ValueError(f"Base restaurée incohérente : {len(orphelines)} "
+                             f"référence(s) orpheline(s)")
+    finally:
+        conn.close()
+
+
+def verifier(fichier=None, dossier=None, afficher=print):
+    """
+    Vérifie qu'une sauvegarde est restaurable (reconstruction dans un dossier temporaire)
+
+    Args:
+        fichier: Sauvegarde à vérifier (défaut: la dernière)
+        dossier: Dossier des sauvegardes (défaut: BACKUP_DIR)
+
+    Returns:
+        Liste des fichiers de la chaîne vérifiée
+    """
+    dossier = dossier or BACKUP_DIR
+    chaine = _chaine(_lire_manifeste(dossier), fichier)
+    if not chaine:
+        raise ValueError("Aucune sauvegarde")
+    with tempfile.TemporaryDirectory() as temporaire:
+        _reconstruire(chaine, dossier, os.path.join(temporaire, 'verification.db'), afficher)
+    afficher(f"Sauvegarde {chaine[-1]['fichier']} vérifiée ({len(chaine)} fichier(s))")
+    return [s['fichier'] for s in chaine]
+
+
+def restaurer(cible, fichier=None, dossier=None, afficher=print):
+    """
+    Restaure une sauvegarde (complète + incrémentales) à la place de la base cible
+
+    La base cible ne doit pas être ouverte. Elle est conservée sous
+    <cible>.avant_restauration_<horodatage>.
+
+    Args:
+        cible: Chemin de la base à remplacer
+        fichier: Sauvegarde à restaurer (défaut: la dernière)
+        dossier: Dossier des sauvegardes (défaut: BACKUP_DIR)
+
+    Returns:
+        Chemin de l'ancienne base conservée (None si la cible n'existait pas)
+    """
+    dossier = dossier or BACKUP_DIR
+    sauvegardes = _lire_manifeste(dossier)
+    chaine = _chaine(sauvegardes, fichier)
+    if not chaine:
+        raise ValueError("Aucune sauvegarde")
+
+    temporaire = f"{cible}.restauration"
+    try:
+        _reconstruire(chaine, dossier, temporaire, afficher)
+        # La base restaurée repart d'une sauvegarde complète : le journal reprend
+        # après tous les ids déjà sauvegardés et exige une complète
+        conn = sqlite3.connect(temporaire)
+        try:
+            if _dernier_journal(conn) is not None:
+                dernier = max([s['journal_id'] or 0 for s in sauvegardes] + [_dernier_journal(conn)])
+                conn.execute("DELETE FROM journal_modifications")
+                conn.execute("DELETE FROM sqlite_sequence WHERE name = 'journal_modifications'")
+                conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('journal_modifications', ?)",
+                             (dernier,))
+                exiger_complete(conn)
+                conn.commit()
+        finally:
+            conn.close()
+    except Exception:
+        if os.path.exists(temporaire):
+            os.remove(temporaire)
+        raise
+
+    ancienne = None
+    if os.path.exists(cible):
+        ancienne = f"{cible}.avant_restauration_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        os.replace(cible, ancienne)
+        for suffixe in ('-journal', '-wal', '-shm'):
+            if os.path.exists(cible + suffixe):
+                os.replace(cible + suffixe, ancienne + suffixe)
+    os.replace(temporaire, cible)
+    afficher(f"Base restaurée depuis {chaine[-1]['fichier']}"
+             + (f" (ancienne base: {ancienne})" if ancienne else ""))
+    return ancienne
+
+
+# ----------------------------------------------------------------------
+# Ligne de commande
+# ----------------------------------------------------------------------
+
+def main():
+    from config import DATABASE_PATH
+
+    parser = argparse.ArgumentParser(description="Sauvegardes de la base")
+    parser.add_argument('action', choices=['auto', 'complete', 'incrementale', 'liste',
+                                           'verifier', 'restaurer'])
+    parser.add_argument('--db', default=DATABASE_PATH, help="Base sauvegardée ou restaurée")
+    parser.add_argument('--dossier', default=BACKUP_DIR, help="Dossier des sauvegardes")
+    parser.add_argument('--fichier', help="Sauvegarde à vérifier ou restaurer (défaut: la dernière)")
+    parser.add_argument('--garder', type=int, default=BACKUP_RETENTION,
+                        help="Sauvegardes complètes conservées")
+    parser.add_argument('--pages', type=int, default=BACKUP_PAGES_PAR_ETAPE,
+                        help="Pages copiées par étape")
+    parser.add_argument('--pause', type=float, default=BACKUP_PAUSE,
+                        help="Pause entre deux étapes (secondes)")
+    args = parser.parse_args()
+
+    try:
+        if args.action == 'liste':
+            sauvegardes = _lire_manifeste(args.dossier)
+            if not sauvegardes:
+                print("Aucune sauvegarde")
+            for s in sauvegardes:
+                detail = (f"{s['lignes']} ligne(s)" if s['type'] == 'incrementale'
+                          else f"version {s['version']}")
+                print(f"{s['date']}  {s['type']:12} {s['fichier']:45} "
+                      f"{s['taille'] // 1024:6d} Ko  {detail}")
+        elif args.action == 'verifier':
+            verifier(args.fichier, args.dossier)
+        elif args.action == 'restaurer':
+            restaurer(args.db, args.fichier, args.dossier)
+        else:
+            if not os.path.exists(args.db):
+                print(f"Base introuvable : {args.db}")
+                sys.exit(1)
+            conn = sqlite3.connect(args.db, timeout=DB_TIMEOUT)
+            try:
+                options = {'pages': args.pages, 'pause': args.pause, 'garder': args.garder}
+                if args.action == 'complete':
+                    sauvegarde_complete(conn, args.dossier, **options)
+                elif args.action == 'incrementale':
+                    sauvegarde_incrementale(conn, args.dossier, **options)
+                else:
+                    sauvegarde_auto(conn, args.dossier, **options)
+            finally:
+                conn.close()
+    except (ValueError, sqlite3.Error, OSError) as e:
+        print(f"Erreur : {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
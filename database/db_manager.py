@@ -2,9 +2,12 @@
 Gestionnaire de base de données SQLite
 Gestion singleton de la connexion à la base de données
 """
+import hashlib
 import sqlite3
 import os
-from datetime import datetime
+import threading
+import time
+from contextlib import contextmanager
 
 
 class DatabaseManager:
@@ -12,6 +15,15 @@ class DatabaseManager:
 
     _instance = None
     _connection = None
+    _profiler = None
+    _ecouteurs = ()
+    # Une requête à la fois sur la connexion partagée par les threads (serveur
+    # web) : exécution et lecture des lignes ne s'entrelacent pas avec
+    # l'écriture d'un autre thread, qui sinon partirait d'un instantané périmé
+    # ("database is locked" immédiat quand un autre processus a écrit entre-temps)
+    _verrou = threading.RLock()
+    # Profondeur des blocs transaction() en cours (sous _verrou)
+    _niveau_transaction = 0
 
     def __new__(cls, db_path=None):
         if cls._instance is None:
@@ -22,14 +34,54 @@ class DatabaseManager:
         if db_path and not self._connection:
             self.db_path = db_path
             self._ensure_db_directory()
-            self._connection = sqlite3.connect(
-                self.db_path,
-                check_same_thread=False,
-                timeout=30.0
-            )
-            self._connection.row_factory = sqlite3.Row
-            # Activer les foreign keys
-            self._connection.execute("PRAGMA foreign_keys = ON")
+            self._ouvrir()
+
+            from config import SQL_PROFILING
+            if SQL_PROFILING:
+                self.activer_profilage()
+
+    def _ouvrir(self):
+        """Ouvre la connexion sur self.db_path"""
+        self._connection = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            timeout=30.0
+        )
+        self._connection.row_factory = sqlite3.Row
+        # Activer les foreign keys
+        self._connection.execute("PRAGMA foreign_keys = ON")
+
+    def reconnecter(self):
+        """
+        Remplace la connexion par une nouvelle, sur la même base.
+        À appeler dans un processus créé par fork (workers gunicorn) : une
+        connexion SQLite ne doit pas être partagée entre deux processus.
+        """
+        if self._connection is None:
+            return
+        # La connexion héritée n'est pas fermée (ni libérée) : elle appartient
+        # au processus parent
+        self._connection_heritee = self._connection
+        self._ouvrir()
+
+    @staticmethod
+    def activer_wal(db_path):
+        """
+        Passe la base en mode WAL (persistant) : les lectures ne bloquent plus
+        les écritures, ce qui compte quand plusieurs processus la partagent
+        (workers du serveur web, interface Tkinter)
+
+        Returns:
+            Mode de journal obtenu ('wal')
+        """
+        dossier = os.path.dirname(db_path)
+        if dossier and not os.path.exists(dossier):
+            os.makedirs(dossier)
+        conn = sqlite3.connect(db_path, timeout=30.0)
+        try:
+            return conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+        finally:
+            conn.close()
 
     def _ensure_db_directory(self):
         """Crée le répertoire de la base de données s'il n'existe pas"""
@@ -43,6 +95,69 @@ class DatabaseManager:
             raise Exception("Base de données non initialisée")
         return self._connection
 
+    def activer_profilage(self, seuil_lent_ms=None, journal_lent=None):
+        """
+        Active le profilage des requêtes (voir database/profiler.py)
+
+        Args:
+            seuil_lent_ms: Seuil du journal des requêtes lentes (défaut: config)
+            journal_lent: Fichier du journal des requêtes lentes (défaut: config)
+
+        Returns:
+            Le QueryProfiler actif
+        """
+        from config import SQL_SLOW_QUERY_MS, SQL_SLOW_LOG, SQL_PROFILE_PATH
+        from database.profiler import QueryProfiler
+
+        if self._profiler is None:
+            DatabaseManager._profiler = QueryProfiler(
+                seuil_lent_ms if seuil_lent_ms is not None else SQL_SLOW_QUERY_MS,
+                journal_lent or SQL_SLOW_LOG
+            )
+            self.ajouter_ecouteur(self._ecouteur_profilage)
+            # Export des statistiques à la fermeture, pour le rapport CLI
+            import atexit
+            atexit.register(self._profiler.exporter, SQL_PROFILE_PATH)
+        return self._profiler
+
+    def desactiver_profilage(self):
+        """Désactive le profilage (les statistiques collectées sont perdues)"""
+        self.retirer_ecouteur(self._ecouteur_profilage)
+        DatabaseManager._profiler = None
+
+    def get_profiler(self):
+        """Retourne le QueryProfiler actif, ou None"""
+        return self._profiler
+
+    def _ecouteur_profilage(self, query, params, duree_ms, nb_lignes):
+        profiler = self._profiler
+        if profiler is not None:
+            profiler.enregistrer(self._connection, query, params, duree_ms, nb_lignes)
+
+    def ajouter_ecouteur(self, ecouteur):
+        """
+        Ajoute un écouteur appelé après chaque requête (profilage, métriques web)
+
+        Args:
+            ecouteur: Fonction ecouteur(query, params, duree_ms, nb_lignes)
+        """
+        if ecouteur not in DatabaseManager._ecouteurs:
+            DatabaseManager._ecouteurs = DatabaseManager._ecouteurs + (ecouteur,)
+
+    def retirer_ecouteur(self, ecouteur):
+        """Retire un écouteur ajouté par ajouter_ecouteur()"""
+        DatabaseManager._ecouteurs = tuple(
+            e for e in DatabaseManager._ecouteurs if e != ecouteur
+        )
+
+    def _notifier(self, query, params, debut, nb_lignes):
+        """Transmet la durée d'une exécution aux écouteurs"""
+        ecouteurs = self._ecouteurs
+        if ecouteurs:
+            duree_ms = (time.perf_counter() - debut) * 1000
+            for ecouteur in ecouteurs:
+                ecouteur(query, params, duree_ms, nb_lignes)
+
     def execute_query(self, query, params=None):
         """
         Exécute une requête SQL et retourne le cursor
@@ -54,19 +169,38 @@ class DatabaseManager:
         Returns:
             Cursor avec le résultat
         """
+        debut = time.perf_counter()
+        cursor = self._execute(query, params)
+        self._notifier(query, params, debut, cursor.rowcount)
+        return cursor
+
+    def _execute(self, query, params=None, lire=None):
+        """
+        Exécute et valide une requête, sans profilage
+
+        Args:
+            lire: Fonction lire(cursor) appelée avant la validation ; son
+                  résultat est retourné à la place du cursor. Nécessaire pour
+                  un UPDATE ... RETURNING : SQLite refuse de valider tant que
+                  les lignes retournées n'ont pas été lues.
+        """
         conn = self.get_connection()
-        cursor = conn.cursor()
 
-        try:
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-            conn.commit()
-            return cursor
-        except sqlite3.Error as e:
-            conn.rollback()
-            raise Exception(f"Erreur SQL: {str(e)}")
+        with self._verrou:
+            cursor = conn.cursor()
+            try:
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+                resultat = lire(cursor) if lire else cursor
+                if not self._niveau_transaction:
+                    conn.commit()
+                return resultat
+            except sqlite3.Error as e:
+                if not self._niveau_transaction:
+                    conn.rollback()
+                raise Exception(f"Erreur SQL: {str(e)}")
 
     def execute_many(self, query, data):
         """
@@ -80,46 +214,111 @@ class DatabaseManager:
             Cursor avec le résultat
         """
         conn = self.get_connection()
-        cursor = conn.cursor()
-
-        try:
-            cursor.executemany(query, data)
-            conn.commit()
-            return cursor
-        except sqlite3.Error as e:
-            conn.rollback()
-            raise Exception(f"Erreur SQL: {str(e)}")
+        debut = time.perf_counter()
+
+        with self._verrou:
+            cursor = conn.cursor()
+            try:
+                cursor.executemany(query, data)
+                if not self._niveau_transaction:
+                    conn.commit()
+            except sqlite3.Error as e:
+                if not self._niveau_transaction:
+                    conn.rollback()
+                raise Exception(f"Erreur SQL: {str(e)}")
+        premier = data[0] if isinstance(data, (list, tuple)) and data else None
+        self._notifier(query, premier, debut, cursor.rowcount)
+        return cursor
 
     def fetch_one(self, query, params=None):
         """
         Exécute une requête et retourne une seule ligne
 
         Args:
-            query: Requête SQL SELECT
+            query: Requête SQL SELECT (ou écriture avec RETURNING)
             params: Paramètres de la requête
 
         Returns:
             Une ligne (Row object) ou None
         """
-        cursor = self.execute_query(query, params)
-        return cursor.fetchone()
+        debut = time.perf_counter()
+        row = self._execute(query, params, lambda cursor: cursor.fetchone())
+        self._notifier(query, params, debut, 1 if row else 0)
+        return row
 
     def fetch_all(self, query, params=None):
         """
         Exécute une requête et retourne toutes les lignes
 
         Args:
-            query: Requête SQL SELECT
+            query: Requête SQL SELECT (ou écriture avec RETURNING)
             params: Paramètres de la requête
 
         Returns:
             Liste de lignes (Row objects)
         """
-        cursor = self.execute_query(query, params)
-        return cursor.fetchall()
+        debut = time.perf_counter()
+        rows = self._execute(query, params, lambda cursor: cursor.fetchall())
+        self._notifier(query, params, debut, len(rows))
+        return rows
+
+    def compteur_modifications(self):
+        """
+        Compteur des modifications de la base : séquence de journal_modifications,
+        incrémentée par les triggers à chaque écriture sur les tables journalisées
+        (quel que soit le processus qui écrit)
+        """
+        row = self.fetch_one(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'journal_modifications'"
+        )
+        return row['seq'] if row else 0
+
+    def iter_all(self, query, params=None, taille_lot=500):
+        """
+        Exécute une requête et parcourt ses lignes par lots, sans les charger
+        toutes en mémoire (rapports sur une année complète)
+
+        Args:
+            query: Requête SQL SELECT
+            params: Paramètres de la requête
+            taille_lot: Nombre de lignes lues à la fois
 
-    def create_tables(self):
-        """Crée les tables de la base de données à partir du schema.sql"""
+        Yields:
+            Lignes (Row objects) ; la durée transmise aux écouteurs court
+            jusqu'à la dernière ligne lue
+        """
+        debut = time.perf_counter()
+        cursor = self._execute(query, params)
+        nb_lignes = 0
+        try:
+            while True:
+                try:
+                    rows = cursor.fetchmany(taille_lot)
+                except sqlite3.Error as e:
+                    raise Exception(f"Erreur SQL: {str(e)}")
+                if not rows:
+                    break
+                nb_lignes += len(rows)
+                yield from rows
+        finally:
+            cursor.close()
+            self._notifier(query, params, debut, nb_lignes)
+
+    def create_tables(self, force=False):
+        """
+        Crée les tables de la base de données à partir du schema.sql
+
+        La somme de contrôle du schema.sql appliqué est conservée dans la
+        table schema_meta : si elle n'a pas changé et qu'aucune migration
+        n'est en attente, le script n'est pas réexécuté (pas de verrou en
+        écriture au démarrage).
+
+        Args:
+            force: Réexécuter le script même si le schéma est à jour
+
+        Returns:
+            True si le schéma a été (re)créé, False s'il était à jour
+        """
         schema_path = os.path.join(
             os.path.dirname(__file__),
             'schema.sql'
@@ -128,21 +327,75 @@ class DatabaseManager:
         if not os.path.exists(schema_path):
             raise Exception(f"Fichier schema.sql non trouvé: {schema_path}")
 
-        with open(schema_path, 'r', encoding='utf-8') as f:
-            schema_sql = f.read()
+        with open(schema_path, 'rb') as f:
+            schema_bytes = f.read()
+        checksum = hashlib.sha256(schema_bytes).hexdigest()
+
+        if not force and self._schema_a_jour(checksum):
+            print("Schéma à jour")
+            return False
 
         conn = self.get_connection()
         try:
-            conn.executescript(schema_sql)
+            conn.executescript(schema_bytes.decode('utf-8'))
             conn.commit()
             print("Tables créées avec succès")
         except sqlite3.Error as e:
             conn.rollback()
             raise Exception(f"Erreur lors de la création des tables: {str(e)}")
 
+        self.appliquer_migrations()
+
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS schema_meta (
+                    cle TEXT PRIMARY KEY,
+                    valeur TEXT
+                )
+            """)
+            conn.execute(
+                "INSERT OR REPLACE INTO schema_meta (cle, valeur) VALUES ('schema_checksum', ?)",
+                (checksum,)
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            raise Exception(f"Erreur lors de l'enregistrement du schéma: {str(e)}")
+        return True
+
+    def _schema_a_jour(self, checksum):
+        """Vrai si ce schema.sql a déjà été appliqué et toutes les migrations aussi"""
+        from database.migrations import version_cible
+
+        conn = self.get_connection()
+        try:
+            row = conn.execute(
+                "SELECT valeur FROM schema_meta WHERE cle = 'schema_checksum'"
+            ).fetchone()
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+        except sqlite3.Error:
+            # Base neuve ou antérieure au suivi du schéma
+            return False
+        return row is not None and row[0] == checksum and version >= version_cible()
+
+    def appliquer_migrations(self):
+        """
+        Met le schéma à jour (database/migrations.py)
+
+        Returns:
+            Liste des migrations appliquées
+        """
+        from database.migrations import migrer
+
+        try:
+            return migrer(self.get_connection())
+        except sqlite3.Error as e:
+            raise Exception(f"Erreur lors de la migration du schéma: {str(e)}")
+
     def backup_database(self, backup_dir=None):
         """
-        Crée une sauvegarde de la base de données
+        Crée une sauvegarde complète compressée de la base de données
+        (copie en ligne par étapes, voir database/backup.py)
 
         Args:
             backup_dir: Répertoire de sauvegarde (optionnel)
@@ -150,6 +403,8 @@ class DatabaseManager:
         Returns:
             Chemin du fichier de sauvegarde
         """
+        from database.backup import sauvegarde_complete
+
         if not backup_dir:
             backup_dir = os.path.join(
                 os.path.dirname(self.db_path),
@@ -157,23 +412,9 @@ class DatabaseManager:
                 'backups'
             )
 
-        if not os.path.exists(backup_dir):
-            os.makedirs(backup_dir)
-
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        backup_filename = f"tontine_backup_{timestamp}.db"
-        backup_path = os.path.join(backup_dir, backup_filename)
-
-        # Créer une copie de la base de données
-        source_conn = self.get_connection()
-        backup_conn = sqlite3.connect(backup_path)
-
         try:
-            source_conn.backup(backup_conn)
-            backup_conn.close()
-            print(f"Sauvegarde créée: {backup_path}")
-            return backup_path
-        except sqlite3.Error as e:
+            return sauvegarde_complete(self.get_connection(), os.path.normpath(backup_dir))
+        except (sqlite3.Error, OSError) as e:
             raise Exception(f"Erreur lors de la sauvegarde: {str(e)}")
 
     def close(self):
@@ -183,6 +424,51 @@ class DatabaseManager:
             self._connection = None
             print("Connexion à la base de données fermée")
 
+    @contextmanager
+    def transaction(self):
+        """
+        Bloc transactionnel : les requêtes passées par le DatabaseManager dans
+        le bloc sont validées ensemble à la sortie, ou toutes annulées si une
+        exception en sort. BEGIN IMMEDIATE prend le verrou d'écriture dès le
+        début (un autre processus qui écrit fait attendre, sans échec). Les
+        autres threads attendent la fin du bloc ; un bloc imbriqué fait partie
+        de la transaction englobante.
+
+        Exemple:
+            with DatabaseManager().transaction():
+                ...
+        """
+        with self._verrou:
+            conn = self.get_connection()
+            if self._niveau_transaction:
+                DatabaseManager._niveau_transaction += 1
+                try:
+                    yield conn
+                finally:
+                    DatabaseManager._niveau_transaction -= 1
+                return
+
+            if conn.in_transaction:
+                conn.commit()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+            except sqlite3.Error as e:
+                raise Exception(f"Erreur SQL: {str(e)}")
+            DatabaseManager._niveau_transaction = 1
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            else:
+                try:
+                    conn.commit()
+                except sqlite3.Error as e:
+                    conn.rollback()
+                    raise Exception(f"Erreur SQL: {str(e)}")
+            finally:
+                DatabaseManager._niveau_transaction = 0
+
     def begin_transaction(self):
         """Démarre une transaction"""
         conn = self.get_connection()
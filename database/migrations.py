@@ -0,0 +1,833 @@
+"""
+Migrations du schéma de la base de données
+schema.sql est le schéma de référence (version 0) : il n'est plus modifié.
+Chaque évolution (index, colonne, table de synthèse...) est une migration
+numérotée ; la version atteinte est conservée dans PRAGMA user_version.
+
+Une migration peut comporter un remplissage (backfill) exécuté par petits
+lots, chacun validé séparément : la base reste utilisable pendant la mise à
+jour et une migration interrompue reprend au dernier lot validé.
+
+Lancer: python -m database.migrations [--db chemin] [--dry-run]
+                                      [--taille-lot N] [--pause secondes]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+
+from database import rollup
+
+# Taille par défaut des lots de remplissage
+TAILLE_LOT = 500
+
+
+class Migration:
+    """Évolution du schéma : script SQL puis remplissage optionnel"""
+
+    def __init__(self, version, description, sql=None, backfill=None,
+                 reconstruction=False, colonnes=()):
+        """
+        Args:
+            version: Numéro de la migration (user_version atteint)
+            description: Description courte
+            sql: Script SQL du changement de schéma (exécuté dans une transaction)
+            colonnes: Colonnes ajoutées avant le script, (table, "nom TYPE") ;
+                      une colonne déjà présente n'est pas ajoutée à nouveau
+                      (ALTER TABLE ... ADD COLUMN n'a pas de IF NOT EXISTS)
+            backfill: Fonction backfill(conn, dernier_id, taille_lot) -> dernier id
+                      traité, ou None quand il n'y a plus rien à traiter
+            reconstruction: Le script reconstruit des tables (créer, copier,
+                            supprimer, renommer) : les clés étrangères sont
+                            désactivées le temps du script, sinon la suppression
+                            de l'ancienne table déclencherait les ON DELETE CASCADE
+        """
+        self.version = version
+        self.description = description
+        self.sql = sql
+        self.backfill = backfill
+        self.reconstruction = reconstruction
+        self.colonnes = colonnes
+
+    def __repr__(self):
+        return f"Migration({self.version}, {self.description!r})"
+
+
+def backfill_par_id(table, sql, compter=None):
+    """
+    Construit un remplissage qui parcourt une table par id croissant
+
+    Args:
+        table: Table parcourue
+        sql: Requête appliquée à un lot, avec deux paramètres (id > ?, id <= ?)
+        compter: Requête comptant les lignes à traiter (défaut: toute la table)
+
+    Returns:
+        Fonction backfill(conn, dernier_id, taille_lot)
+    """
+    def backfill(conn, dernier_id, taille_lot):
+        fin = conn.execute(
+            f"SELECT MAX(id) FROM (SELECT id FROM {table} WHERE id > ? ORDER BY id LIMIT ?)",
+            (dernier_id, taille_lot)
+        ).fetchone()[0]
+        if fin is None:
+            return None
+        conn.execute(sql, (dernier_id, fin))
+        return fin
+
+    backfill.compter = lambda conn: conn.execute(
+        compter or f"SELECT COUNT(*) FROM {table}"
+    ).fetchone()[0]
+    return backfill
+
+
+def _en_centimes(colonne):
+    """Expression SQL convertissant un montant REAL (euros) en centimes entiers"""
+    return f"CAST(ROUND({colonne} * 100) AS INTEGER)"
+
+
+# Montants en centimes : chaque table est reconstruite avec des colonnes
+# INTEGER (SQLite ne sait pas changer le type d'une colonne), puis ses index
+# et triggers sont recréés.
+_MONTANTS_EN_CENTIMES = f"""
+    CREATE TABLE adherents_centimes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nom TEXT NOT NULL,
+        prenom TEXT NOT NULL,
+        telephone TEXT,
+        email TEXT,
+        adresse TEXT,
+        date_entree DATE DEFAULT (date('now')),
+        date_sortie DATE,
+        actif INTEGER DEFAULT 1,
+        frais_entree INTEGER DEFAULT 0,
+        frais_entree_paye INTEGER DEFAULT 1,
+        notes TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    INSERT INTO adherents_centimes
+    SELECT id, nom, prenom, telephone, email, adresse, date_entree, date_sortie,
+           actif, {_en_centimes('frais_entree')}, frais_entree_paye, notes,
+           created_at, updated_at
+    FROM adherents;
+    DROP TABLE adherents;
+    ALTER TABLE adherents_centimes RENAME TO adherents;
+
+    CREATE TABLE appels_de_fonds_centimes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        annee INTEGER NOT NULL,
+        montant INTEGER NOT NULL,
+        description TEXT,
+        admin_id INTEGER,
+        date_lancement DATE NOT NULL,
+        cloture INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    INSERT INTO appels_de_fonds_centimes
+    SELECT id, annee, {_en_centimes('montant')}, description, admin_id,
+           date_lancement, cloture, created_at, updated_at
+    FROM appels_de_fonds;
+    DROP TABLE appels_de_fonds;
+    ALTER TABLE appels_de_fonds_centimes RENAME TO appels_de_fonds;
+
+    CREATE TABLE cotisations_centimes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        appel_id INTEGER NOT NULL,
+        adherent_id INTEGER NOT NULL,
+        montant_du INTEGER NOT NULL,
+        montant_paye INTEGER DEFAULT 0,
+        statut TEXT DEFAULT 'non_paye' CHECK(statut IN ('non_paye', 'partiel', 'paye')),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (appel_id) REFERENCES appels_de_fonds(id) ON DELETE CASCADE,
+        FOREIGN KEY (adherent_id) REFERENCES adherents(id) ON DELETE CASCADE,
+        UNIQUE(appel_id, adherent_id)
+    );
+    INSERT INTO cotisations_centimes
+    SELECT id, appel_id, adherent_id, {_en_centimes('montant_du')},
+           {_en_centimes('montant_paye')}, statut, created_at, updated_at
+    FROM cotisations;
+    DROP TABLE cotisations;
+    ALTER TABLE cotisations_centimes RENAME TO cotisations;
+
+    CREATE TABLE contributions_centimes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        adherent_id INTEGER NOT NULL,
+        cotisation_id INTEGER,
+        montant INTEGER NOT NULL,
+        date_paiement DATE NOT NULL,
+        mode_paiement TEXT,
+        reference_paiement TEXT,
+        admin_id INTEGER CHECK(admin_id BETWEEN 1 AND 5),
+        type_paiement TEXT DEFAULT 'cotisation' CHECK(type_paiement IN ('cotisation', 'frais_entree')),
+        notes TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (adherent_id) REFERENCES adherents(id) ON DELETE CASCADE,
+        FOREIGN KEY (cotisation_id) REFERENCES cotisations(id) ON DELETE SET NULL
+    );
+    INSERT INTO contributions_centimes
+    SELECT id, adherent_id, cotisation_id, {_en_centimes('montant')}, date_paiement,
+           mode_paiement, reference_paiement, admin_id, type_paiement, notes,
+           created_at, updated_at
+    FROM contributions;
+    DROP TABLE contributions;
+    ALTER TABLE contributions_centimes RENAME TO contributions;
+
+    CREATE TABLE depenses_centimes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        annee_id INTEGER NOT NULL,
+        adherent_id INTEGER NOT NULL,
+        defunt_est_adherent INTEGER NOT NULL DEFAULT 0,
+        defunt_nom TEXT,
+        defunt_relation TEXT,
+        date_deces DATE NOT NULL,
+        pays_destination TEXT,
+        transport_services INTEGER DEFAULT 0,
+        billet_avion INTEGER DEFAULT 0,
+        imam INTEGER DEFAULT 0,
+        mairie INTEGER DEFAULT 0,
+        autre1 INTEGER DEFAULT 0,
+        autre2 INTEGER DEFAULT 0,
+        autre3 INTEGER DEFAULT 0,
+        montant INTEGER NOT NULL DEFAULT 0,
+        notes TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (annee_id) REFERENCES annees(id) ON DELETE CASCADE,
+        FOREIGN KEY (adherent_id) REFERENCES adherents(id) ON DELETE CASCADE
+    );
+    INSERT INTO depenses_centimes
+    SELECT id, annee_id, adherent_id, defunt_est_adherent, defunt_nom,
+           defunt_relation, date_deces, pays_destination,
+           {_en_centimes('transport_services')}, {_en_centimes('billet_avion')},
+           {_en_centimes('imam')}, {_en_centimes('mairie')}, {_en_centimes('autre1')},
+           {_en_centimes('autre2')}, {_en_centimes('autre3')}, {_en_centimes('montant')},
+           notes, created_at, updated_at
+    FROM depenses;
+    DROP TABLE depenses;
+    ALTER TABLE depenses_centimes RENAME TO depenses;
+
+    CREATE TABLE historique_centimes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        adherent_id INTEGER NOT NULL,
+        type_evenement TEXT NOT NULL,
+        description TEXT,
+        montant INTEGER,
+        admin_id INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (adherent_id) REFERENCES adherents(id) ON DELETE CASCADE
+    );
+    INSERT INTO historique_centimes
+    SELECT id, adherent_id, type_evenement, description, {_en_centimes('montant')},
+           admin_id, created_at
+    FROM historique;
+    DROP TABLE historique;
+    ALTER TABLE historique_centimes RENAME TO historique;
+
+    CREATE INDEX IF NOT EXISTS idx_adherents_nom ON adherents(nom);
+    CREATE INDEX IF NOT EXISTS idx_adherents_actif ON adherents(actif);
+    CREATE INDEX IF NOT EXISTS idx_appels_annee ON appels_de_fonds(annee);
+    CREATE INDEX IF NOT EXISTS idx_cotisations_adherent ON cotisations(adherent_id);
+    CREATE INDEX IF NOT EXISTS idx_cotisations_statut ON cotisations(statut);
+    CREATE INDEX IF NOT EXISTS idx_cotisations_impayees
+        ON cotisations(adherent_id, montant_du, montant_paye, statut)
+        WHERE statut != 'paye';
+    CREATE INDEX IF NOT EXISTS idx_cotisations_appel_stats
+        ON cotisations(appel_id, statut, montant_du, montant_paye);
+    CREATE INDEX IF NOT EXISTS idx_contributions_adherent ON contributions(adherent_id);
+    CREATE INDEX IF NOT EXISTS idx_contributions_cotisation ON contributions(cotisation_id);
+    CREATE INDEX IF NOT EXISTS idx_contributions_date ON contributions(date_paiement);
+    CREATE INDEX IF NOT EXISTS idx_depenses_annee ON depenses(annee_id);
+    CREATE INDEX IF NOT EXISTS idx_depenses_date ON depenses(date_deces);
+    CREATE INDEX IF NOT EXISTS idx_historique_adherent_date ON historique(adherent_id, created_at);
+
+    CREATE TRIGGER IF NOT EXISTS update_adherent_timestamp
+    AFTER UPDATE ON adherents
+    BEGIN
+        UPDATE adherents SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+    END;
+    CREATE TRIGGER IF NOT EXISTS update_appel_timestamp
+    AFTER UPDATE ON appels_de_fonds
+    BEGIN
+        UPDATE appels_de_fonds SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+    END;
+    CREATE TRIGGER IF NOT EXISTS update_cotisation_timestamp
+    AFTER UPDATE ON cotisations
+    BEGIN
+        UPDATE cotisations SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+    END;
+    CREATE TRIGGER IF NOT EXISTS update_contribution_timestamp
+    AFTER UPDATE ON contributions
+    BEGIN
+        UPDATE contributions SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+    END;
+    CREATE TRIGGER IF NOT EXISTS update_depense_timestamp
+    AFTER UPDATE ON depenses
+    BEGIN
+        UPDATE depenses SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+    END;
+"""
+
+
+# Tables suivies par le journal des modifications (sauvegardes incrémentales,
+# database/backup.py). Une migration qui reconstruit l'une d'elles doit
+# recréer ses triggers journal_*.
+TABLES_JOURNALISEES = ('adherents', 'annees', 'appels_de_fonds', 'cotisations',
+                       'contributions', 'depenses', 'historique')
+
+
+def _journal_modifications():
+    """Table journal_modifications et triggers qui y notent chaque ligne modifiée"""
+    sql = ["""
+        CREATE TABLE IF NOT EXISTS journal_modifications (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_nom TEXT NOT NULL,
+            ligne_id INTEGER NOT NULL
+        );
+    """]
+    for table in TABLES_JOURNALISEES:
+        for evenement, ligne in (('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD')):
+            sql.append(f"""
+        CREATE TRIGGER IF NOT EXISTS journal_{table}_{evenement.lower()}
+        AFTER {evenement} ON {table}
+        BEGIN
+            INSERT INTO journal_modifications (table_nom, ligne_id) VALUES ('{table}', {ligne}.id);
+        END;""")
+    return ''.join(sql)
+
+
+# Relevé de compte par adhérent : totaux tenus à jour par les triggers à chaque
+# écriture (cotisations, paiements, frais d'entrée). Les cotisations et
+# paiements des années archivées restent comptés (database/archives.py
+# reporte leurs totaux à l'archivage).
+def _delta_cotisation(ligne, signe):
+    """Affectations ajoutant (signe '+') ou retirant (signe '-') une cotisation du relevé"""
+    return f"""
+            nb_cotisations = nb_cotisations {signe} 1,
+            nb_impayees = nb_impayees {signe} (CASE WHEN {ligne}.statut != 'paye' THEN 1 ELSE 0 END),
+            total_du = total_du {signe} {ligne}.montant_du,
+            total_paye = total_paye {signe} {ligne}.montant_paye,
+            reste_impaye = reste_impaye {signe} (CASE WHEN {ligne}.statut != 'paye'
+                THEN {ligne}.montant_du - {ligne}.montant_paye ELSE 0 END),
+            maj_le = CURRENT_TIMESTAMP"""
+
+
+def _dernier_paiement(ligne):
+    """Date du dernier paiement de l'adhérent de la ligne, années archivées comprises"""
+    return f"""COALESCE(
+                (SELECT MAX(date_paiement) FROM contributions WHERE adherent_id = {ligne}.adherent_id),
+                (SELECT MAX(dernier_paiement) FROM archives_adherents
+                 WHERE adherent_id = {ligne}.adherent_id))"""
+
+
+_RELEVES_ADHERENTS = f"""
+    CREATE TABLE IF NOT EXISTS releves_adherents (
+        adherent_id INTEGER PRIMARY KEY REFERENCES adherents(id) ON DELETE CASCADE,
+        nb_cotisations INTEGER NOT NULL DEFAULT 0,
+        nb_impayees INTEGER NOT NULL DEFAULT 0,
+        total_du INTEGER NOT NULL DEFAULT 0,
+        total_paye INTEGER NOT NULL DEFAULT 0,
+        reste_impaye INTEGER NOT NULL DEFAULT 0,
+        total_verse INTEGER NOT NULL DEFAULT 0,
+        dernier_paiement DATE,
+        frais_entree INTEGER NOT NULL DEFAULT 0,
+        frais_entree_paye INTEGER NOT NULL DEFAULT 1,
+        maj_le TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_releves_impayes
+        ON releves_adherents(adherent_id, nb_impayees, reste_impaye)
+        WHERE nb_impayees > 0;
+
+    CREATE TRIGGER IF NOT EXISTS releve_adherent_insert
+    AFTER INSERT ON adherents
+    BEGIN
+        INSERT OR IGNORE INTO releves_adherents (adherent_id, frais_entree, frais_entree_paye)
+        VALUES (NEW.id, COALESCE(NEW.frais_entree, 0), COALESCE(NEW.frais_entree_paye, 1));
+    END;
+    CREATE TRIGGER IF NOT EXISTS releve_adherent_frais
+    AFTER UPDATE OF frais_entree, frais_entree_paye ON adherents
+    BEGIN
+        UPDATE releves_adherents
+        SET frais_entree = COALESCE(NEW.frais_entree, 0),
+            frais_entree_paye = COALESCE(NEW.frais_entree_paye, 1),
+            maj_le = CURRENT_TIMESTAMP
+        WHERE adherent_id = NEW.id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS releve_cotisation_insert
+    AFTER INSERT ON cotisations
+    BEGIN
+        INSERT OR IGNORE INTO releves_adherents (adherent_id) VALUES (NEW.adherent_id);
+        UPDATE releves_adherents SET {_delta_cotisation('NEW', '+')}
+        WHERE adherent_id = NEW.adherent_id;
+    END;
+    CREATE TRIGGER IF NOT EXISTS releve_cotisation_update
+    AFTER UPDATE OF adherent_id, montant_du, montant_paye, statut ON cotisations
+    BEGIN
+        UPDATE releves_adherents SET {_delta_cotisation('OLD', '-')}
+        WHERE adherent_id = OLD.adherent_id;
+        INSERT OR IGNORE INTO releves_adherents (adherent_id) VALUES (NEW.adherent_id);
+        UPDATE releves_adherents SET {_delta_cotisation('NEW', '+')}
+        WHERE adherent_id = NEW.adherent_id;
+    END;
+    CREATE TRIGGER IF NOT EXISTS releve_cotisation_delete
+    AFTER DELETE ON cotisations
+    BEGIN
+        UPDATE releves_adherents SET {_delta_cotisation('OLD', '-')}
+        WHERE adherent_id = OLD.adherent_id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS releve_contribution_insert
+    AFTER INSERT ON contributions
+    BEGIN
+        INSERT OR IGNORE INTO releves_adherents (adherent_id) VALUES (NEW.adherent_id);
+        UPDATE releves_adherents
+        SET total_verse = total_verse + NEW.montant,
+            dernier_paiement = CASE WHEN dernier_paiement IS NULL OR NEW.date_paiement > dernier_paiement
+                                    THEN NEW.date_paiement ELSE dernier_paiement END,
+            maj_le = CURRENT_TIMESTAMP
+        WHERE adherent_id = NEW.adherent_id;
+    END;
+    CREATE TRIGGER IF NOT EXISTS releve_contribution_update
+    AFTER UPDATE OF adherent_id, montant, date_paiement ON contributions
+    BEGIN
+        UPDATE releves_adherents
+        SET total_verse = total_verse - OLD.montant,
+            dernier_paiement = {_dernier_paiement('OLD')},
+            maj_le = CURRENT_TIMESTAMP
+        WHERE adherent_id = OLD.adherent_id;
+        INSERT OR IGNORE INTO releves_adherents (adherent_id) VALUES (NEW.adherent_id);
+        UPDATE releves_adherents
+        SET total_verse = total_verse + NEW.montant,
+            dernier_paiement = {_dernier_paiement('NEW')},
+            maj_le = CURRENT_TIMESTAMP
+        WHERE adherent_id = NEW.adherent_id;
+    END;
+    CREATE TRIGGER IF NOT EXISTS releve_contribution_delete
+    AFTER DELETE ON contributions
+    BEGIN
+        UPDATE releves_adherents
+        SET total_verse = total_verse - OLD.montant,
+            dernier_paiement = {_dernier_paiement('OLD')},
+            maj_le = CURRENT_TIMESTAMP
+        WHERE adherent_id = OLD.adherent_id;
+    END;
+"""
+
+# Calcul complet du relevé des adhérents retenus par {filtre} (lignes de la base
+# principale + totaux des années archivées)
+_RELEVES_CALCUL = """
+    WITH cibles AS (SELECT id FROM adherents WHERE {filtre})
+    INSERT OR REPLACE INTO releves_adherents (
+        adherent_id, nb_cotisations, nb_impayees, total_du, total_paye, reste_impaye,
+        total_verse, dernier_paiement, frais_entree, frais_entree_paye)
+    SELECT a.id,
+           COALESCE(c.nb_cotisations, 0) + COALESCE(r.nb_cotisations, 0),
+           COALESCE(c.nb_impayees, 0),
+           COALESCE(c.total_du, 0) + COALESCE(r.total_du, 0),
+           COALESCE(c.total_paye, 0) + COALESCE(r.total_paye, 0),
+           COALESCE(c.reste_impaye, 0),
+           COALESCE(p.total_verse, 0) + COALESCE(r.total_contributions, 0),
+           COALESCE(p.dernier_paiement, r.dernier_paiement),
+           COALESCE(a.frais_entree, 0),
+           COALESCE(a.frais_entree_paye, 1)
+    FROM adherents a
+    LEFT JOIN (
+        SELECT adherent_id,
+               COUNT(*) as nb_cotisations,
+               SUM(CASE WHEN statut != 'paye' THEN 1 ELSE 0 END) as nb_impayees,
+               SUM(montant_du) as total_du,
+               SUM(montant_paye) as total_paye,
+               SUM(CASE WHEN statut != 'paye' THEN montant_du - montant_paye ELSE 0 END)
+                   as reste_impaye
+        FROM cotisations
+        WHERE adherent_id IN cibles
+        GROUP BY adherent_id
+    ) c ON c.adherent_id = a.id
+    LEFT JOIN (
+        SELECT adherent_id, SUM(montant) as total_verse, MAX(date_paiement) as dernier_paiement
+        FROM contributions
+        WHERE adherent_id IN cibles
+        GROUP BY adherent_id
+    ) p ON p.adherent_id = a.id
+    LEFT JOIN (
+        SELECT adherent_id,
+               SUM(nb_cotisations) as nb_cotisations,
+               SUM(total_du) as total_du,
+               SUM(total_paye) as total_paye,
+               SUM(total_contributions) as total_contributions,
+               MAX(dernier_paiement) as dernier_paiement
+        FROM archives_adherents
+        WHERE adherent_id IN cibles
+        GROUP BY adherent_id
+    ) r ON r.adherent_id = a.id
+    WHERE a.id IN cibles
+"""
+
+
+def recalculer_releves(conn, adherent_ids=None):
+    """
+    Recalcule entièrement le relevé de compte d'adhérents (après un archivage,
+    une restauration ou une reconstruction de sauvegarde), dans la transaction
+    en cours
+
+    Args:
+        conn: Connexion SQLite
+        adherent_ids: Identifiants des adhérents (défaut: tous)
+
+    Returns:
+        Nombre de relevés recalculés
+    """
+    if adherent_ids is None:
+        return conn.execute(_RELEVES_CALCUL.format(filtre="1")).rowcount
+    ids = [int(adherent_id) for adherent_id in adherent_ids]
+    if not ids:
+        return 0
+    return conn.execute(
+        _RELEVES_CALCUL.format(filtre="id IN (SELECT value FROM json_each(?))"),
+        (json.dumps(ids),)
+    ).rowcount
+
+
+# ----------------------------------------------------------------------
+# Migrations (ne jamais modifier une migration publiée : en ajouter une)
+# ----------------------------------------------------------------------
+
+MIGRATIONS = [
+    Migration(1, "Index couvrants et partiels (impayes, statistiques d'appel, historique)", """
+        CREATE INDEX IF NOT EXISTS idx_cotisations_impayees
+            ON cotisations(adherent_id, montant_du, montant_paye, statut)
+            WHERE statut != 'paye';
+        CREATE INDEX IF NOT EXISTS idx_cotisations_appel_stats
+            ON cotisations(appel_id, statut, montant_du, montant_paye);
+        CREATE INDEX IF NOT EXISTS idx_historique_adherent_date
+            ON historique(adherent_id, created_at);
+        DROP INDEX IF EXISTS idx_cotisations_appel;
+        DROP INDEX IF EXISTS idx_historique_adherent;
+    """),
+    Migration(2, "Montants en centimes entiers (INTEGER)", _MONTANTS_EN_CENTIMES,
+              reconstruction=True),
+    Migration(3, "Totaux des annees archivees (database/archives.py)", """
+        CREATE TABLE IF NOT EXISTS archives_annees (
+            annee INTEGER PRIMARY KEY,
+            annee_id INTEGER UNIQUE,
+            fichier TEXT NOT NULL,
+            archivee_le TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            nb_cotisations INTEGER NOT NULL DEFAULT 0,
+            nb_contributions INTEGER NOT NULL DEFAULT 0,
+            nb_depenses INTEGER NOT NULL DEFAULT 0,
+            nb_historique INTEGER NOT NULL DEFAULT 0,
+            total_attendu INTEGER NOT NULL DEFAULT 0,
+            total_collecte INTEGER NOT NULL DEFAULT 0,
+            total_contributions INTEGER NOT NULL DEFAULT 0,
+            total_depenses INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS archives_appels (
+            appel_id INTEGER PRIMARY KEY,
+            annee INTEGER NOT NULL,
+            total INTEGER NOT NULL DEFAULT 0,
+            nb_paye INTEGER NOT NULL DEFAULT 0,
+            nb_partiel INTEGER NOT NULL DEFAULT 0,
+            nb_non_paye INTEGER NOT NULL DEFAULT 0,
+            total_collecte INTEGER NOT NULL DEFAULT 0,
+            total_attendu INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS archives_adherents (
+            adherent_id INTEGER NOT NULL,
+            annee INTEGER NOT NULL,
+            nb_cotisations INTEGER NOT NULL DEFAULT 0,
+            total_du INTEGER NOT NULL DEFAULT 0,
+            total_paye INTEGER NOT NULL DEFAULT 0,
+            nb_contributions INTEGER NOT NULL DEFAULT 0,
+            total_contributions INTEGER NOT NULL DEFAULT 0,
+            nb_depenses INTEGER NOT NULL DEFAULT 0,
+            total_depenses INTEGER NOT NULL DEFAULT 0,
+            nb_historique INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (adherent_id, annee)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_archives_appels_annee ON archives_appels(annee);
+    """),
+    Migration(4, "Journal des modifications (sauvegardes incrementales)",
+              _journal_modifications()),
+    Migration(5, "Releve de compte par adherent tenu par triggers", _RELEVES_ADHERENTS,
+              colonnes=[('archives_adherents', 'dernier_paiement DATE')],
+              backfill=backfill_par_id(
+                  'adherents', _RELEVES_CALCUL.format(filtre="id > ? AND id <= ?"))),
+    Migration(6, "Agregats mensuels des paiements et depenses (database/rollup.py)",
+              rollup.schema(), backfill=rollup.backfill),
+    Migration(7, "Cles d'idempotence des paiements (models/cle_idempotence.py)", """
+        CREATE TABLE IF NOT EXISTS cles_idempotence (
+            cle TEXT PRIMARY KEY,
+            contribution_id INTEGER,
+            cree_le TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            expire_le TIMESTAMP NOT NULL
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_cles_idempotence_expiration
+            ON cles_idempotence(expire_le);
+    """),
+]
+
+
+# ----------------------------------------------------------------------
+# Exécution
+# ----------------------------------------------------------------------
+
+def version_courante(conn):
+    """Version du schéma (PRAGMA user_version)"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def version_cible():
+    """Version atteinte une fois toutes les migrations appliquées"""
+    return MIGRATIONS[-1].version if MIGRATIONS else 0
+
+
+def migrations_en_attente(conn):
+    """Migrations dont la version dépasse celle de la base"""
+    version = version_courante(conn)
+    return [m for m in MIGRATIONS if m.version > version]
+
+
+def _preparer(conn):
+    """Tables de suivi : historique des migrations et reprise des remplissages"""
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            appliquee_le TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            duree_ms REAL
+        );
+        CREATE TABLE IF NOT EXISTS schema_migrations_progression (
+            version INTEGER PRIMARY KEY,
+            schema_applique INTEGER DEFAULT 0,
+            dernier_id INTEGER DEFAULT 0
+        );
+    """)
+
+
+def _instructions(sql):
+    """
+    Découpe un script SQL en instructions (les ';' d'un trigger ou d'une
+    chaîne ne coupent pas), pour l'exécuter dans une transaction déjà ouverte :
+    executescript() validerait d'abord la transaction en cours
+    """
+    instructions, courante = [], ''
+    for morceau in sql.split(';')[:-1]:
+        courante += morceau + ';'
+        if sqlite3.complete_statement(courante):
+            instructions.append(courante.strip())
+            courante = ''
+    if courante.strip() or sql.split(';')[-1].strip():
+        raise sqlite3.ProgrammingError("Script de migration incomplet")
+    return instructions
+
+
+def _ajouter_colonnes(conn, colonnes):
+    """Ajoute les colonnes absentes de leur table (transaction en cours)"""
+    for table, definition in colonnes:
+        nom = definition.split()[0]
+        existantes = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if nom not in existantes:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {definition}")
+
+
+def _progression(conn, migration):
+    """
+    État d'une migration, lu dans la transaction en cours (verrou d'écriture
+    tenu) : un autre processus a pu l'appliquer en attendant le verrou
+
+    Returns:
+        None si la migration est déjà appliquée, sinon (schema_applique, dernier_id)
+    """
+    if version_courante(conn) >= migration.version:
+        return None
+    conn.execute(
+        "INSERT OR IGNORE INTO schema_migrations_progression (version) VALUES (?)",
+        (migration.version,)
+    )
+    return tuple(conn.execute(
+        "SELECT schema_applique, dernier_id FROM schema_migrations_progression WHERE version = ?",
+        (migration.version,)
+    ).fetchone())
+
+
+def _terminer(conn, migration, debut):
+    """Enregistre la migration et la version atteinte (dans la transaction en cours)"""
+    duree_ms = (time.perf_counter() - debut) * 1000
+    conn.execute(
+        "INSERT OR REPLACE INTO schema_migrations (version, description, duree_ms) VALUES (?, ?, ?)",
+        (migration.version, migration.description, duree_ms)
+    )
+    conn.execute("DELETE FROM schema_migrations_progression WHERE version = ?",
+                 (migration.version,))
+    conn.execute(f"PRAGMA user_version = {int(migration.version)}")
+    return duree_ms
+
+
+def _appliquer(conn, migration, taille_lot, pause, afficher):
+    """
+    Applique une migration : schéma, remplissage par lots, puis version.
+    Chaque étape prend le verrou d'écriture (BEGIN IMMEDIATE) puis relit
+    user_version et la progression : quand plusieurs processus démarrent
+    ensemble, un seul applique la migration, les autres la trouvent faite.
+
+    Returns:
+        Durée en millisecondes, ou None si un autre processus l'a appliquée
+    """
+    debut = time.perf_counter()
+
+    # 1. Changement de schéma, en une transaction ; la version est atteinte
+    # dans la même transaction s'il n'y a pas de remplissage
+    # PRAGMA foreign_keys est sans effet dans une transaction : avant BEGIN
+    cles_etrangeres = conn.execute("PRAGMA foreign_keys").fetchone()[0]
+    desactiver = migration.reconstruction and cles_etrangeres
+    if desactiver:
+        conn.execute("PRAGMA foreign_keys = OFF")
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        etat = _progression(conn, migration)
+        if etat is None:
+            conn.commit()
+            return None
+        schema_applique, dernier_id = etat
+        if (migration.sql or migration.colonnes) and not schema_applique:
+            _ajouter_colonnes(conn, migration.colonnes)
+            for instruction in _instructions(migration.sql or ''):
+                conn.execute(instruction)
+            if migration.reconstruction:
+                violations = conn.execute("PRAGMA foreign_key_check").fetchall()
+                if violations:
+                    afficher(f"  attention : {len(violations)} référence(s) orpheline(s) "
+                             f"(PRAGMA foreign_key_check)")
+            conn.execute(
+                "UPDATE schema_migrations_progression SET schema_applique = 1 WHERE version = ?",
+                (migration.version,)
+            )
+        if not migration.backfill:
+            duree_ms = _terminer(conn, migration, debut)
+        conn.commit()
+    except sqlite3.Error:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    finally:
+        if desactiver:
+            conn.execute("PRAGMA foreign_keys = ON")
+    if not migration.backfill:
+        return duree_ms
+
+    # 2. Remplissage par lots, chaque lot validé avec sa position de reprise
+    # (relue sous le verrou : un autre processus a pu avancer entre deux lots)
+    total = getattr(migration.backfill, 'compter', None)
+    total = total(conn) if total else None
+    traites = 0
+    if dernier_id:
+        afficher(f"  reprise du remplissage après l'id {dernier_id}")
+    while True:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            etat = _progression(conn, migration)
+            if etat is None:
+                conn.commit()
+                return None
+            dernier_id = etat[1]
+            fin = migration.backfill(conn, dernier_id, taille_lot)
+            if fin is not None:
+                conn.execute(
+                    "UPDATE schema_migrations_progression SET dernier_id = ? WHERE version = ?",
+                    (fin, migration.version)
+                )
+            else:
+                # 3. Version atteinte, avec le dernier lot
+                duree_ms = _terminer(conn, migration, debut)
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        if fin is None:
+            return duree_ms
+        traites += taille_lot
+        if total:
+            afficher(f"  lot jusqu'à l'id {fin} (~{min(traites, total)}/{total})")
+        if pause:
+            time.sleep(pause)
+
+
+def migrer(conn, dry_run=False, taille_lot=TAILLE_LOT, pause=0.0, afficher=print):
+    """
+    Applique les migrations en attente
+
+    Args:
+        conn: Connexion SQLite (schéma de référence déjà créé)
+        dry_run: Appliquer sur une copie en mémoire de la base, sans la modifier
+        taille_lot: Nombre de lignes par lot de remplissage
+        pause: Pause entre deux lots (secondes), pour laisser passer les autres écritures
+        afficher: Fonction d'affichage de la progression
+
+    Returns:
+        Liste des migrations appliquées (ou qui le seraient en dry-run)
+    """
+    if conn.in_transaction:
+        conn.commit()
+
+    if dry_run:
+        copie = sqlite3.connect(':memory:')
+        conn.backup(copie)
+        try:
+            return migrer(copie, taille_lot=taille_lot, afficher=afficher)
+        finally:
+            copie.close()
+
+    en_attente = migrations_en_attente(conn)
+    if not en_attente:
+        return []
+
+    _preparer(conn)
+    appliquees = []
+    for migration in en_attente:
+        afficher(f"Migration {migration.version} : {migration.description}")
+        duree_ms = _appliquer(conn, migration, taille_lot, pause, afficher)
+        if duree_ms is None:
+            afficher("  déjà appliquée par un autre processus")
+        else:
+            afficher(f"  appliquée en {duree_ms:.0f} ms")
+            appliquees.append(migration)
+    return appliquees
+
+
+def main():
+    from config import DATABASE_PATH
+
+    parser = argparse.ArgumentParser(description="Migrations du schéma")
+    parser.add_argument('--db', default=DATABASE_PATH, help="Base à migrer")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Appliquer sur une copie en mémoire pour vérifier")
+    parser.add_argument('--taille-lot', type=int, default=TAILLE_LOT)
+    parser.add_argument('--pause', type=float, default=0.0,
+                        help="Pause entre deux lots de remplissage (secondes)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"Base introuvable : {args.db}")
+        sys.exit(1)
+
+    conn = sqlite3.connect(args.db, timeout=30.0)
+    try:
+        print(f"Base {args.db} : version {version_courante(conn)}, "
+              f"version cible {version_cible()}")
+        if args.dry_run:
+            print("Mode dry-run : la base n'est pas modifiée")
+        appliquees = migrer(conn, args.dry_run, args.taille_lot, args.pause)
+        if not appliquees:
+            print("Aucune migration en attente")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
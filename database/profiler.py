@@ -0,0 +1,246 @@
+"""
+Profilage des requêtes SQL
+Enregistre, pour chaque requête passée par DatabaseManager, le nombre
+d'exécutions, la latence totale et maximale, les lignes retournées et le
+code appelant. Les requêtes lentes sont journalisées et le plan de chaque
+nouvelle requête est analysé (EXPLAIN QUERY PLAN) pour repérer les parcours
+complets de table.
+
+Activation: DCOMITE_SQL_PROFILING=1 (voir config.py)
+Rapport:    python -m database.profiler logs/profil_sql.json [--tri total_ms] [--limite 20]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+from datetime import datetime
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DOSSIER_DATABASE = os.path.dirname(os.path.abspath(__file__))
+
+# Seules ces requêtes ont un plan d'exécution
+_EXPLICABLES = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+# "SCAN adherents" ou "SCAN c" : parcours complet d'une table, sans index
+# ("SCAN c USING INDEX ..." et "SCAN (subquery-1)" ne sont pas signalés)
+_SCAN_COMPLET = re.compile(r'^SCAN ([^\s(]\S*)$')
+
+
+def normaliser(sql):
+    """Requête sur une seule ligne, espaces réduits (clé des statistiques)"""
+    return ' '.join(sql.split())
+
+
+def trouver_appelant():
+    """
+    Premier appelant hors du package database (modèle, service, vue...)
+
+    Returns:
+        Chaîne "chemin/relatif.py:ligne Classe.methode", ou None
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        fichier = os.path.abspath(frame.f_code.co_filename)
+        if fichier.startswith(RACINE) and not fichier.startswith(DOSSIER_DATABASE):
+            chemin = os.path.relpath(fichier, RACINE).replace(os.sep, '/')
+            # co_qualname n'existe qu'à partir de Python 3.11
+            nom = getattr(frame.f_code, 'co_qualname', frame.f_code.co_name)
+            return f"{chemin}:{frame.f_lineno} {nom}"
+        frame = frame.f_back
+    return None
+
+
+class QueryProfiler:
+    """Statistiques par requête, journal des requêtes lentes et plans d'exécution"""
+
+    def __init__(self, seuil_lent_ms=50.0, journal_lent=None):
+        """
+        Args:
+            seuil_lent_ms: Durée à partir de laquelle une requête est journalisée
+            journal_lent: Fichier du journal des requêtes lentes (optionnel)
+        """
+        self.seuil_lent_ms = seuil_lent_ms
+        self.journal_lent = journal_lent
+        self.statistiques = {}
+        self.debut = datetime.now()
+        self._verrou = threading.Lock()
+        self._local = threading.local()
+
+    # ------------------------------------------------------------------
+    # Enregistrement
+    # ------------------------------------------------------------------
+
+    def enregistrer(self, connexion, sql, params, duree_ms, nb_lignes):
+        """
+        Enregistre une exécution (appelé par DatabaseManager)
+
+        Args:
+            connexion: Connexion SQLite (pour EXPLAIN QUERY PLAN)
+            sql: Requête exécutée
+            params: Paramètres de la requête
+            duree_ms: Durée d'exécution et de lecture des lignes
+            nb_lignes: Lignes retournées (SELECT) ou modifiées
+        """
+        cle = normaliser(sql)
+        appelant = trouver_appelant()
+        nb_lignes = max(0, nb_lignes or 0)
+
+        with self._verrou:
+            stats = self.statistiques.get(cle)
+            nouvelle = stats is None
+            if nouvelle:
+                stats = self.statistiques[cle] = {
+                    'sql': cle, 'nombre': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                    'lignes': 0, 'appelants': {}, 'plan': [], 'scans': []
+                }
+            stats['nombre'] += 1
+            stats['total_ms'] += duree_ms
+            stats['max_ms'] = max(stats['max_ms'], duree_ms)
+            stats['lignes'] += nb_lignes
+            if appelant:
+                stats['appelants'][appelant] = stats['appelants'].get(appelant, 0) + 1
+
+        if nouvelle:
+            plan = self.expliquer(connexion, sql, params)
+            with self._verrou:
+                stats['plan'] = plan
+                stats['scans'] = [m.group(1) for m in map(_SCAN_COMPLET.match, plan) if m]
+
+        collecte = getattr(self._local, 'collecte', None)
+        if collecte is not None:
+            collecte.append({'sql': cle, 'duree_ms': duree_ms, 'lignes': nb_lignes,
+                             'appelant': appelant, 'scans': stats['scans']})
+
+        if duree_ms >= self.seuil_lent_ms:
+            self.journaliser_lente(cle, params, duree_ms, nb_lignes, appelant)
+
+    @staticmethod
+    def expliquer(connexion, sql, params):
+        """
+        Plan d'exécution d'une requête, sans l'exécuter
+
+        Returns:
+            Liste des étapes du plan (colonne "detail" de EXPLAIN QUERY PLAN)
+        """
+        if not sql.lstrip().upper().startswith(_EXPLICABLES):
+            return []
+        try:
+            lignes = connexion.execute(f"EXPLAIN QUERY PLAN {sql}", params or ()).fetchall()
+        except Exception:
+            return []
+        return [ligne[3] for ligne in lignes]
+
+    def journaliser_lente(self, sql, params, duree_ms, nb_lignes, appelant):
+        """Ajoute une requête au journal des requêtes lentes"""
+        if not self.journal_lent:
+            return
+        ligne = (f"{datetime.now().isoformat(timespec='seconds')} {duree_ms:.1f} ms "
+                 f"{nb_lignes} ligne(s) [{appelant or '?'}] {sql} -- {params!r}"[:2000])
+        with self._verrou:
+            os.makedirs(os.path.dirname(self.journal_lent), exist_ok=True)
+            with open(self.journal_lent, 'a', encoding='utf-8') as f:
+                f.write(ligne + '\n')
+
+    # ------------------------------------------------------------------
+    # Collecte par requête HTTP (panneau de débogage)
+    # ------------------------------------------------------------------
+
+    def debut_collecte(self):
+        """Commence à collecter les requêtes du thread courant"""
+        self._local.collecte = []
+
+    def fin_collecte(self):
+        """
+        Arrête la collecte du thread courant
+
+        Returns:
+            Liste des requêtes exécutées depuis debut_collecte()
+        """
+        collecte = getattr(self._local, 'collecte', None) or []
+        self._local.collecte = None
+        return collecte
+
+    # ------------------------------------------------------------------
+    # Rapport
+    # ------------------------------------------------------------------
+
+    def rapport(self, tri='total_ms', limite=None):
+        """
+        Statistiques par requête, triées par ordre décroissant
+
+        Args:
+            tri: Clé de tri (total_ms, max_ms, nombre, lignes, moyenne_ms)
+            limite: Nombre maximal de requêtes
+
+        Returns:
+            Liste de dictionnaires (copies des statistiques)
+        """
+        with self._verrou:
+            lignes = [dict(s, appelants=dict(s['appelants'])) for s in self.statistiques.values()]
+        return trier(lignes, tri, limite)
+
+    def reinitialiser(self):
+        """Efface les statistiques"""
+        with self._verrou:
+            self.statistiques = {}
+            self.debut = datetime.now()
+
+    def exporter(self, chemin):
+        """Écrit les statistiques en JSON (lu par le rapport en ligne de commande)"""
+        os.makedirs(os.path.dirname(os.path.abspath(chemin)), exist_ok=True)
+        with open(chemin, 'w', encoding='utf-8') as f:
+            json.dump({
+                'debut': self.debut.isoformat(timespec='seconds'),
+                'fin': datetime.now().isoformat(timespec='seconds'),
+                'seuil_lent_ms': self.seuil_lent_ms,
+                'requetes': self.rapport(),
+            }, f, indent=1)
+        return chemin
+
+
+def trier(lignes, tri='total_ms', limite=None):
+    """Ajoute la moyenne et trie les statistiques par ordre décroissant"""
+    for ligne in lignes:
+        ligne['moyenne_ms'] = ligne['total_ms'] / ligne['nombre'] if ligne['nombre'] else 0
+    lignes.sort(key=lambda l: l.get(tri, 0), reverse=True)
+    return lignes[:limite] if limite else lignes
+
+
+def afficher_rapport(requetes, limite=20):
+    """Affiche les statistiques dans le terminal"""
+    total = sum(r['total_ms'] for r in requetes)
+    print(f"{len(requetes)} requête(s) distincte(s), "
+          f"{sum(r['nombre'] for r in requetes)} exécution(s), {total:.1f} ms au total\n")
+    print(f"{'nombre':>7} {'total ms':>10} {'moy ms':>8} {'max ms':>8} {'lignes':>8}  requête")
+    for r in requetes[:limite]:
+        print(f"{r['nombre']:7d} {r['total_ms']:10.1f} {r['moyenne_ms']:8.2f} "
+              f"{r['max_ms']:8.2f} {r['lignes']:8d}  {r['sql'][:100]}")
+        if r['scans']:
+            print(f"{'':45}  SCAN COMPLET : {', '.join(r['scans'])}")
+        for appelant, nombre in sorted(r['appelants'].items(), key=lambda a: -a[1])[:3]:
+            print(f"{'':45}  <- {appelant} ({nombre}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rapport du profilage SQL")
+    parser.add_argument('fichier', help="Export JSON du profileur (SQL_PROFILE_PATH)")
+    parser.add_argument('--tri', default='total_ms',
+                        choices=['total_ms', 'max_ms', 'moyenne_ms', 'nombre', 'lignes'])
+    parser.add_argument('--limite', type=int, default=20)
+    parser.add_argument('--scans', action='store_true',
+                        help="Uniquement les requêtes avec un parcours complet de table")
+    args = parser.parse_args()
+
+    with open(args.fichier, 'r', encoding='utf-8') as f:
+        donnees = json.load(f)
+    requetes = trier(donnees['requetes'], args.tri)
+    if args.scans:
+        requetes = [r for r in requetes if r['scans']]
+
+    print(f"Profil du {donnees['debut']} au {donnees['fin']}")
+    afficher_rapport(requetes, args.limite)
+
+
+if __name__ == '__main__':
+    main()
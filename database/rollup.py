@@ -0,0 +1,307 @@
+"""
+Agrégats mensuels des paiements et des dépenses
+La table rollup_mensuel garde, par (année, mois, dimension, valeur), le nombre
+de lignes et le total en centimes :
+
+    mode_paiement, admin_id, type_paiement   paiements (année et mois de date_paiement)
+    poste                                    postes de dépense (année de l'exercice,
+    depenses (valeur 'total')                mois de date_deces)
+
+Elle est tenue à jour par des triggers (migration 6, database/migrations.py) et
+conserve les années archivées. Les graphiques la lisent avec
+StatistiqueService.get_rollup() sans regrouper le détail.
+
+Lancer: python -m database.rollup recalculer [--db chemin]
+        python -m database.rollup afficher [--annee 2024] [--dimension poste] [--db chemin]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+
+# Dimensions des paiements et des dépenses
+DIMENSIONS_PAIEMENTS = ('mode_paiement', 'admin_id', 'type_paiement')
+DIMENSIONS_DEPENSES = ('poste', 'depenses')
+DIMENSIONS = DIMENSIONS_PAIEMENTS + DIMENSIONS_DEPENSES
+
+# Colonnes des postes de dépense (config.POSTES_DEPENSES)
+POSTES = ('transport_services', 'billet_avion', 'imam', 'mairie',
+          'autre1', 'autre2', 'autre3')
+
+_CUMUL = """
+    ON CONFLICT (annee, mois, dimension, valeur) DO UPDATE
+    SET nombre = nombre + excluded.nombre, total = total + excluded.total"""
+
+
+def _lignes_paiement(ligne, source=''):
+    """
+    SELECT des lignes d'agrégat d'un paiement
+
+    Args:
+        ligne: NEW ou OLD dans un trigger, alias de la table sinon
+        source: Clause FROM ... WHERE ... lisant la table sous cet alias
+    """
+    date = f"{ligne}.date_paiement"
+    valeurs = {
+        'mode_paiement': f"COALESCE({ligne}.mode_paiement, '')",
+        'admin_id': f"COALESCE(CAST({ligne}.admin_id AS TEXT), '')",
+        'type_paiement': f"COALESCE({ligne}.type_paiement, 'cotisation')",
+    }
+    return "\n        UNION ALL ".join(
+        f"SELECT CAST(strftime('%Y', {date}) AS INTEGER) as annee, "
+        f"CAST(strftime('%m', {date}) AS INTEGER) as mois, "
+        f"'{dimension}' as dimension, {valeur} as valeur, "
+        f"1 as nombre, {ligne}.montant as total {source}"
+        for dimension, valeur in valeurs.items()
+    )
+
+
+def _lignes_depense(ligne, source=''):
+    """SELECT des lignes d'agrégat d'une dépense, avec annee_id et date_deces"""
+    colonnes = f"{ligne}.annee_id as annee_id, {ligne}.date_deces as date_deces"
+    lignes = [f"SELECT {colonnes}, 'depenses' as dimension, 'total' as valeur, "
+              f"1 as nombre, {ligne}.montant as total {source}"]
+    lignes += [f"SELECT {colonnes}, 'poste', '{poste}', COALESCE({ligne}.{poste}, 0) != 0, "
+               f"COALESCE({ligne}.{poste}, 0) {source}" for poste in POSTES]
+    return "\n            UNION ALL ".join(lignes)
+
+
+def _trigger_paiement(ligne, signe):
+    """Instructions de trigger ajoutant (+) ou retirant (-) un paiement"""
+    sql = f"""
+        INSERT INTO rollup_mensuel (annee, mois, dimension, valeur, nombre, total)
+        SELECT annee, mois, dimension, valeur, {signe}nombre, {signe}total
+        FROM ({_lignes_paiement(ligne)})
+        WHERE true {_CUMUL};"""
+    if signe == '-':
+        sql += f"""
+        DELETE FROM rollup_mensuel
+        WHERE annee = CAST(strftime('%Y', {ligne}.date_paiement) AS INTEGER)
+          AND mois = CAST(strftime('%m', {ligne}.date_paiement) AS INTEGER)
+          AND nombre = 0;"""
+    return sql
+
+
+def _trigger_depense(ligne, signe):
+    """
+    Instructions de trigger ajoutant (+) ou retirant (-) une dépense
+
+    Sans l'année de l'exercice (suppression en cascade d'une année), rien n'est
+    fait : le trigger rollup_annee_delete retire alors l'année entière.
+    """
+    mois = f"CAST(strftime('%m', {ligne}.date_deces) AS INTEGER)"
+    sql = f"""
+        INSERT INTO rollup_mensuel (annee, mois, dimension, valeur, nombre, total)
+        SELECT a.annee, {mois}, p.dimension, p.valeur, {signe}p.nombre, {signe}p.total
+        FROM ({_lignes_depense(ligne)}) p
+        JOIN annees a ON a.id = p.annee_id
+        WHERE p.nombre != 0 {_CUMUL};"""
+    if signe == '-':
+        sql += f"""
+        DELETE FROM rollup_mensuel
+        WHERE annee = (SELECT annee FROM annees WHERE id = {ligne}.annee_id)
+          AND mois = {mois}
+          AND nombre = 0;"""
+    return sql
+
+
+def schema():
+    """Table rollup_mensuel et ses triggers (migration 6)"""
+    colonnes_depense = ', '.join(('annee_id', 'date_deces', 'montant') + POSTES)
+    return f"""
+    CREATE TABLE IF NOT EXISTS rollup_mensuel (
+        annee INTEGER NOT NULL,
+        mois INTEGER NOT NULL,
+        dimension TEXT NOT NULL,
+        valeur TEXT NOT NULL,
+        nombre INTEGER NOT NULL DEFAULT 0,
+        total INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (annee, mois, dimension, valeur)
+    ) WITHOUT ROWID;
+
+    CREATE TRIGGER IF NOT EXISTS rollup_contribution_insert
+    AFTER INSERT ON contributions
+    BEGIN {_trigger_paiement('NEW', '+')}
+    END;
+    CREATE TRIGGER IF NOT EXISTS rollup_contribution_update
+    AFTER UPDATE OF montant, date_paiement, mode_paiement, admin_id, type_paiement
+    ON contributions
+    BEGIN {_trigger_paiement('OLD', '-')} {_trigger_paiement('NEW', '+')}
+    END;
+    CREATE TRIGGER IF NOT EXISTS rollup_contribution_delete
+    AFTER DELETE ON contributions
+    BEGIN {_trigger_paiement('OLD', '-')}
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS rollup_depense_insert
+    AFTER INSERT ON depenses
+    BEGIN {_trigger_depense('NEW', '+')}
+    END;
+    CREATE TRIGGER IF NOT EXISTS rollup_depense_update
+    AFTER UPDATE OF {colonnes_depense} ON depenses
+    BEGIN {_trigger_depense('OLD', '-')} {_trigger_depense('NEW', '+')}
+    END;
+    CREATE TRIGGER IF NOT EXISTS rollup_depense_delete
+    AFTER DELETE ON depenses
+    BEGIN {_trigger_depense('OLD', '-')}
+    END;
+    CREATE TRIGGER IF NOT EXISTS rollup_annee_delete
+    AFTER DELETE ON annees
+    BEGIN
+        DELETE FROM rollup_mensuel
+        WHERE annee = OLD.annee AND dimension IN {DIMENSIONS_DEPENSES};
+    END;
+"""
+
+
+def ajouter(conn, schema_source='main', signe=1, filtre='1', params=None, tables=None):
+    """
+    Ajoute (signe 1) ou retire (signe -1) des agrégats les lignes d'une base,
+    dans la transaction en cours
+
+    Args:
+        conn: Connexion SQLite
+        schema_source: Base lue ('main' ou une archive attachée)
+        signe: 1 pour ajouter, -1 pour retirer
+        filtre: Condition SQL sur les lignes lues (alias l)
+        params: Paramètres du filtre
+        tables: Tables lues (défaut: contributions et depenses)
+    """
+    tables = tables or ('contributions', 'depenses')
+    params = params or {}
+    if 'contributions' in tables:
+        source = f"FROM {schema_source}.contributions l WHERE {filtre}"
+        conn.execute(f"""
+            INSERT INTO main.rollup_mensuel (annee, mois, dimension, valeur, nombre, total)
+            SELECT annee, mois, dimension, valeur, {signe} * SUM(nombre), {signe} * SUM(total)
+            FROM ({_lignes_paiement('l', source)})
+            WHERE true
+            GROUP BY annee, mois, dimension, valeur {_CUMUL}
+        """, params)
+    if 'depenses' in tables:
+        source = f"FROM {schema_source}.depenses l WHERE {filtre}"
+        conn.execute(f"""
+            INSERT INTO main.rollup_mensuel (annee, mois, dimension, valeur, nombre, total)
+            SELECT a.annee, CAST(strftime('%m', p.date_deces) AS INTEGER) as mois,
+                   p.dimension, p.valeur, {signe} * SUM(p.nombre), {signe} * SUM(p.total)
+            FROM ({_lignes_depense('l', source)}) p
+            JOIN main.annees a ON a.id = p.annee_id
+            WHERE p.nombre != 0
+            GROUP BY a.annee, mois, p.dimension, p.valeur {_CUMUL}
+        """, params)
+    if signe < 0:
+        conn.execute("DELETE FROM main.rollup_mensuel WHERE nombre = 0")
+
+
+def backfill(conn, dernier_id, taille_lot):
+    """
+    Remplissage de la migration 6 : les dépenses au premier lot, puis les
+    paiements par lots d'id croissants (années archivées : voir recalculer())
+    """
+    if not dernier_id:
+        ajouter(conn, tables=('depenses',))
+    fin = conn.execute(
+        "SELECT MAX(id) FROM (SELECT id FROM contributions WHERE id > ? ORDER BY id LIMIT ?)",
+        (dernier_id, taille_lot)
+    ).fetchone()[0]
+    if fin is None:
+        return None
+    ajouter(conn, filtre="l.id > :debut AND l.id <= :fin",
+            params={'debut': dernier_id, 'fin': fin}, tables=('contributions',))
+    return fin
+
+
+backfill.compter = lambda conn: conn.execute("SELECT COUNT(*) FROM contributions").fetchone()[0]
+
+
+def recalculer(conn, dossier_archives=None, afficher=print):
+    """
+    Reconstruit entièrement les agrégats : base principale puis chaque archive
+
+    Args:
+        conn: Connexion SQLite hors transaction (les archives sont attachées)
+        dossier_archives: Dossier des archives (défaut: archives/ à côté de la base)
+        afficher: Fonction d'affichage de la progression
+
+    Returns:
+        Nombre de lignes d'agrégat
+    """
+    if conn.in_transaction:
+        conn.commit()
+    if dossier_archives is None:
+        chemin_base = conn.execute("PRAGMA database_list").fetchone()[2]
+        dossier_archives = os.path.join(os.path.dirname(os.path.abspath(chemin_base)),
+                                        'archives')
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("DELETE FROM rollup_mensuel")
+        ajouter(conn)
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    afficher("Base principale agrégée")
+
+    for annee, fichier in conn.execute(
+            "SELECT annee, fichier FROM archives_annees ORDER BY annee").fetchall():
+        chemin = os.path.join(dossier_archives, fichier)
+        if not os.path.exists(chemin):
+            afficher(f"  attention : archive {annee} introuvable ({chemin})")
+            continue
+        conn.execute("ATTACH DATABASE ? AS archive", (chemin,))
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            ajouter(conn, 'archive')
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        finally:
+            conn.execute("DETACH DATABASE archive")
+        afficher(f"  archive {annee} agrégée")
+
+    return conn.execute("SELECT COUNT(*) FROM rollup_mensuel").fetchone()[0]
+
+
+def main():
+    from config import DATABASE_PATH
+
+    parser = argparse.ArgumentParser(description="Agrégats mensuels des paiements et dépenses")
+    parser.add_argument('action', choices=['recalculer', 'afficher'])
+    parser.add_argument('--db', default=DATABASE_PATH, help="Base principale")
+    parser.add_argument('--annee', type=int)
+    parser.add_argument('--dimension', choices=DIMENSIONS)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"Base introuvable : {args.db}")
+        sys.exit(1)
+
+    conn = sqlite3.connect(args.db, timeout=30.0)
+    try:
+        if args.action == 'recalculer':
+            print(f"{recalculer(conn)} ligne(s) d'agrégat")
+            return
+        conditions, params = [], []
+        if args.annee:
+            conditions.append("annee = ?")
+            params.append(args.annee)
+        if args.dimension:
+            conditions.append("dimension = ?")
+            params.append(args.dimension)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        for annee, mois, dimension, valeur, nombre, total in conn.execute(
+                f"SELECT annee, mois, dimension, valeur, nombre, total FROM rollup_mensuel "
+                f"{where} ORDER BY annee, mois, dimension, valeur", params):
+            print(f"{annee}-{mois:02d}  {dimension:14} {valeur or '-':20} "
+                  f"{nombre:6d}  {total / 100:12.2f}")
+    except sqlite3.Error as e:
+        print(f"Erreur : {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,8 @@
 -- Schema de base de donnees pour le systeme de gestion de tontine
 -- SQLite 3
+--
+-- Schema de reference (version 0), fige : toute evolution (index, colonne,
+-- table) passe par une migration dans database/migrations.py.
 
 -- Table: adherents
 CREATE TABLE IF NOT EXISTS adherents (
@@ -115,7 +118,6 @@ CREATE TABLE IF NOT EXISTS historique (
 CREATE INDEX IF NOT EXISTS idx_contributions_adherent ON contributions(adherent_id);
 CREATE INDEX IF NOT EXISTS idx_contributions_cotisation ON contributions(cotisation_id);
 CREATE INDEX IF NOT EXISTS idx_contributions_date ON contributions(date_paiement);
-CREATE INDEX IF NOT EXISTS idx_cotisations_appel ON cotisations(appel_id);
 CREATE INDEX IF NOT EXISTS idx_cotisations_adherent ON cotisations(adherent_id);
 CREATE INDEX IF NOT EXISTS idx_cotisations_statut ON cotisations(statut);
 CREATE INDEX IF NOT EXISTS idx_depenses_annee ON depenses(annee_id);
@@ -123,7 +125,6 @@ CREATE INDEX IF NOT EXISTS idx_depenses_date ON depenses(date_deces);
 CREATE INDEX IF NOT EXISTS idx_adherents_nom ON adherents(nom);
 CREATE INDEX IF NOT EXISTS idx_adherents_actif ON adherents(actif);
 CREATE INDEX IF NOT EXISTS idx_appels_annee ON appels_de_fonds(annee);
-CREATE INDEX IF NOT EXISTS idx_historique_adherent ON historique(adherent_id);
 
 -- Triggers pour mettre a jour updated_at automatiquement
 CREATE TRIGGER IF NOT EXISTS update_adherent_timestamp
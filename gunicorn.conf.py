@@ -0,0 +1,47 @@
+"""
+Configuration gunicorn du serveur web de production
+Lancer:  gunicorn -c gunicorn.conf.py wsgi:app
+Recharger sans coupure (nouveau code, nouveaux workers) : kill -HUP <pid du maitre>
+Reglages par variables d'environnement : voir config.py (DCOMITE_WEB_*)
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import DATABASE_PATH, WEB_HOST, WEB_PORT, WEB_WORKERS, WEB_THREADS
+
+bind = f"{WEB_HOST}:{WEB_PORT}"
+workers = WEB_WORKERS
+# Threads par worker : les flux du tableau de bord (/dashboard/flux) en occupent un chacun
+worker_class = 'gthread'
+threads = WEB_THREADS
+
+# Par defaut chaque worker charge l'application apres le fork : SIGHUP recharge
+# le code. DCOMITE_WEB_PRELOAD=1 la charge une fois dans le maitre (demarrage
+# plus rapide, mais SIGHUP ne recharge plus le code).
+preload_app = os.environ.get('DCOMITE_WEB_PRELOAD', '0') == '1'
+
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
+# Journal des acces : '-' = sortie standard, vide = desactive
+accesslog = os.environ.get('DCOMITE_WEB_ACCESSLOG', '-') or None
+
+
+def on_starting(server):
+    """
+    Une fois, dans le maitre, avant le fork des workers : mode WAL (les workers
+    lisent pendant qu'un autre ecrit) et creation / migration du schema. Les
+    workers trouvent ensuite le schema a jour et ne le reappliquent pas
+    (create_tables compare la somme de controle et user_version).
+    """
+    from database.db_manager import DatabaseManager
+    DatabaseManager.activer_wal(DATABASE_PATH)
+    DatabaseManager(DATABASE_PATH).create_tables()
+
+
+def post_fork(server, worker):
+    """Chaque worker ouvre sa propre connexion (celle du maitre si preload_app)"""
+    from database.db_manager import DatabaseManager
+    DatabaseManager().reconnecter()
@@ -1,9 +1,17 @@
 """
 Package des modèles de données
+Les modèles sont importés à la demande (voir utils.lazy)
 """
-from .adherent import Adherent
-from .annee import Annee
-from .contribution import Contribution
-from .depense import Depense
+from utils.lazy import lazy_exports
 
-__all__ = ['Adherent', 'Annee', 'Contribution', 'Depense']
+__all__ = ['Adherent', 'Annee', 'CleIdempotence', 'Contribution', 'Depense', 'Money', 'Releve']
+
+__getattr__ = lazy_exports(__name__, {
+    'Adherent': 'adherent',
+    'Annee': 'annee',
+    'CleIdempotence': 'cle_idempotence',
+    'Contribution': 'contribution',
+    'Depense': 'depense',
+    'Money': 'money',
+    'Releve': 'releve',
+})
@@ -3,6 +3,8 @@ Modele Adherent
 Represente un adherent de la tontine
 """
 from database.db_manager import DatabaseManager
+from models.money import Money
+from services.event_bus import bus, AdherentCree, AdherentModifie, AdherentSupprime
 
 
 class Adherent:
@@ -21,7 +23,7 @@ class Adherent:
         self.date_entree = date_entree
         self.date_sortie = date_sortie
         self.actif = actif
-        self.frais_entree = frais_entree or 0
+        self.frais_entree = Money.from_euros(frais_entree)
         self.frais_entree_paye = frais_entree_paye
         self.notes = notes
         self.created_at = created_at
@@ -36,8 +38,9 @@ class Adherent:
         db = DatabaseManager()
 
         # Determiner le statut frais_entree_paye
-        if not frais_entree or frais_entree <= 0:
-            frais_entree = 0
+        frais_entree = Money.from_euros(frais_entree)
+        if frais_entree <= 0:
+            frais_entree = Money(0)
             frais_entree_paye = 1  # Pas de frais = considere comme paye
         else:
             frais_entree_paye = 0  # Frais definis = impaye par defaut
@@ -64,6 +67,7 @@ class Adherent:
                            f"Frais d'entree : {frais_entree} EUR (impaye)",
                            montant=frais_entree)
 
+        bus.publier(AdherentCree(adherent_id))
         return Adherent.get_by_id(adherent_id)
 
     @staticmethod
@@ -105,6 +109,8 @@ class Adherent:
         params = []
         for field, value in kwargs.items():
             if field in valid_fields:
+                if field == 'frais_entree':
+                    value = Money.from_euros(value)
                 updates.append(f"{field} = ?")
                 params.append(value)
                 setattr(self, field, value)
@@ -113,11 +119,13 @@ class Adherent:
         params.append(self.id)
         query = f"UPDATE adherents SET {', '.join(updates)} WHERE id = ?"
         db.execute_query(query, params)
+        bus.publier(AdherentModifie(self.id, tuple(f for f in kwargs if f in valid_fields)))
         return True
 
     def delete(self):
         db = DatabaseManager()
         db.execute_query("DELETE FROM adherents WHERE id = ?", (self.id,))
+        bus.publier(AdherentSupprime(self.id))
         return True
 
     def get_contributions(self, annee=None):
@@ -136,6 +144,10 @@ class Adherent:
         from models.cotisation import Cotisation
         return Cotisation.get_impayees_adherent(self.id)
 
+    def get_releve(self):
+        from models.releve import Releve
+        return Releve.get_for_adherent(self.id)
+
     def get_historique(self):
         from models.historique import Historique
         return Historique.get_for_adherent(self.id)
@@ -152,7 +164,7 @@ class Adherent:
             date_entree=row['date_entree'],
             date_sortie=row['date_sortie'],
             actif=row['actif'],
-            frais_entree=row['frais_entree'],
+            frais_entree=Money.from_db(row['frais_entree']),
             frais_entree_paye=row['frais_entree_paye'],
             notes=row['notes'],
             created_at=row['created_at'],
@@ -3,11 +3,17 @@ Modele Annee
 Represente une annee (simplifiee - reference temporelle pour les depenses)
 """
 from database.db_manager import DatabaseManager
+from models.money import Money
+from services.event_bus import bus, AnneeActivee
 
 
 class Annee:
     """Modele representant une annee"""
 
+    # Annee active memorisee pour le processus : (Annee ou None, compteur de
+    # modifications de la base au moment de la lecture)
+    _active_cache = None
+
     def __init__(self, id, annee, active=0, created_at=None, updated_at=None):
         self.id = id
         self.annee = annee
@@ -39,6 +45,28 @@ class Annee:
             return Annee._from_row(row)
         return None
 
+    @staticmethod
+    def get_active_cached():
+        """
+        Annee active memorisee pour le processus (contexte des templates web) :
+        relue des que le compteur de modifications de la base a change, donc
+        aussitot apres une activation faite dans un autre processus (interface
+        Tkinter, autre worker web). Une page servie avec l'ETag d'un compteur
+        (web/cache.py) affiche ainsi toujours l'annee active de ce compteur.
+        L'instance est partagee : ne pas la modifier.
+        """
+        compteur = DatabaseManager().compteur_modifications()
+        cache = Annee._active_cache
+        if cache is None or cache[1] != compteur:
+            cache = (Annee.get_active(), compteur)
+            Annee._active_cache = cache
+        return cache[0]
+
+    @staticmethod
+    def invalider_cache_active():
+        """Oublie l'annee active memorisee (relue au prochain appel)"""
+        Annee._active_cache = None
+
     @staticmethod
     def get_by_year(year):
         db = DatabaseManager()
@@ -59,40 +87,45 @@ class Annee:
         db.execute_query("UPDATE annees SET active = 0")
         db.execute_query("UPDATE annees SET active = 1 WHERE id = ?", (self.id,))
         self.active = 1
+        Annee.invalider_cache_active()
+        bus.publier(AnneeActivee(self.id))
 
     def get_total_depenses(self):
-        """Total des depenses pour cette annee"""
+        """Total des depenses pour cette annee (archivee ou non)"""
         db = DatabaseManager()
         query = """
-            SELECT COALESCE(SUM(montant), 0) as total
-            FROM depenses WHERE annee_id = ?
+            SELECT (SELECT COALESCE(SUM(montant), 0) FROM depenses WHERE annee_id = ?)
+                 + (SELECT COALESCE(SUM(total_depenses), 0) FROM archives_annees
+                    WHERE annee_id = ?) as total
         """
-        row = db.fetch_one(query, (self.id,))
-        return row['total'] if row else 0
+        row = db.fetch_one(query, (self.id, self.id))
+        return Money.from_db(row['total'] if row else 0)
 
     def get_nombre_depenses(self):
         """Nombre de depenses (deces) pour cette annee"""
         db = DatabaseManager()
-        query = "SELECT COUNT(*) as nombre FROM depenses WHERE annee_id = ?"
-        row = db.fetch_one(query, (self.id,))
+        query = """
+            SELECT (SELECT COUNT(*) FROM depenses WHERE annee_id = ?)
+                 + (SELECT COALESCE(SUM(nb_depenses), 0) FROM archives_annees
+                    WHERE annee_id = ?) as nombre
+        """
+        row = db.fetch_one(query, (self.id, self.id))
         return row['nombre'] if row else 0
 
     def get_balance_actuelle(self):
         """Balance de l'annee = total cotisations collectees - total depenses"""
         db = DatabaseManager()
         row_collecte = db.fetch_one("""
-            SELECT COALESCE(SUM(c.montant_paye), 0) as total
-            FROM cotisations c
-            JOIN appels_de_fonds a ON c.appel_id = a.id
-            WHERE a.annee = ?
-        """, (self.annee,))
-        total_collecte = row_collecte['total'] if row_collecte else 0
-
-        row_depenses = db.fetch_one(
-            "SELECT COALESCE(SUM(montant), 0) as total FROM depenses WHERE annee_id = ?",
-            (self.id,)
-        )
-        total_depenses = row_depenses['total'] if row_depenses else 0
+            SELECT (SELECT COALESCE(SUM(c.montant_paye), 0)
+                    FROM cotisations c
+                    JOIN appels_de_fonds a ON c.appel_id = a.id
+                    WHERE a.annee = ?)
+                 + (SELECT COALESCE(SUM(total_collecte), 0) FROM archives_annees
+                    WHERE annee = ?) as total
+        """, (self.annee, self.annee))
+        total_collecte = Money.from_db(row_collecte['total'] if row_collecte else 0)
+
+        total_depenses = self.get_total_depenses()
 
         return total_collecte - total_depenses
 
@@ -3,6 +3,8 @@ Modele AppelDeFonds
 Represente un appel de fond lance par un admin
 """
 from database.db_manager import DatabaseManager
+from models.money import Money
+from services.event_bus import bus, AppelCree, AppelCloture
 
 
 class AppelDeFonds:
@@ -12,7 +14,7 @@ class AppelDeFonds:
                  date_lancement=None, cloture=0, created_at=None, updated_at=None):
         self.id = id
         self.annee = annee
-        self.montant = montant
+        self.montant = Money.from_euros(montant)
         self.description = description
         self.admin_id = admin_id
         self.date_lancement = date_lancement
@@ -30,6 +32,7 @@ class AppelDeFonds:
         from datetime import date
 
         db = DatabaseManager()
+        montant = Money.from_euros(montant)
 
         if not date_lancement:
             date_lancement = date.today().isoformat()
@@ -56,6 +59,7 @@ class AppelDeFonds:
                 montant=montant, admin_id=admin_id
             )
 
+        bus.publier(AppelCree(appel_id, annee))
         return AppelDeFonds.get_by_id(appel_id)
 
     @staticmethod
@@ -97,9 +101,13 @@ class AppelDeFonds:
         db = DatabaseManager()
         db.execute_query("UPDATE appels_de_fonds SET cloture = 1 WHERE id = ?", (self.id,))
         self.cloture = 1
+        bus.publier(AppelCloture(self.id))
 
     def get_stats(self):
-        """Statistiques de cet appel : nb paye/partiel/non_paye, total collecte, taux"""
+        """
+        Statistiques de cet appel : nb paye/partiel/non_paye, total collecte, taux
+        (totaux conserves dans archives_appels si l'appel est archive)
+        """
         db = DatabaseManager()
         query = """
             SELECT
@@ -113,15 +121,72 @@ class AppelDeFonds:
             WHERE appel_id = ?
         """
         row = db.fetch_one(query, (self.id,))
-        total_attendu = row['total_attendu'] if row else 0
-        total_collecte = row['total_collecte'] if row else 0
+        if row and not row['total']:
+            row = db.fetch_one("SELECT * FROM archives_appels WHERE appel_id = ?", (self.id,)) or row
+        return AppelDeFonds._stats_from_row(row)
+
+    @staticmethod
+    def get_all_with_stats(ouverts_only=False):
+        """
+        Recupere les appels avec leurs statistiques en une seule requete
+        (agregat des cotisations GROUP BY appel_id, totaux archives_appels pour
+        les appels archives), au lieu d'un get_stats() par appel.
+
+        Args:
+            ouverts_only: Uniquement les appels non clotures
+
+        Returns:
+            Liste de dictionnaires {'appel': AppelDeFonds, 'stats': dict de get_stats()}
+            (plus recent en premier)
+        """
+        db = DatabaseManager()
+        query = f"""
+            SELECT a.*,
+                   COALESCE(s.total, r.total) as total,
+                   COALESCE(s.nb_paye, r.nb_paye) as nb_paye,
+                   COALESCE(s.nb_partiel, r.nb_partiel) as nb_partiel,
+                   COALESCE(s.nb_non_paye, r.nb_non_paye) as nb_non_paye,
+                   COALESCE(s.total_collecte, r.total_collecte) as total_collecte,
+                   COALESCE(s.total_attendu, r.total_attendu) as total_attendu
+            FROM appels_de_fonds a
+            LEFT JOIN (
+                SELECT
+                    appel_id,
+                    COUNT(*) as total,
+                    SUM(CASE WHEN statut = 'paye' THEN 1 ELSE 0 END) as nb_paye,
+                    SUM(CASE WHEN statut = 'partiel' THEN 1 ELSE 0 END) as nb_partiel,
+                    SUM(CASE WHEN statut = 'non_paye' THEN 1 ELSE 0 END) as nb_non_paye,
+                    COALESCE(SUM(montant_paye), 0) as total_collecte,
+                    COALESCE(SUM(montant_du), 0) as total_attendu
+                FROM cotisations
+                GROUP BY appel_id
+            ) s ON s.appel_id = a.id
+            LEFT JOIN archives_appels r ON r.appel_id = a.id
+            {"WHERE a.cloture = 0" if ouverts_only else ""}
+            ORDER BY a.date_lancement DESC
+        """
+        rows = db.fetch_all(query)
+        return [
+            {'appel': AppelDeFonds._from_row(row),
+             'stats': AppelDeFonds._stats_from_row(row)}
+            for row in rows
+        ]
+
+    @staticmethod
+    def _stats_from_row(row):
+        """Dictionnaire de statistiques a partir d'une ligne d'agregat (ou None)"""
+        def valeur(cle):
+            return (row[cle] if row else None) or 0
+
+        total_attendu = Money.from_db(valeur('total_attendu'))
+        total_collecte = Money.from_db(valeur('total_collecte'))
         taux = (total_collecte / total_attendu * 100) if total_attendu > 0 else 0
 
         return {
-            'total': row['total'] if row else 0,
-            'nb_paye': row['nb_paye'] if row else 0,
-            'nb_partiel': row['nb_partiel'] if row else 0,
-            'nb_non_paye': row['nb_non_paye'] if row else 0,
+            'total': valeur('total'),
+            'nb_paye': valeur('nb_paye'),
+            'nb_partiel': valeur('nb_partiel'),
+            'nb_non_paye': valeur('nb_non_paye'),
             'total_collecte': total_collecte,
             'total_attendu': total_attendu,
             'taux': taux
@@ -132,7 +197,7 @@ class AppelDeFonds:
         return AppelDeFonds(
             id=row['id'],
             annee=row['annee'],
-            montant=row['montant'],
+            montant=Money.from_db(row['montant']),
             description=row['description'],
             admin_id=row['admin_id'],
             date_lancement=row['date_lancement'],
@@ -0,0 +1,94 @@
+"""
+Modele CleIdempotence
+Cle unique attachee a un formulaire de paiement : un meme formulaire soumis
+deux fois (double clic, requete POST renvoyee apres une coupure) n'enregistre
+qu'un seul paiement. Les cles expirent apres DUREE_CLES_HEURES.
+"""
+import re
+import uuid
+
+from database.db_manager import DatabaseManager
+
+# Duree de conservation d'une cle (heures)
+DUREE_CLES_HEURES = 24
+
+# Format accepte pour une cle recue d'un client (uuid4 hexadecimal ou avec tirets)
+_FORMAT_CLE = re.compile(r'^[A-Za-z0-9-]{16,64}$')
+
+
+class CleIdempotence:
+    """Cles d'idempotence des paiements (table cles_idempotence)"""
+
+    @staticmethod
+    def nouvelle():
+        """Nouvelle cle, a generer a l'ouverture du formulaire"""
+        return uuid.uuid4().hex
+
+    @staticmethod
+    def valide(cle):
+        """Vrai si la cle a le format attendu"""
+        return bool(cle) and bool(_FORMAT_CLE.match(cle))
+
+    @staticmethod
+    def executer(cle, enregistrer):
+        """
+        Execute enregistrer() une seule fois par cle, dans une transaction :
+        la cle est reservee au debut de la transaction et liee au paiement
+        cree a la fin. Si l'enregistrement echoue, la cle est liberee avec le
+        reste de la transaction et le formulaire peut etre soumis a nouveau.
+
+        Args:
+            cle: Cle du formulaire (None : pas de protection)
+            enregistrer: Fonction sans argument qui enregistre le paiement et
+                         renvoie la Contribution creee
+
+        Returns:
+            Tuple (contribution, deja_enregistre) ; si la cle a deja servi,
+            contribution est le paiement enregistre la premiere fois (None
+            s'il a ete supprime depuis)
+        """
+        from models.contribution import Contribution
+
+        db = DatabaseManager()
+        with db.transaction():
+            if cle:
+                deja, contribution_id = CleIdempotence._reserver(cle)
+                if deja:
+                    contribution = (Contribution.get_by_id(contribution_id)
+                                    if contribution_id else None)
+                    return contribution, True
+
+            contribution = enregistrer()
+
+            if cle and contribution is not None:
+                db.execute_query(
+                    "UPDATE cles_idempotence SET contribution_id = ? WHERE cle = ?",
+                    (contribution.id, cle)
+                )
+        return contribution, False
+
+    @staticmethod
+    def _reserver(cle):
+        """
+        Reserve la cle (dans la transaction en cours) apres avoir purge les
+        cles expirees
+
+        Returns:
+            Tuple (deja reservee, contribution_id)
+        """
+        db = DatabaseManager()
+        db.execute_query(
+            "DELETE FROM cles_idempotence WHERE expire_le <= CURRENT_TIMESTAMP"
+        )
+        cursor = db.execute_query("""
+            INSERT INTO cles_idempotence (cle, expire_le)
+            VALUES (?, datetime('now', ?))
+            ON CONFLICT(cle) DO NOTHING
+        """, (cle, f"+{DUREE_CLES_HEURES} hours"))
+        if cursor.rowcount == 1:
+            return False, None
+
+        row = db.fetch_one(
+            "SELECT contribution_id FROM cles_idempotence WHERE cle = ?", (cle,)
+        )
+        return True, row['contribution_id'] if row else None
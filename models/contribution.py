@@ -3,6 +3,10 @@ Modele Contribution
 Represente un paiement d'un adherent
 """
 from database.db_manager import DatabaseManager
+from database.archives import Archives
+from models.money import Money
+from services.event_bus import (bus, ContributionCreee, ContributionModifiee,
+                                ContributionSupprimee)
 
 
 class Contribution:
@@ -15,7 +19,7 @@ class Contribution:
         self.id = id
         self.adherent_id = adherent_id
         self.cotisation_id = cotisation_id
-        self.montant = montant
+        self.montant = Money.from_euros(montant)
         self.date_paiement = date_paiement
         self.mode_paiement = mode_paiement
         self.reference_paiement = reference_paiement
@@ -31,6 +35,7 @@ class Contribution:
                type_paiement='cotisation', notes=None):
         """Cree un nouveau paiement"""
         db = DatabaseManager()
+        montant = Money.from_euros(montant)
         query = """
             INSERT INTO contributions (adherent_id, cotisation_id, montant,
                                       date_paiement, mode_paiement,
@@ -42,6 +47,7 @@ class Contribution:
                   mode_paiement, reference_paiement, admin_id,
                   type_paiement, notes)
         cursor = db.execute_query(query, params)
+        bus.publier(ContributionCreee(cursor.lastrowid, adherent_id, cotisation_id))
         return Contribution.get_by_id(cursor.lastrowid)
 
     @staticmethod
@@ -54,21 +60,28 @@ class Contribution:
 
     @staticmethod
     def get_by_adherent(adherent_id, annee=None):
+        """Contributions d'un adherent (plus recentes en premier), annees archivees comprises"""
         db = DatabaseManager()
         if annee:
             query = """
-                SELECT * FROM contributions
+                SELECT * FROM {}
                 WHERE adherent_id = ? AND strftime('%Y', date_paiement) = ?
                 ORDER BY date_paiement DESC
             """
-            rows = db.fetch_all(query, (adherent_id, str(annee)))
+            params = (adherent_id, str(annee))
         else:
             query = """
-                SELECT * FROM contributions
+                SELECT * FROM {}
                 WHERE adherent_id = ?
                 ORDER BY date_paiement DESC
             """
-            rows = db.fetch_all(query, (adherent_id,))
+            params = (adherent_id,)
+        rows = db.fetch_all(query.format('contributions'), params)
+        rows += Archives.fetch_all_adherent(
+            adherent_id, query.format('archive.contributions'), params)
+        if annee:
+            # Une archive peut contenir des paiements dates de l'annee suivante
+            rows.sort(key=lambda row: row['date_paiement'] or '', reverse=True)
         return [Contribution._from_row(row) for row in rows]
 
     @staticmethod
@@ -77,17 +90,23 @@ class Contribution:
         if annee:
             query = """
                 SELECT COALESCE(SUM(montant), 0) as total
-                FROM contributions
+                FROM {}
                 WHERE adherent_id = ? AND strftime('%Y', date_paiement) = ?
             """
-            row = db.fetch_one(query, (adherent_id, str(annee)))
-        else:
-            query = """
-                SELECT COALESCE(SUM(montant), 0) as total
-                FROM contributions WHERE adherent_id = ?
-            """
-            row = db.fetch_one(query, (adherent_id,))
-        return row['total'] if row else 0
+            params = (adherent_id, str(annee))
+            rows = [db.fetch_one(query.format('contributions'), params)]
+            rows += Archives.fetch_all_adherent(
+                adherent_id, query.format('archive.contributions'), params)
+            return sum((Money.from_db(row['total']) for row in rows if row), Money(0))
+
+        # Sans annee, les totaux des annees archivees suffisent
+        query = """
+            SELECT (SELECT COALESCE(SUM(montant), 0) FROM contributions WHERE adherent_id = ?)
+                 + (SELECT COALESCE(SUM(total_contributions), 0) FROM archives_adherents
+                    WHERE adherent_id = ?) as total
+        """
+        row = db.fetch_one(query, (adherent_id, adherent_id))
+        return Money.from_db(row['total'] if row else 0)
 
     @staticmethod
     def get_all():
@@ -101,6 +120,28 @@ class Contribution:
         rows = db.fetch_all(query)
         return [Contribution._from_row(row) for row in rows]
 
+    @staticmethod
+    def get_all_for_year(annee):
+        """
+        Paiements dates d'une annee, avec nom et prenom de l'adherent
+        (plus anciens en premier, lus par lots)
+
+        Args:
+            annee: Numero de l'annee
+
+        Returns:
+            Generateur de Contribution
+        """
+        query = """
+            SELECT c.*, a.nom, a.prenom
+            FROM {schema}contributions c
+            JOIN adherents a ON c.adherent_id = a.id
+            WHERE c.date_paiement >= ? AND c.date_paiement < ?
+            ORDER BY c.date_paiement, c.id
+        """
+        rows = Archives.iter_annee(annee, query, (f"{annee}-01-01", f"{int(annee) + 1}-01-01"))
+        return (Contribution._from_row(row) for row in rows)
+
     @staticmethod
     def get_recent(limit=10):
         db = DatabaseManager()
@@ -122,6 +163,8 @@ class Contribution:
         params = []
         for field, value in kwargs.items():
             if field in valid_fields:
+                if field == 'montant':
+                    value = Money.from_euros(value)
                 updates.append(f"{field} = ?")
                 params.append(value)
                 setattr(self, field, value)
@@ -130,27 +173,18 @@ class Contribution:
         params.append(self.id)
         query = f"UPDATE contributions SET {', '.join(updates)} WHERE id = ?"
         db.execute_query(query, params)
+        bus.publier(ContributionModifiee(self.id, self.adherent_id))
         return True
 
     def delete(self):
         """Supprime la contribution et met a jour la cotisation si liee"""
         db = DatabaseManager()
-        if self.cotisation_id:
-            from models.cotisation import Cotisation
-            cotisation = Cotisation.get_by_id(self.cotisation_id)
-            if cotisation:
-                nouveau_paye = max(0, cotisation.montant_paye - self.montant)
-                if nouveau_paye >= cotisation.montant_du:
-                    statut = 'paye'
-                elif nouveau_paye > 0:
-                    statut = 'partiel'
-                else:
-                    statut = 'non_paye'
-                db.execute_query(
-                    "UPDATE cotisations SET montant_paye = ?, statut = ? WHERE id = ?",
-                    (nouveau_paye, statut, self.cotisation_id)
-                )
-        db.execute_query("DELETE FROM contributions WHERE id = ?", (self.id,))
+        with db.transaction():
+            if self.cotisation_id:
+                from models.cotisation import Cotisation
+                Cotisation.ajuster_montant_paye(self.cotisation_id, -self.montant)
+            db.execute_query("DELETE FROM contributions WHERE id = ?", (self.id,))
+        bus.publier(ContributionSupprimee(self.id, self.adherent_id, self.cotisation_id))
         return True
 
     def get_adherent(self):
@@ -163,7 +197,7 @@ class Contribution:
             id=row['id'],
             adherent_id=row['adherent_id'],
             cotisation_id=row['cotisation_id'],
-            montant=row['montant'],
+            montant=Money.from_db(row['montant']),
             date_paiement=row['date_paiement'],
             mode_paiement=row['mode_paiement'],
             reference_paiement=row['reference_paiement'],
@@ -2,7 +2,27 @@
 Modele Cotisation
 Represente l'obligation de paiement d'un adherent pour un appel de fond
 """
+import sqlite3
+
 from database.db_manager import DatabaseManager
+from database.archives import Archives
+from models.money import Money
+from services.event_bus import bus, PaiementEnregistre
+
+# UPDATE ... RETURNING n'existe qu'a partir de SQLite 3.35
+_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# Ajout d'un montant au montant paye et recalcul du statut
+_AJUSTER_MONTANT_PAYE = """
+    UPDATE cotisations
+    SET montant_paye = MAX(0, montant_paye + :delta),
+        statut = CASE
+            WHEN MAX(0, montant_paye + :delta) >= montant_du THEN 'paye'
+            WHEN MAX(0, montant_paye + :delta) > 0 THEN 'partiel'
+            ELSE 'non_paye'
+        END
+    WHERE id = :id
+"""
 
 
 class Cotisation:
@@ -13,8 +33,8 @@ class Cotisation:
         self.id = id
         self.appel_id = appel_id
         self.adherent_id = adherent_id
-        self.montant_du = montant_du
-        self.montant_paye = montant_paye
+        self.montant_du = Money.from_euros(montant_du)
+        self.montant_paye = Money.from_euros(montant_paye)
         self.statut = statut
         self.created_at = created_at
         self.updated_at = updated_at
@@ -29,27 +49,33 @@ class Cotisation:
 
     @staticmethod
     def get_for_adherent(adherent_id):
-        """Toutes les cotisations d'un adherent (plus recent en premier)"""
+        """Toutes les cotisations d'un adherent (plus recent en premier), annees archivees comprises"""
         db = DatabaseManager()
         query = """
             SELECT c.*, a.annee as appel_annee, a.description as appel_description,
                    a.montant as appel_montant, a.date_lancement
-            FROM cotisations c
+            FROM {} c
             JOIN appels_de_fonds a ON c.appel_id = a.id
             WHERE c.adherent_id = ?
             ORDER BY a.date_lancement DESC
         """
-        rows = db.fetch_all(query, (adherent_id,))
+        rows = db.fetch_all(query.format('cotisations'), (adherent_id,))
+        rows += Archives.fetch_all_adherent(
+            adherent_id, query.format('archive.cotisations'), (adherent_id,))
         return [Cotisation._from_row(row) for row in rows]
 
     @staticmethod
     def get_impayees_adherent(adherent_id):
-        """Cotisations non payees ou partielles d'un adherent"""
+        """
+        Cotisations non payees ou partielles d'un adherent
+        (index partiel impose : sans statistiques, SQLite lui prefere l'index
+        de toutes les cotisations de l'adherent)
+        """
         db = DatabaseManager()
         query = """
             SELECT c.*, a.annee as appel_annee, a.description as appel_description,
                    a.montant as appel_montant, a.date_lancement
-            FROM cotisations c
+            FROM cotisations c INDEXED BY idx_cotisations_impayees
             JOIN appels_de_fonds a ON c.appel_id = a.id
             WHERE c.adherent_id = ? AND c.statut != 'paye'
             ORDER BY a.date_lancement ASC
@@ -57,25 +83,44 @@ class Cotisation:
         rows = db.fetch_all(query, (adherent_id,))
         return [Cotisation._from_row(row) for row in rows]
 
+    @staticmethod
+    def get_impayes_par_adherent():
+        """
+        Resume des impayes par adherent (liste et rapport PDF des impayes),
+        lu dans les releves de compte (voir models/releve.py)
+
+        Returns:
+            Liste de dictionnaires (id, nom, prenom, nb_impayees, montant_restant)
+        """
+        db = DatabaseManager()
+        rows = db.fetch_all("""
+            SELECT a.id, a.nom, a.prenom,
+                   r.nb_impayees,
+                   r.reste_impaye as montant_restant
+            FROM releves_adherents r
+            JOIN adherents a ON a.id = r.adherent_id
+            WHERE r.nb_impayees > 0
+            ORDER BY a.nom, a.prenom
+        """)
+        return [dict(row, montant_restant=Money.from_db(row['montant_restant']))
+                for row in rows]
+
     @staticmethod
     def get_for_appel(appel_id):
-        """Toutes les cotisations d'un appel avec info adherent"""
+        """Toutes les cotisations d'un appel avec info adherent (relues dans l'archive si l'appel est archive)"""
         db = DatabaseManager()
         query = """
             SELECT c.*, ad.nom, ad.prenom
-            FROM cotisations c
-            JOIN adherents ad ON c.adherent_id = ad.id
-            ORDER BY ad.nom, ad.prenom
-        """
-        # Filter by appel_id
-        query = """
-            SELECT c.*, ad.nom, ad.prenom
-            FROM cotisations c
+            FROM {} c
             JOIN adherents ad ON c.adherent_id = ad.id
             WHERE c.appel_id = ?
             ORDER BY ad.nom, ad.prenom
         """
-        rows = db.fetch_all(query, (appel_id,))
+        rows = db.fetch_all(query.format('cotisations'), (appel_id,))
+        if not rows:
+            annee = Archives.annee_appel(appel_id)
+            if annee is not None:
+                rows = Archives.fetch_all(annee, query.format('archive.cotisations'), (appel_id,))
         return [Cotisation._from_row(row) for row in rows]
 
     def enregistrer_paiement(self, montant, date_paiement, mode_paiement=None,
@@ -89,49 +134,75 @@ class Cotisation:
         from models.historique import Historique
 
         db = DatabaseManager()
+        montant = Money.from_euros(montant)
+
+        with db.transaction():
+            # Creer la contribution et la recuperer
+            contribution = Contribution.create(
+                adherent_id=self.adherent_id,
+                cotisation_id=self.id,
+                montant=montant,
+                date_paiement=date_paiement,
+                mode_paiement=mode_paiement,
+                reference_paiement=reference_paiement,
+                admin_id=admin_id,
+                type_paiement='cotisation',
+                notes=notes
+            )
+
+            # Mettre a jour la cotisation (en SQL : un autre paiement concurrent
+            # de la meme cotisation n'est pas ecrase)
+            solde = Cotisation.ajuster_montant_paye(self.id, montant)
+            if solde:
+                self.montant_paye, self.statut = solde
+
+            # Logger dans historique
+            Historique.log(
+                self.adherent_id, 'paiement_cotisation',
+                f"Paiement de {montant} pour appel de fonds #{self.appel_id}",
+                montant=montant, admin_id=admin_id
+            )
+
+        bus.publier(PaiementEnregistre(self.id, contribution.id,
+                                       self.adherent_id, self.appel_id))
+        return contribution
 
-        # Creer la contribution et la recuperer
-        contribution = Contribution.create(
-            adherent_id=self.adherent_id,
-            cotisation_id=self.id,
-            montant=montant,
-            date_paiement=date_paiement,
-            mode_paiement=mode_paiement,
-            reference_paiement=reference_paiement,
-            admin_id=admin_id,
-            type_paiement='cotisation',
-            notes=notes
-        )
-
-        # Mettre a jour la cotisation
-        nouveau_paye = self.montant_paye + montant
-        if nouveau_paye >= self.montant_du:
-            nouveau_statut = 'paye'
-        elif nouveau_paye > 0:
-            nouveau_statut = 'partiel'
+    @staticmethod
+    def ajuster_montant_paye(cotisation_id, delta):
+        """
+        Ajoute delta au montant paye d'une cotisation et recalcule son statut,
+        en une seule requete (sans lecture prealable) : deux paiements
+        simultanes de la meme cotisation s'additionnent. Le montant paye ne
+        descend pas sous zero.
+
+        Args:
+            cotisation_id: ID de la cotisation
+            delta: Montant a ajouter (negatif pour retirer un paiement)
+
+        Returns:
+            Tuple (montant_paye, statut) apres mise a jour, ou None si la
+            cotisation n'existe pas
+        """
+        db = DatabaseManager()
+        params = {'delta': Money.from_euros(delta), 'id': cotisation_id}
+        if _RETURNING:
+            row = db.fetch_one(_AJUSTER_MONTANT_PAYE + "RETURNING montant_paye, statut", params)
         else:
-            nouveau_statut = 'non_paye'
-
-        db.execute_query(
-            "UPDATE cotisations SET montant_paye = ?, statut = ? WHERE id = ?",
-            (nouveau_paye, nouveau_statut, self.id)
-        )
-        self.montant_paye = nouveau_paye
-        self.statut = nouveau_statut
-
-        # Logger dans historique
-        Historique.log(
-            self.adherent_id, 'paiement_cotisation',
-            f"Paiement de {montant} pour appel de fonds #{self.appel_id}",
-            montant=montant, admin_id=admin_id
-        )
-
-        return contribution
+            # SQLite ancien : meme UPDATE puis relecture, dans la meme transaction
+            with db.transaction():
+                db.execute_query(_AJUSTER_MONTANT_PAYE, params)
+                row = db.fetch_one(
+                    "SELECT montant_paye, statut FROM cotisations WHERE id = ?",
+                    (cotisation_id,)
+                )
+        if not row:
+            return None
+        return Money.from_db(row['montant_paye']), row['statut']
 
     def get_reste_a_payer(self):
         """Montant restant a payer"""
         reste = self.montant_du - self.montant_paye
-        return max(0, reste)
+        return max(Money(0), reste)
 
     def get_adherent(self):
         from models.adherent import Adherent
@@ -147,8 +218,8 @@ class Cotisation:
             id=row['id'],
             appel_id=row['appel_id'],
             adherent_id=row['adherent_id'],
-            montant_du=row['montant_du'],
-            montant_paye=row['montant_paye'],
+            montant_du=Money.from_db(row['montant_du']),
+            montant_paye=Money.from_db(row['montant_paye']),
             statut=row['statut'],
             created_at=row['created_at'],
             updated_at=row['updated_at']
@@ -157,7 +228,8 @@ class Cotisation:
         for field in ['appel_annee', 'appel_description', 'appel_montant',
                       'date_lancement', 'nom', 'prenom']:
             try:
-                setattr(c, field, row[field])
+                valeur = row[field]
             except (IndexError, KeyError):
-                pass
+                continue
+            setattr(c, field, Money.from_db(valeur) if field == 'appel_montant' else valeur)
         return c
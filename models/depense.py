@@ -3,6 +3,9 @@ Modele Depense
 Represente une depense liee a un deces
 """
 from database.db_manager import DatabaseManager
+from database.archives import Archives
+from models.money import Money
+from services.event_bus import bus, DepenseCreee, DepenseModifiee, DepenseSupprimee
 from config import POSTES_DEPENSES
 
 
@@ -10,6 +13,8 @@ class Depense:
     """Modele representant une depense (deces)"""
 
     POSTES = list(POSTES_DEPENSES.keys())
+    # Colonnes de montant (centimes en base, Money dans le modele)
+    MONTANTS = POSTES + ['montant']
 
     def __init__(self, id, annee_id, adherent_id, defunt_est_adherent,
                  date_deces, montant=0, defunt_nom=None, defunt_relation=None,
@@ -24,14 +29,14 @@ class Depense:
         self.defunt_relation = defunt_relation
         self.date_deces = date_deces
         self.pays_destination = pays_destination
-        self.transport_services = transport_services or 0
-        self.billet_avion = billet_avion or 0
-        self.imam = imam or 0
-        self.mairie = mairie or 0
-        self.autre1 = autre1 or 0
-        self.autre2 = autre2 or 0
-        self.autre3 = autre3 or 0
-        self.montant = montant
+        self.transport_services = Money.from_euros(transport_services)
+        self.billet_avion = Money.from_euros(billet_avion)
+        self.imam = Money.from_euros(imam)
+        self.mairie = Money.from_euros(mairie)
+        self.autre1 = Money.from_euros(autre1)
+        self.autre2 = Money.from_euros(autre2)
+        self.autre3 = Money.from_euros(autre3)
+        self.montant = Money.from_euros(montant)
         self.notes = notes
         self.created_at = created_at
         self.updated_at = updated_at
@@ -53,10 +58,16 @@ class Depense:
         """
         db = DatabaseManager()
 
-        # Calculer le montant total
-        montant = ((transport_services or 0) + (billet_avion or 0) +
-                   (imam or 0) + (mairie or 0) + (autre1 or 0) +
-                   (autre2 or 0) + (autre3 or 0))
+        # Calculer le montant total (au centime pres)
+        transport_services = Money.from_euros(transport_services)
+        billet_avion = Money.from_euros(billet_avion)
+        imam = Money.from_euros(imam)
+        mairie = Money.from_euros(mairie)
+        autre1 = Money.from_euros(autre1)
+        autre2 = Money.from_euros(autre2)
+        autre3 = Money.from_euros(autre3)
+        montant = (transport_services + billet_avion + imam + mairie +
+                   autre1 + autre2 + autre3)
 
         query = """
             INSERT INTO depenses (annee_id, adherent_id, defunt_est_adherent,
@@ -68,12 +79,13 @@ class Depense:
         """
         params = (annee_id, adherent_id, defunt_est_adherent, defunt_nom,
                   defunt_relation, date_deces, pays_destination,
-                  transport_services or 0, billet_avion or 0, imam or 0,
-                  mairie or 0, autre1 or 0, autre2 or 0, autre3 or 0,
+                  transport_services, billet_avion, imam,
+                  mairie, autre1, autre2, autre3,
                   montant, notes)
 
         cursor = db.execute_query(query, params)
         depense_id = cursor.lastrowid
+        bus.publier(DepenseCreee(depense_id, annee_id, adherent_id))
 
         # Si le defunt est l'adherent, le passer en inactif
         if defunt_est_adherent:
@@ -97,14 +109,16 @@ class Depense:
 
     @staticmethod
     def get_all_for_annee(annee_id):
-        """Recupere toutes les depenses pour une annee"""
+        """Recupere toutes les depenses pour une annee (relues dans l'archive si l'annee est archivee)"""
         db = DatabaseManager()
         query = """
-            SELECT * FROM depenses
+            SELECT * FROM {}
             WHERE annee_id = ?
             ORDER BY date_deces DESC
         """
-        rows = db.fetch_all(query, (annee_id,))
+        rows = db.fetch_all(query.format('depenses'), (annee_id,))
+        if not rows:
+            rows = Depense._depuis_archive(annee_id, query, (annee_id,))
         return [Depense._from_row(row) for row in rows]
 
     @staticmethod
@@ -120,13 +134,24 @@ class Depense:
         """Recupere les depenses pour une periode donnee"""
         db = DatabaseManager()
         query = """
-            SELECT * FROM depenses
+            SELECT * FROM {}
             WHERE annee_id = ? AND date_deces BETWEEN ? AND ?
             ORDER BY date_deces DESC
         """
-        rows = db.fetch_all(query, (annee_id, date_debut, date_fin))
+        params = (annee_id, date_debut, date_fin)
+        rows = db.fetch_all(query.format('depenses'), params)
+        if not rows:
+            rows = Depense._depuis_archive(annee_id, query, params)
         return [Depense._from_row(row) for row in rows]
 
+    @staticmethod
+    def _depuis_archive(annee_id, query, params):
+        """Execute query (table en {}) sur l'archive de l'annee si elle est archivee"""
+        annee = Archives.annee_archivee(annee_id=annee_id)
+        if annee is None:
+            return []
+        return Archives.fetch_all(annee, query.format('archive.depenses'), params)
+
     def update(self, **kwargs):
         """Met a jour les informations de la depense"""
         db = DatabaseManager()
@@ -142,6 +167,8 @@ class Depense:
 
         for field, value in kwargs.items():
             if field in valid_fields:
+                if field in Depense.MONTANTS:
+                    value = Money.from_euros(value)
                 updates.append(f"{field} = ?")
                 params.append(value)
                 setattr(self, field, value)
@@ -153,12 +180,14 @@ class Depense:
         query = f"UPDATE depenses SET {', '.join(updates)} WHERE id = ?"
 
         db.execute_query(query, params)
+        bus.publier(DepenseModifiee(self.id, self.annee_id))
         return True
 
     def delete(self):
         """Supprime la depense"""
         db = DatabaseManager()
         db.execute_query("DELETE FROM depenses WHERE id = ?", (self.id,))
+        bus.publier(DepenseSupprimee(self.id, self.annee_id))
         return True
 
     def get_adherent(self):
@@ -190,14 +219,14 @@ class Depense:
             defunt_relation=row['defunt_relation'],
             date_deces=row['date_deces'],
             pays_destination=row['pays_destination'],
-            transport_services=row['transport_services'],
-            billet_avion=row['billet_avion'],
-            imam=row['imam'],
-            mairie=row['mairie'],
-            autre1=row['autre1'],
-            autre2=row['autre2'],
-            autre3=row['autre3'],
-            montant=row['montant'],
+            transport_services=Money.from_db(row['transport_services']),
+            billet_avion=Money.from_db(row['billet_avion']),
+            imam=Money.from_db(row['imam']),
+            mairie=Money.from_db(row['mairie']),
+            autre1=Money.from_db(row['autre1']),
+            autre2=Money.from_db(row['autre2']),
+            autre3=Money.from_db(row['autre3']),
+            montant=Money.from_db(row['montant']),
             notes=row['notes'],
             created_at=row['created_at'],
             updated_at=row['updated_at']
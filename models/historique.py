@@ -3,6 +3,8 @@ Modele Historique
 Journal d'evenements par adherent
 """
 from database.db_manager import DatabaseManager
+from database.archives import Archives
+from models.money import Money
 
 
 class Historique:
@@ -20,7 +22,7 @@ class Historique:
         self.adherent_id = adherent_id
         self.type_evenement = type_evenement
         self.description = description
-        self.montant = montant
+        self.montant = None if montant is None else Money.from_euros(montant)
         self.admin_id = admin_id
         self.created_at = created_at
 
@@ -28,6 +30,8 @@ class Historique:
     def log(adherent_id, type_evenement, description=None, montant=None, admin_id=None):
         """Ajoute une entree dans l'historique"""
         db = DatabaseManager()
+        if montant is not None:
+            montant = Money.from_euros(montant)
         query = """
             INSERT INTO historique (adherent_id, type_evenement, description, montant, admin_id)
             VALUES (?, ?, ?, ?, ?)
@@ -36,14 +40,19 @@ class Historique:
 
     @staticmethod
     def get_for_adherent(adherent_id):
-        """Recupere l'historique complet d'un adherent (plus recent en premier)"""
+        """
+        Recupere l'historique complet d'un adherent (plus recent en premier),
+        annees archivees comprises
+        """
         db = DatabaseManager()
         query = """
-            SELECT * FROM historique
+            SELECT * FROM {}
             WHERE adherent_id = ?
             ORDER BY created_at DESC
         """
-        rows = db.fetch_all(query, (adherent_id,))
+        rows = db.fetch_all(query.format('historique'), (adherent_id,))
+        rows += Archives.fetch_all_adherent(
+            adherent_id, query.format('archive.historique'), (adherent_id,))
         return [Historique._from_row(row) for row in rows]
 
     @staticmethod
@@ -67,7 +76,7 @@ class Historique:
             adherent_id=row['adherent_id'],
             type_evenement=row['type_evenement'],
             description=row['description'],
-            montant=row['montant'],
+            montant=Money.from_db_nullable(row['montant']),
             admin_id=row['admin_id'],
             created_at=row['created_at']
         )
@@ -0,0 +1,203 @@
+"""
+Type Money
+Montant en centimes entiers : les montants sont stockes en INTEGER
+(centimes) dans la base et manipules sous forme de Money dans les modeles,
+ce qui rend les comparaisons et les sommes exactes.
+
+Un nombre (int, float, Decimal, chaine) combine a un Money est lu comme
+un montant en euros : Money.from_euros(12.5) + 3 == Money(1550). Compare a
+un nombre, un Money vaut exactement son montant en euros (Money(150) == 1.5,
+mais Money(100) != 1.004) et a le meme hash que ce nombre.
+"""
+import sqlite3
+from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
+from fractions import Fraction
+
+_NOMBRES = (int, float, Decimal)
+
+
+def _decimal(nombre):
+    """Decimal d'un nombre (un float est pris sous sa forme la plus courte : 0.1 -> "0.1")"""
+    return Decimal(repr(nombre)) if isinstance(nombre, float) else Decimal(nombre)
+
+
+def _arrondir(valeur):
+    """Arrondit un nombre de centimes (Decimal) a l'entier, demi-centime au-dessus"""
+    return int(valeur.quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+class Money:
+    """Montant exact en centimes"""
+
+    __slots__ = ('cents',)
+
+    def __init__(self, cents=0):
+        """
+        Args:
+            cents: Montant en centimes (entier)
+        """
+        if isinstance(cents, Money):
+            cents = cents.cents
+        self.cents = int(cents)
+
+    @staticmethod
+    def from_euros(valeur):
+        """
+        Convertit un montant en euros (saisie, formulaire...) en Money
+
+        Args:
+            valeur: Money, nombre, Decimal ou chaine ("12.5", "12,50"), None = 0
+
+        Returns:
+            Money arrondi au centime (demi-centime arrondi au-dessus)
+        """
+        if isinstance(valeur, Money):
+            return valeur
+        if valeur is None or valeur == '':
+            return Money(0)
+        try:
+            if isinstance(valeur, _NOMBRES):
+                euros = _decimal(valeur)
+            else:
+                euros = Decimal(str(valeur).strip().replace(',', '.'))
+        except InvalidOperation:
+            raise ValueError(f"Montant invalide: {valeur!r}")
+        if not euros.is_finite():
+            raise ValueError(f"Montant invalide: {valeur!r}")
+        return Money(_arrondir(euros * 100))
+
+    @staticmethod
+    def from_db(valeur):
+        """Money a partir d'une colonne de montant (centimes, NULL = 0)"""
+        return Money(valeur or 0)
+
+    @staticmethod
+    def from_db_nullable(valeur):
+        """Comme from_db, mais conserve NULL (montant facultatif)"""
+        return None if valeur is None else Money(valeur)
+
+    def decimal(self):
+        """Montant en euros (Decimal exact)"""
+        return Decimal(self.cents) / 100
+
+    # ------------------------------------------------------------------
+    # Stockage : sqlite3 enregistre directement les centimes
+    # ------------------------------------------------------------------
+
+    def __conform__(self, protocol):
+        if protocol is sqlite3.PrepareProtocol:
+            return self.cents
+
+    # ------------------------------------------------------------------
+    # Arithmetique (un nombre est un montant en euros)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _centimes(autre):
+        if isinstance(autre, Money):
+            return autre.cents
+        if isinstance(autre, _NOMBRES) and not isinstance(autre, bool):
+            return Money.from_euros(autre).cents
+        return None
+
+    def __add__(self, autre):
+        cents = Money._centimes(autre)
+        return NotImplemented if cents is None else Money(self.cents + cents)
+
+    __radd__ = __add__
+
+    def __sub__(self, autre):
+        cents = Money._centimes(autre)
+        return NotImplemented if cents is None else Money(self.cents - cents)
+
+    def __rsub__(self, autre):
+        cents = Money._centimes(autre)
+        return NotImplemented if cents is None else Money(cents - self.cents)
+
+    def __mul__(self, facteur):
+        if not isinstance(facteur, _NOMBRES) or isinstance(facteur, bool):
+            return NotImplemented
+        return Money(_arrondir(self.cents * _decimal(facteur)))
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, autre):
+        """Money / Money -> ratio (float), Money / nombre -> Money"""
+        if isinstance(autre, Money):
+            return self.cents / autre.cents
+        if isinstance(autre, _NOMBRES) and not isinstance(autre, bool):
+            return Money(_arrondir(self.cents / _decimal(autre)))
+        return NotImplemented
+
+    def __neg__(self):
+        return Money(-self.cents)
+
+    def __pos__(self):
+        return self
+
+    def __abs__(self):
+        return Money(abs(self.cents))
+
+    def __bool__(self):
+        return self.cents != 0
+
+    # ------------------------------------------------------------------
+    # Comparaisons
+    # ------------------------------------------------------------------
+
+    def _valeurs(self, autre):
+        """
+        Paire comparable (self, autre) : centimes entre deux Money, montants
+        exacts en euros face a un nombre (sans arrondi au centime, comme
+        entre int, float et Decimal)
+        """
+        if isinstance(autre, Money):
+            return self.cents, autre.cents
+        if isinstance(autre, _NOMBRES) and not isinstance(autre, bool):
+            return Fraction(self.cents, 100), autre
+        return None
+
+    def __eq__(self, autre):
+        valeurs = self._valeurs(autre)
+        return NotImplemented if valeurs is None else valeurs[0] == valeurs[1]
+
+    def __lt__(self, autre):
+        valeurs = self._valeurs(autre)
+        return NotImplemented if valeurs is None else valeurs[0] < valeurs[1]
+
+    def __le__(self, autre):
+        valeurs = self._valeurs(autre)
+        return NotImplemented if valeurs is None else valeurs[0] <= valeurs[1]
+
+    def __gt__(self, autre):
+        valeurs = self._valeurs(autre)
+        return NotImplemented if valeurs is None else valeurs[0] > valeurs[1]
+
+    def __ge__(self, autre):
+        valeurs = self._valeurs(autre)
+        return NotImplemented if valeurs is None else valeurs[0] >= valeurs[1]
+
+    def __hash__(self):
+        # Meme hash que le nombre egal (int, float, Decimal, Fraction)
+        if self.cents % 100 == 0:
+            return hash(self.cents // 100)
+        return hash(Fraction(self.cents, 100))
+
+    # ------------------------------------------------------------------
+    # Affichage : f"{m:,.2f}", "%.2f" % m et round(m) restent valables
+    # ------------------------------------------------------------------
+
+    def __float__(self):
+        return self.cents / 100
+
+    def __round__(self, ndigits=None):
+        return round(float(self), ndigits)
+
+    def __format__(self, spec):
+        return format(self.decimal(), spec or '.2f')
+
+    def __str__(self):
+        return format(self, '.2f')
+
+    def __repr__(self):
+        return f"Money({self.cents})"
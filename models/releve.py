@@ -0,0 +1,89 @@
+"""
+Modele Releve
+Releve de compte d'un adherent : totaux tenus a jour par les triggers de la
+table releves_adherents (voir database/migrations.py, migration 5)
+"""
+from database.db_manager import DatabaseManager
+from models.money import Money
+
+
+class Releve:
+    """Totaux du compte d'un adherent (annees archivees comprises)"""
+
+    def __init__(self, adherent_id, nb_cotisations=0, nb_impayees=0,
+                 total_du=0, total_paye=0, reste_impaye=0, total_verse=0,
+                 dernier_paiement=None, frais_entree=0, frais_entree_paye=1,
+                 maj_le=None):
+        self.adherent_id = adherent_id
+        self.nb_cotisations = nb_cotisations
+        self.nb_impayees = nb_impayees
+        self.total_du = Money.from_euros(total_du)
+        self.total_paye = Money.from_euros(total_paye)
+        self.reste_impaye = Money.from_euros(reste_impaye)
+        self.total_verse = Money.from_euros(total_verse)
+        self.dernier_paiement = dernier_paiement
+        self.frais_entree = Money.from_euros(frais_entree)
+        self.frais_entree_paye = frais_entree_paye
+        self.maj_le = maj_le
+
+    @staticmethod
+    def get_for_adherent(adherent_id):
+        """
+        Releve d'un adherent (lecture par cle primaire)
+
+        Args:
+            adherent_id: ID de l'adherent
+
+        Returns:
+            Releve, ou un releve vide si l'adherent n'a encore rien
+        """
+        db = DatabaseManager()
+        row = db.fetch_one(
+            "SELECT * FROM releves_adherents WHERE adherent_id = ?", (adherent_id,)
+        )
+        if row:
+            return Releve._from_row(row)
+        return Releve(adherent_id)
+
+    @property
+    def frais_entree_restant(self):
+        """Frais d'entree restant a payer"""
+        if self.frais_entree_paye:
+            return Money(0)
+        return self.frais_entree
+
+    @staticmethod
+    def _from_row(row):
+        return Releve(
+            adherent_id=row['adherent_id'],
+            nb_cotisations=row['nb_cotisations'],
+            nb_impayees=row['nb_impayees'],
+            total_du=Money.from_db(row['total_du']),
+            total_paye=Money.from_db(row['total_paye']),
+            reste_impaye=Money.from_db(row['reste_impaye']),
+            total_verse=Money.from_db(row['total_verse']),
+            dernier_paiement=row['dernier_paiement'],
+            frais_entree=Money.from_db(row['frais_entree']),
+            frais_entree_paye=row['frais_entree_paye'],
+            maj_le=row['maj_le']
+        )
+
+    def to_dict(self):
+        return {
+            'adherent_id': self.adherent_id,
+            'nb_cotisations': self.nb_cotisations,
+            'nb_impayees': self.nb_impayees,
+            'total_du': self.total_du, 'total_paye': self.total_paye,
+            'reste_impaye': self.reste_impaye, 'total_verse': self.total_verse,
+            'dernier_paiement': self.dernier_paiement,
+            'frais_entree': self.frais_entree,
+            'frais_entree_paye': self.frais_entree_paye,
+            'maj_le': self.maj_le
+        }
+
+    def __str__(self):
+        return (f"Releve(Adherent:{self.adherent_id}, Du:{self.total_du}, "
+                f"Paye:{self.total_paye}, Reste:{self.reste_impaye})")
+
+    def __repr__(self):
+        return self.__str__()
@@ -1,10 +1,19 @@
 """
 Package des services métier
+Les services sont importés à la demande (voir utils.lazy) : importer un
+service n'entraîne plus le chargement de tous les autres.
 """
-from .contribution_service import ContributionService
-from .depense_service import DepenseService
-from .statistique_service import StatistiqueService
-from .rapport_service import RapportService
+from utils.lazy import lazy_exports, LazyImport
 
 __all__ = ['ContributionService', 'DepenseService',
-           'StatistiqueService', 'RapportService']
+           'StatistiqueService', 'RapportService', 'PdfService']
+
+__getattr__ = lazy_exports(__name__, {
+    'ContributionService': 'contribution_service',
+    'DepenseService': 'depense_service',
+    'StatistiqueService': 'statistique_service',
+    'RapportService': 'rapport_service',
+})
+
+# reportlab n'est importé qu'à la première génération de PDF
+PdfService = LazyImport('services.pdf_service', 'PdfService')
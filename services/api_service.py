@@ -0,0 +1,181 @@
+"""
+Service de l'API JSON (web/blueprints/api.py)
+Lecture generique des ressources : projection des champs, pagination par
+curseur (id croissant) et signature de l'etat d'une collection pour l'ETag
+"""
+import hashlib
+
+from database.db_manager import DatabaseManager
+from models.money import Money
+from config import ITEMS_PER_PAGE
+
+# Nombre maximal de lignes par page
+LIMITE_MAX = 500
+
+# Ressources exposees : table, colonnes en centimes, filtres acceptes (colonne: type)
+RESSOURCES = {
+    'adherents': {
+        'table': 'adherents',
+        'montants': ('frais_entree',),
+        'filtres': {'actif': int, 'frais_entree_paye': int},
+    },
+    'appels': {
+        'table': 'appels_de_fonds',
+        'montants': ('montant',),
+        'filtres': {'annee': int, 'cloture': int},
+    },
+    'cotisations': {
+        'table': 'cotisations',
+        'montants': ('montant_du', 'montant_paye'),
+        'filtres': {'adherent_id': int, 'appel_id': int, 'statut': str},
+    },
+    'contributions': {
+        'table': 'contributions',
+        'montants': ('montant',),
+        'filtres': {'adherent_id': int, 'cotisation_id': int, 'mode_paiement': str,
+                    'type_paiement': str, 'admin_id': int},
+    },
+    'depenses': {
+        'table': 'depenses',
+        'montants': ('montant', 'transport_services', 'billet_avion', 'imam', 'mairie',
+                     'autre1', 'autre2', 'autre3'),
+        'filtres': {'annee_id': int, 'adherent_id': int},
+    },
+}
+
+
+class ApiService:
+    """Lecture des ressources de l'API"""
+
+    # Colonnes de chaque table (PRAGMA table_info), lues une fois
+    _colonnes = {}
+
+    @staticmethod
+    def colonnes(ressource):
+        """Colonnes de la table d'une ressource, dans l'ordre du schema"""
+        table = RESSOURCES[ressource]['table']
+        if table not in ApiService._colonnes:
+            db = DatabaseManager()
+            ApiService._colonnes[table] = tuple(
+                row['name'] for row in db.fetch_all(f"PRAGMA table_info({table})")
+            )
+        return ApiService._colonnes[table]
+
+    @staticmethod
+    def champs(ressource, demandes=None):
+        """
+        Colonnes a renvoyer (l'id est toujours inclus)
+
+        Args:
+            ressource: Nom de la ressource
+            demandes: Liste des champs demandes (defaut: tous)
+
+        Returns:
+            Tuple de colonnes
+
+        Raises:
+            ValueError: Champ inconnu
+        """
+        colonnes = ApiService.colonnes(ressource)
+        if not demandes:
+            return colonnes
+        inconnus = [champ for champ in demandes if champ not in colonnes]
+        if inconnus:
+            raise ValueError(f"Champ(s) inconnu(s) : {', '.join(inconnus)}")
+        return ('id',) + tuple(champ for champ in colonnes
+                               if champ in demandes and champ != 'id')
+
+    @staticmethod
+    def _conditions(ressource, filtres):
+        """Clause WHERE et parametres des filtres (valeurs converties selon leur type)"""
+        acceptes = RESSOURCES[ressource]['filtres']
+        conditions, params = [], []
+        for colonne, valeur in (filtres or {}).items():
+            if colonne not in acceptes:
+                raise ValueError(f"Filtre inconnu : {colonne}")
+            try:
+                params.append(acceptes[colonne](valeur))
+            except ValueError:
+                raise ValueError(f"Valeur invalide pour {colonne} : {valeur}")
+            conditions.append(f"{colonne} = ?")
+        return conditions, params
+
+    @staticmethod
+    def signature(ressource, filtres=None, cles=()):
+        """
+        Empreinte de l'etat d'une collection, pour un ETag fort : nombre de
+        lignes, dernier updated_at et plus grand id de la selection, plus le
+        compteur du journal des modifications (updated_at est a la seconde :
+        deux ecritures dans la meme seconde changent quand meme l'empreinte)
+
+        Args:
+            ressource: Nom de la ressource
+            filtres: Filtres de la selection
+            cles: Autres elements de la reponse (champs, curseur, limite)
+
+        Returns:
+            Empreinte hexadecimale
+        """
+        table = RESSOURCES[ressource]['table']
+        conditions, params = ApiService._conditions(ressource, filtres)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        db = DatabaseManager()
+        row = db.fetch_one(f"""
+            SELECT COUNT(*) as nombre, MAX(updated_at) as maj, MAX(id) as dernier,
+                   (SELECT seq FROM sqlite_sequence WHERE name = 'journal_modifications')
+                       as journal
+            FROM {table} {where}
+        """, params)
+        elements = [ressource, sorted((filtres or {}).items()), *cles, *tuple(row)]
+        return hashlib.sha256(repr(elements).encode('utf-8')).hexdigest()[:32]
+
+    @staticmethod
+    def lister(ressource, champs=None, filtres=None, apres=0, limite=ITEMS_PER_PAGE):
+        """
+        Page d'une collection, par id croissant
+
+        Args:
+            ressource: Nom de la ressource
+            champs: Colonnes renvoyees (voir champs())
+            filtres: Dictionnaire colonne -> valeur
+            apres: Curseur : id de la derniere ligne de la page precedente
+            limite: Nombre de lignes (au plus LIMITE_MAX)
+
+        Returns:
+            Tuple (lignes, curseur suivant ou None)
+        """
+        table = RESSOURCES[ressource]['table']
+        champs = champs or ApiService.colonnes(ressource)
+        limite = max(1, min(int(limite), LIMITE_MAX))
+        conditions, params = ApiService._conditions(ressource, filtres)
+        conditions.append("id > ?")
+        params.append(int(apres or 0))
+
+        db = DatabaseManager()
+        rows = db.fetch_all(f"""
+            SELECT {', '.join(champs)} FROM {table}
+            WHERE {' AND '.join(conditions)}
+            ORDER BY id
+            LIMIT ?
+        """, params + [limite + 1])
+        suivant = rows[limite - 1]['id'] if len(rows) > limite else None
+        return [ApiService._en_json(ressource, row) for row in rows[:limite]], suivant
+
+    @staticmethod
+    def get(ressource, ligne_id, champs=None):
+        """Une ligne d'une ressource par son id, ou None"""
+        table = RESSOURCES[ressource]['table']
+        champs = champs or ApiService.colonnes(ressource)
+        db = DatabaseManager()
+        row = db.fetch_one(f"SELECT {', '.join(champs)} FROM {table} WHERE id = ?", (ligne_id,))
+        return ApiService._en_json(ressource, row) if row else None
+
+    @staticmethod
+    def _en_json(ressource, row):
+        """Ligne en dictionnaire serialisable (montants en euros)"""
+        montants = RESSOURCES[ressource]['montants']
+        ligne = dict(zip(row.keys(), row))
+        for colonne in montants:
+            if ligne.get(colonne) is not None:
+                ligne[colonne] = float(Money.from_db(ligne[colonne]))
+        return ligne
@@ -3,32 +3,54 @@ Service de gestion des contributions
 Logique metier pour les contributions/paiements (base sur cotisations)
 """
 from models.contribution import Contribution
+from models.money import Money
+from database.archives import Archives
 from database.db_manager import DatabaseManager
 
 
+# Perimetres des totaux d'une annee : les paiements sont pris par date de
+# paiement, les cotisations par annee de l'appel de fonds. Un paiement fait en
+# janvier pour un appel de l'annee precedente compte dans les paiements de
+# l'annee ou il est fait et dans le montant paye de l'annee de l'appel.
+PERIMETRE_PAIEMENTS = "Paiements dates de l'annee {annee}, tous appels confondus"
+PERIMETRE_COTISATIONS = "Cotisations des appels de fonds {annee}, payees a toute date"
+
+
 class ContributionService:
     """Service pour la gestion des contributions"""
 
     @staticmethod
-    def get_dernieres_contributions(limit=10):
+    def get_dernieres_contributions(limit=10, annee=None):
         """
         Recupere les derniers paiements avec nom adherent
 
         Args:
             limit: Nombre maximum de paiements a retourner
+            annee: Uniquement les paiements dates de cette annee (optionnel)
 
         Returns:
             Liste de dictionnaires avec info paiement + adherent
         """
         db = DatabaseManager()
-        query = """
-            SELECT c.*, a.nom, a.prenom
-            FROM contributions c
-            JOIN adherents a ON c.adherent_id = a.id
-            ORDER BY c.date_paiement DESC, c.created_at DESC
-            LIMIT ?
-        """
-        rows = db.fetch_all(query, (limit,))
+        if annee:
+            query = """
+                SELECT c.*, a.nom, a.prenom
+                FROM contributions c
+                JOIN adherents a ON c.adherent_id = a.id
+                WHERE c.date_paiement >= ? AND c.date_paiement < ?
+                ORDER BY c.date_paiement DESC, c.created_at DESC
+                LIMIT ?
+            """
+            rows = db.fetch_all(query, ContributionService._periode(annee) + (limit,))
+        else:
+            query = """
+                SELECT c.*, a.nom, a.prenom
+                FROM contributions c
+                JOIN adherents a ON c.adherent_id = a.id
+                ORDER BY c.date_paiement DESC, c.created_at DESC
+                LIMIT ?
+            """
+            rows = db.fetch_all(query, (limit,))
         results = []
         for row in rows:
             contrib = Contribution._from_row(row)
@@ -62,3 +84,209 @@ class ContributionService:
             Montant total paye
         """
         return Contribution.get_total_by_adherent(adherent_id)
+
+    # ------------------------------------------------------------------
+    # Rapports annuels : une requete groupee par rapport, lignes lues par
+    # lots (annees archivees relues dans leur archive)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def perimetres(annee):
+        """
+        Libelles des perimetres des totaux d'une annee, a afficher avec eux
+
+        Returns:
+            Dictionnaire {'paiements': ..., 'cotisations': ...}
+        """
+        return {
+            'paiements': PERIMETRE_PAIEMENTS.format(annee=annee),
+            'cotisations': PERIMETRE_COTISATIONS.format(annee=annee),
+        }
+
+    @staticmethod
+    def _periode(annee):
+        """Bornes [1er janvier, 1er janvier suivant) : compatibles avec idx_contributions_date"""
+        return (f"{annee}-01-01", f"{int(annee) + 1}-01-01")
+
+    @staticmethod
+    def get_adherents_non_payes(annee):
+        """
+        Adherents ayant des cotisations non soldees sur les appels de l'annee
+
+        Args:
+            annee: Numero de l'annee
+
+        Returns:
+            Generateur de dictionnaires (id, nom, prenom, telephone, nb_impayees,
+            montant_du, montant_paye, montant_restant), par nom
+        """
+        query = """
+            SELECT ad.id, ad.nom, ad.prenom, ad.telephone,
+                   COUNT(*) as nb_impayees,
+                   SUM(c.montant_du) as montant_du,
+                   SUM(c.montant_paye) as montant_paye,
+                   SUM(c.montant_du - c.montant_paye) as montant_restant
+            FROM appels_de_fonds a
+            JOIN {schema}cotisations c ON c.appel_id = a.id
+            JOIN adherents ad ON ad.id = c.adherent_id
+            WHERE a.annee = ? AND c.statut != 'paye'
+            GROUP BY ad.id
+            ORDER BY ad.nom, ad.prenom
+        """
+        for row in Archives.iter_annee(annee, query, (annee,)):
+            yield dict(row,
+                       montant_du=Money.from_db(row['montant_du']),
+                       montant_paye=Money.from_db(row['montant_paye']),
+                       montant_restant=Money.from_db(row['montant_restant']))
+
+    @staticmethod
+    def get_resume_adherents(annee):
+        """
+        Resume par adherent : cotisations des appels de l'annee et paiements
+        dates de l'annee (adherents actifs, et inactifs concernes par l'annee).
+        Les deux groupes de colonnes n'ont pas le meme perimetre (voir
+        perimetres()) : total_verse n'est pas comparable a total_paye.
+
+        Args:
+            annee: Numero de l'annee
+
+        Returns:
+            Generateur de dictionnaires (id, nom, prenom, actif, statut ;
+            PERIMETRE_COTISATIONS : nb_cotisations, nb_paye, nb_partiel,
+            nb_non_paye, total_du, total_paye, reste_a_payer ;
+            PERIMETRE_PAIEMENTS : nb_paiements, total_verse, dernier_paiement),
+            par nom
+        """
+        query = """
+            SELECT ad.id, ad.nom, ad.prenom, ad.actif,
+                   COALESCE(c.nb_cotisations, 0) as nb_cotisations,
+                   COALESCE(c.nb_paye, 0) as nb_paye,
+                   COALESCE(c.nb_partiel, 0) as nb_partiel,
+                   COALESCE(c.nb_non_paye, 0) as nb_non_paye,
+                   COALESCE(c.total_du, 0) as total_du,
+                   COALESCE(c.total_paye, 0) as total_paye,
+                   COALESCE(p.nb_paiements, 0) as nb_paiements,
+                   COALESCE(p.total_verse, 0) as total_verse,
+                   p.dernier_paiement
+            FROM adherents ad
+            LEFT JOIN (
+                SELECT c.adherent_id,
+                       COUNT(*) as nb_cotisations,
+                       SUM(CASE WHEN c.statut = 'paye' THEN 1 ELSE 0 END) as nb_paye,
+                       SUM(CASE WHEN c.statut = 'partiel' THEN 1 ELSE 0 END) as nb_partiel,
+                       SUM(CASE WHEN c.statut = 'non_paye' THEN 1 ELSE 0 END) as nb_non_paye,
+                       SUM(c.montant_du) as total_du,
+                       SUM(c.montant_paye) as total_paye
+                FROM {schema}cotisations c
+                JOIN appels_de_fonds a ON a.id = c.appel_id
+                WHERE a.annee = ?
+                GROUP BY c.adherent_id
+            ) c ON c.adherent_id = ad.id
+            LEFT JOIN (
+                SELECT adherent_id,
+                       COUNT(*) as nb_paiements,
+                       SUM(montant) as total_verse,
+                       MAX(date_paiement) as dernier_paiement
+                FROM {schema}contributions
+                WHERE date_paiement >= ? AND date_paiement < ?
+                GROUP BY adherent_id
+            ) p ON p.adherent_id = ad.id
+            WHERE ad.actif = 1 OR c.adherent_id IS NOT NULL OR p.adherent_id IS NOT NULL
+            ORDER BY ad.nom, ad.prenom
+        """
+        params = (annee,) + ContributionService._periode(annee)
+        for row in Archives.iter_annee(annee, query, params):
+            total_du = Money.from_db(row['total_du'])
+            total_paye = Money.from_db(row['total_paye'])
+            if not row['nb_cotisations']:
+                statut = 'aucune'
+            elif row['nb_paye'] == row['nb_cotisations']:
+                statut = 'paye'
+            elif total_paye > 0:
+                statut = 'partiel'
+            else:
+                statut = 'non_paye'
+            yield dict(row,
+                       total_du=total_du,
+                       total_paye=total_paye,
+                       reste_a_payer=total_du - total_paye,
+                       total_verse=Money.from_db(row['total_verse']),
+                       statut=statut)
+
+    @staticmethod
+    def get_statistiques_paiements(annee):
+        """
+        Statistiques des paiements et du recouvrement d'une annee
+
+        Args:
+            annee: Numero de l'annee
+
+        Returns:
+            Dictionnaire :
+            - perimetre_paiements (PERIMETRE_PAIEMENTS), periode_paiements
+              (debut inclus, fin exclue) : nb_paiements, total_paiements,
+              montant_moyen, par_mode {mode: {'nombre', 'total'}}, par_type
+            - perimetre_cotisations (PERIMETRE_COTISATIONS) : nb_cotisations,
+              nb_paye, nb_partiel, nb_non_paye, nb_adherents_non_payes,
+              total_attendu, total_paye, reste_a_payer, taux_recouvrement
+            total_paiements et total_paye ne portent pas sur les memes paiements.
+        """
+        # Paiements dates de l'annee, groupes par mode et type
+        query = """
+            SELECT COALESCE(mode_paiement, 'Non precise') as mode,
+                   type_paiement,
+                   COUNT(*) as nombre,
+                   SUM(montant) as total
+            FROM {schema}contributions
+            WHERE date_paiement >= ? AND date_paiement < ?
+            GROUP BY mode, type_paiement
+        """
+        par_mode, par_type = {}, {}
+        nb_paiements, total_paiements = 0, Money(0)
+        for row in Archives.iter_annee(annee, query, ContributionService._periode(annee)):
+            total = Money.from_db(row['total'])
+            for groupe, cle in ((par_mode, row['mode']), (par_type, row['type_paiement'])):
+                cumul = groupe.setdefault(cle, {'nombre': 0, 'total': Money(0)})
+                cumul['nombre'] += row['nombre']
+                cumul['total'] += total
+            nb_paiements += row['nombre']
+            total_paiements += total
+
+        # Cotisations des appels de l'annee
+        query = """
+            SELECT COUNT(c.id) as nb_cotisations,
+                   SUM(CASE WHEN c.statut = 'paye' THEN 1 ELSE 0 END) as nb_paye,
+                   SUM(CASE WHEN c.statut = 'partiel' THEN 1 ELSE 0 END) as nb_partiel,
+                   SUM(CASE WHEN c.statut = 'non_paye' THEN 1 ELSE 0 END) as nb_non_paye,
+                   COUNT(DISTINCT CASE WHEN c.statut != 'paye' THEN c.adherent_id END)
+                       as nb_adherents_non_payes,
+                   COALESCE(SUM(c.montant_du), 0) as total_attendu,
+                   COALESCE(SUM(c.montant_paye), 0) as total_paye
+            FROM {schema}cotisations c
+            JOIN appels_de_fonds a ON a.id = c.appel_id
+            WHERE a.annee = ?
+        """
+        row = list(Archives.iter_annee(annee, query, (annee,)))[0]
+        total_attendu = Money.from_db(row['total_attendu'])
+        total_paye = Money.from_db(row['total_paye'])
+
+        perimetres = ContributionService.perimetres(annee)
+        return {
+            'perimetre_paiements': perimetres['paiements'],
+            'periode_paiements': ContributionService._periode(annee),
+            'nb_paiements': nb_paiements,
+            'total_paiements': total_paiements,
+            'montant_moyen': total_paiements / nb_paiements if nb_paiements else Money(0),
+            'par_mode': par_mode,
+            'par_type': par_type,
+            'perimetre_cotisations': perimetres['cotisations'],
+            'nb_cotisations': row['nb_cotisations'],
+            'nb_paye': row['nb_paye'] or 0,
+            'nb_partiel': row['nb_partiel'] or 0,
+            'nb_non_paye': row['nb_non_paye'] or 0,
+            'nb_adherents_non_payes': row['nb_adherents_non_payes'],
+            'total_attendu': total_attendu,
+            'total_paye': total_paye,
+            'reste_a_payer': total_attendu - total_paye,
+            'taux_recouvrement': (total_paye / total_attendu * 100) if total_attendu > 0 else 0
+        }
@@ -4,7 +4,9 @@ Logique metier pour les depenses (deces)
 """
 from models.depense import Depense
 from models.annee import Annee
+from models.money import Money
 from database.db_manager import DatabaseManager
+from database.archives import Archives
 from config import CURRENCY_SYMBOL
 
 
@@ -13,42 +15,39 @@ class DepenseService:
 
     @staticmethod
     def get_total_depenses(annee_id):
-        """Calcule le total des depenses pour une annee"""
+        """Calcule le total des depenses pour une annee (archivee ou non)"""
         db = DatabaseManager()
         query = """
-            SELECT COALESCE(SUM(montant), 0) as total
-            FROM depenses
-            WHERE annee_id = ?
+            SELECT (SELECT COALESCE(SUM(montant), 0) FROM depenses WHERE annee_id = ?)
+                 + (SELECT COALESCE(SUM(total_depenses), 0) FROM archives_annees
+                    WHERE annee_id = ?) as total
         """
-        row = db.fetch_one(query, (annee_id,))
-        return row['total'] if row else 0
+        row = db.fetch_one(query, (annee_id, annee_id))
+        return Money.from_db(row['total'] if row else 0)
 
     @staticmethod
     def get_nombre_deces(annee_id):
-        """Compte le nombre de deces pour une annee"""
+        """Compte le nombre de deces pour une annee (archivee ou non)"""
         db = DatabaseManager()
         query = """
-            SELECT COUNT(*) as nombre
-            FROM depenses
-            WHERE annee_id = ?
+            SELECT (SELECT COUNT(*) FROM depenses WHERE annee_id = ?)
+                 + (SELECT COALESCE(SUM(nb_depenses), 0) FROM archives_annees
+                    WHERE annee_id = ?) as nombre
         """
-        row = db.fetch_one(query, (annee_id,))
+        row = db.fetch_one(query, (annee_id, annee_id))
         return row['nombre'] if row else 0
 
     @staticmethod
     def get_depenses_par_mois(annee_id):
-        """Recupere les depenses groupees par mois"""
+        """Recupere les depenses groupees par mois (agregats mensuels, annees archivees comprises)"""
         db = DatabaseManager()
-        query = """
-            SELECT strftime('%m', date_deces) as mois,
-                   COUNT(*) as nombre,
-                   SUM(montant) as total
-            FROM depenses
-            WHERE annee_id = ?
-            GROUP BY mois
+        rows = db.fetch_all("""
+            SELECT mois, nombre, total
+            FROM rollup_mensuel
+            WHERE annee = (SELECT annee FROM annees WHERE id = ?)
+              AND dimension = 'depenses' AND valeur = 'total'
             ORDER BY mois
-        """
-        rows = db.fetch_all(query, (annee_id,))
+        """, (annee_id,))
 
         mois_noms = [
             'Janvier', 'Fevrier', 'Mars', 'Avril', 'Mai', 'Juin',
@@ -57,14 +56,14 @@ class DepenseService:
 
         result = {}
         for i, nom in enumerate(mois_noms, 1):
-            result[nom] = {'nombre': 0, 'total': 0}
+            result[nom] = {'nombre': 0, 'total': Money(0)}
 
         for row in rows:
             mois_num = int(row['mois'])
             mois_nom = mois_noms[mois_num - 1]
             result[mois_nom] = {
                 'nombre': row['nombre'],
-                'total': row['total']
+                'total': Money.from_db(row['total'])
             }
 
         return result
@@ -108,7 +107,7 @@ class DepenseService:
         """Verifie si la balance de l'annee est suffisante"""
         annee = Annee.get_by_id(annee_id)
         if not annee:
-            return (False, 0, "Annee non trouvee")
+            return (False, Money(0), "Annee non trouvee")
 
         balance = annee.get_balance_actuelle()
 
@@ -124,22 +123,27 @@ class DepenseService:
 
     @staticmethod
     def get_depenses_adherent(adherent_id, annee_id=None):
-        """Recupere toutes les depenses liees a un adherent"""
+        """Recupere toutes les depenses liees a un adherent, annees archivees comprises"""
         db = DatabaseManager()
 
         if annee_id:
             query = """
-                SELECT * FROM depenses
+                SELECT * FROM {}
                 WHERE adherent_id = ? AND annee_id = ?
                 ORDER BY date_deces DESC
             """
-            rows = db.fetch_all(query, (adherent_id, annee_id))
+            params = (adherent_id, annee_id)
+            rows = db.fetch_all(query.format('depenses'), params)
+            if not rows:
+                rows = Depense._depuis_archive(annee_id, query, params)
         else:
             query = """
-                SELECT * FROM depenses
+                SELECT * FROM {}
                 WHERE adherent_id = ?
                 ORDER BY date_deces DESC
             """
-            rows = db.fetch_all(query, (adherent_id,))
+            rows = db.fetch_all(query.format('depenses'), (adherent_id,))
+            rows += Archives.fetch_all_adherent(
+                adherent_id, query.format('archive.depenses'), (adherent_id,))
 
         return [Depense._from_row(row) for row in rows]
@@ -0,0 +1,153 @@
+"""
+Bus d'evenements en memoire
+Les modeles publient un evenement type apres chaque modification de donnees ;
+les caches (PDF, vues Tkinter...) s'y abonnent pour se mettre a jour au lieu
+de tout recharger.
+
+Exemple:
+    from services.event_bus import bus, PaiementEnregistre
+    bus.abonner(PaiementEnregistre, lambda e: print(e.cotisation_id))
+"""
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class Evenement:
+    """Classe de base : s'abonner a Evenement recoit tous les evenements"""
+
+
+@dataclass(frozen=True)
+class ContributionCreee(Evenement):
+    contribution_id: int
+    adherent_id: int
+    cotisation_id: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class ContributionModifiee(Evenement):
+    contribution_id: int
+    adherent_id: int
+
+
+@dataclass(frozen=True)
+class ContributionSupprimee(Evenement):
+    contribution_id: int
+    adherent_id: int
+    cotisation_id: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class PaiementEnregistre(Evenement):
+    cotisation_id: int
+    contribution_id: int
+    adherent_id: int
+    appel_id: int
+
+
+@dataclass(frozen=True)
+class DepenseCreee(Evenement):
+    depense_id: int
+    annee_id: int
+    adherent_id: int
+
+
+@dataclass(frozen=True)
+class DepenseModifiee(Evenement):
+    depense_id: int
+    annee_id: int
+
+
+@dataclass(frozen=True)
+class DepenseSupprimee(Evenement):
+    depense_id: int
+    annee_id: int
+
+
+@dataclass(frozen=True)
+class AdherentCree(Evenement):
+    adherent_id: int
+
+
+@dataclass(frozen=True)
+class AdherentModifie(Evenement):
+    adherent_id: int
+    champs: tuple = ()
+
+
+@dataclass(frozen=True)
+class AdherentSupprime(Evenement):
+    adherent_id: int
+
+
+@dataclass(frozen=True)
+class AppelCree(Evenement):
+    appel_id: int
+    annee: int
+
+
+@dataclass(frozen=True)
+class AppelCloture(Evenement):
+    appel_id: int
+
+
+@dataclass(frozen=True)
+class AnneeActivee(Evenement):
+    annee_id: int
+
+
+class EventBus:
+    """Publication / abonnement synchrone, dans le processus courant"""
+
+    def __init__(self):
+        self._abonnes = {}
+        self._verrou = threading.Lock()
+
+    def abonner(self, type_evenement, callback):
+        """
+        Abonne un callback a un type d'evenement (et a ses sous-classes)
+
+        Args:
+            type_evenement: Classe d'evenement (Evenement pour tout recevoir)
+            callback: Fonction appelee avec l'evenement publie
+
+        Returns:
+            Le callback, pour pouvoir l'utiliser comme decorateur
+        """
+        with self._verrou:
+            abonnes = self._abonnes.setdefault(type_evenement, [])
+            if callback not in abonnes:
+                abonnes.append(callback)
+        return callback
+
+    def desabonner(self, type_evenement, callback):
+        """Retire un abonnement (sans erreur s'il n'existe pas)"""
+        with self._verrou:
+            abonnes = self._abonnes.get(type_evenement, [])
+            if callback in abonnes:
+                abonnes.remove(callback)
+
+    def publier(self, evenement):
+        """
+        Transmet l'evenement a tous les abonnes de son type et de ses parents.
+        Appele apres l'ecriture en base : l'erreur d'un abonne est signalee
+        mais n'annule pas la modification deja enregistree.
+        """
+        with self._verrou:
+            callbacks = [
+                callback
+                for type_evenement in type(evenement).__mro__
+                for callback in self._abonnes.get(type_evenement, ())
+            ]
+
+        for callback in callbacks:
+            try:
+                callback(evenement)
+            except Exception as e:
+                print(f"Erreur abonne {getattr(callback, '__qualname__', callback)} "
+                      f"sur {type(evenement).__name__}: {e}")
+
+
+# Bus partage par l'application
+bus = EventBus()
@@ -0,0 +1,132 @@
+"""
+Cache des PDF generes
+Chaque PDF est indexe par une empreinte du contenu de l'enregistrement et de
+la version des gabarits : redemander le PDF d'un enregistrement inchange
+renvoie le fichier deja genere au lieu de le recalculer.
+
+Les entrees sont retirees sur les evenements de modification publies par les
+modeles (services.event_bus). Un processus qui n'a pas charge ce module ne
+les retire pas, mais l'empreinte verifiee par get() ecarte alors l'entree.
+"""
+import hashlib
+import json
+import os
+import threading
+from config import PDF_OUTPUT_DIR
+from services.event_bus import (bus, ContributionModifiee, ContributionSupprimee,
+                                DepenseModifiee, DepenseSupprimee)
+
+
+class PdfCache:
+    """Index persistant (type, id) -> (empreinte, chemin du PDF)"""
+
+    _verrou = threading.Lock()
+    _index = None
+    _index_mtime = None
+
+    @staticmethod
+    def _chemin_index():
+        """Chemin du fichier d'index, a la racine du dossier des PDF"""
+        return os.path.join(PDF_OUTPUT_DIR, '.cache', 'index.json')
+
+    @staticmethod
+    def _cle(type_enregistrement, enregistrement_id):
+        return f"{type_enregistrement}:{enregistrement_id}"
+
+    @staticmethod
+    def _charger():
+        """Charge l'index depuis le disque s'il a change (autre processus)"""
+        chemin = PdfCache._chemin_index()
+        try:
+            mtime = os.path.getmtime(chemin)
+        except OSError:
+            mtime = None
+
+        if PdfCache._index is None or mtime != PdfCache._index_mtime:
+            index = {}
+            if mtime is not None:
+                try:
+                    with open(chemin, 'r', encoding='utf-8') as f:
+                        index = json.load(f)
+                except (OSError, ValueError):
+                    index = {}
+            PdfCache._index = index
+            PdfCache._index_mtime = mtime
+        return PdfCache._index
+
+    @staticmethod
+    def _sauvegarder():
+        """Ecrit l'index de facon atomique"""
+        chemin = PdfCache._chemin_index()
+        os.makedirs(os.path.dirname(chemin), exist_ok=True)
+        temporaire = f"{chemin}.{os.getpid()}.tmp"
+        with open(temporaire, 'w', encoding='utf-8') as f:
+            json.dump(PdfCache._index, f, indent=1, sort_keys=True)
+        os.replace(temporaire, chemin)
+        PdfCache._index_mtime = os.path.getmtime(chemin)
+
+    @staticmethod
+    def empreinte(version, *donnees):
+        """
+        Calcule l'empreinte du contenu d'un PDF
+
+        Args:
+            version: Version des gabarits PDF
+            donnees: Dictionnaires decrivant le contenu (enregistrement, adherent...)
+
+        Returns:
+            Empreinte SHA-256 hexadecimale
+        """
+        contenu = json.dumps([version, donnees], sort_keys=True, default=str)
+        return hashlib.sha256(contenu.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def get(type_enregistrement, enregistrement_id, empreinte):
+        """
+        Retourne le chemin du PDF en cache s'il correspond a l'empreinte
+
+        Returns:
+            Chemin du fichier existant, ou None
+        """
+        with PdfCache._verrou:
+            entree = PdfCache._charger().get(
+                PdfCache._cle(type_enregistrement, enregistrement_id)
+            )
+        if not entree or entree.get('empreinte') != empreinte:
+            return None
+        if not os.path.exists(entree.get('chemin', '')):
+            return None
+        return entree['chemin']
+
+    @staticmethod
+    def put(type_enregistrement, enregistrement_id, empreinte, chemin):
+        """Enregistre le PDF genere pour cet enregistrement"""
+        with PdfCache._verrou:
+            index = PdfCache._charger()
+            index[PdfCache._cle(type_enregistrement, enregistrement_id)] = {
+                'empreinte': empreinte,
+                'chemin': chemin
+            }
+            PdfCache._sauvegarder()
+
+    @staticmethod
+    def invalider(type_enregistrement, enregistrement_id):
+        """
+        Retire l'enregistrement du cache (apres modification ou suppression).
+        Le fichier deja genere reste dans l'historique des PDF.
+        """
+        with PdfCache._verrou:
+            index = PdfCache._charger()
+            cle = PdfCache._cle(type_enregistrement, enregistrement_id)
+            if cle in index:
+                del index[cle]
+                PdfCache._sauvegarder()
+
+
+# Le recu ou la fiche en cache ne correspond plus a l'enregistrement
+bus.abonner(ContributionModifiee,
+            lambda e: PdfCache.invalider('contribution', e.contribution_id))
+bus.abonner(ContributionSupprimee,
+            lambda e: PdfCache.invalider('contribution', e.contribution_id))
+bus.abonner(DepenseModifiee, lambda e: PdfCache.invalider('depense', e.depense_id))
+bus.abonner(DepenseSupprimee, lambda e: PdfCache.invalider('depense', e.depense_id))
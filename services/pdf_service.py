@@ -9,12 +9,196 @@ from reportlab.lib.units import cm
 from reportlab.lib import colors
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.pdfbase import pdfmetrics
 from config import PDF_OUTPUT_DIR, POSTES_DEPENSES, CURRENCY_SYMBOL, ADMIN_IDS
+from services.pdf_cache import PdfCache
+
+
+# Version des gabarits : a incrementer a chaque changement de mise en page
+# (invalide tous les PDF en cache)
+TEMPLATE_VERSION = 1
+
+# Polices utilisees par les gabarits (pre-chargees par le renderer)
+POLICES = ('Helvetica', 'Helvetica-Bold')
+
+# Caches module des styles (construits une seule fois par processus)
+_styles_cache = None
+_styles_tables_cache = None
+
+
+def _construire_styles():
+    """Construit la feuille de styles des PDF (sans cache)"""
+    styles = getSampleStyleSheet()
+
+    styles.add(ParagraphStyle(
+        name='TitrePrincipal',
+        parent=styles['Heading1'],
+        fontSize=16,
+        spaceAfter=6
+    ))
+
+    styles.add(ParagraphStyle(
+        name='SousTitre',
+        parent=styles['Heading2'],
+        fontSize=12,
+        spaceBefore=12,
+        spaceAfter=6
+    ))
+
+    styles.add(ParagraphStyle(
+        name='Info',
+        parent=styles['Normal'],
+        fontSize=10,
+        spaceBefore=2,
+        spaceAfter=2
+    ))
+
+    styles.add(ParagraphStyle(
+        name='PiedPage',
+        parent=styles['Normal'],
+        fontSize=8,
+        textColor=colors.grey
+    ))
+
+    return styles
+
+
+def _construire_styles_tables():
+    """Construit les gabarits de TableStyle partages par les documents (sans cache)"""
+    return {
+        # Tableau cle / valeur (infos deces, infos adherent)
+        'infos': TableStyle([
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('TOPPADDING', (0, 0), (-1, -1), 3),
+        ]),
+        # Tableau cle / valeur avec le montant (premiere ligne) en evidence
+        'paiement': TableStyle([
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('TOPPADDING', (0, 0), (-1, -1), 3),
+            # Mettre le montant en gras
+            ('FONTNAME', (1, 0), (1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (1, 0), (1, 0), 12),
+        ]),
+        # Detail des frais d'une depense (entete + lignes + total)
+        'frais': TableStyle([
+            # Entete
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2C3E50')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+            # Corps
+            ('FONTNAME', (0, 1), (0, -2), 'Helvetica'),
+            ('FONTNAME', (1, 1), (1, -2), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('TOPPADDING', (0, 0), (-1, -1), 6),
+            # Ligne total
+            ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#ECF0F1')),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            # Bordures
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#BDC3C7')),
+        ]),
+        # Liste des impayes (entete + lignes + total)
+        'impayes': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2C3E50')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('ALIGN', (2, 0), (3, -1), 'CENTER'),
+            ('ALIGN', (3, 1), (3, -1), 'RIGHT'),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('TOPPADDING', (0, 0), (-1, -1), 6),
+            ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#ECF0F1')),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#BDC3C7')),
+        ]),
+    }
+
+
+class PdfRenderer:
+    """
+    Moteur de rendu PDF pre-chauffe, reutilisable d'un document a l'autre.
+
+    Les styles de paragraphe, les gabarits de tableaux et les metriques de
+    polices sont prepares une seule fois a la construction.
+    """
+
+    def __init__(self, utiliser_cache=True):
+        if utiliser_cache:
+            self.styles = PdfService._get_styles()
+            self.styles_tables = PdfService._get_styles_tables()
+        else:
+            self.styles = _construire_styles()
+            self.styles_tables = _construire_styles_tables()
+
+        # Charger les metriques des polices standard
+        for police in POLICES:
+            pdfmetrics.getFont(police)
+
+    def document(self, chemin):
+        """Cree le document A4 avec les marges standard"""
+        return SimpleDocTemplate(
+            chemin,
+            pagesize=A4,
+            rightMargin=2 * cm,
+            leftMargin=2 * cm,
+            topMargin=2 * cm,
+            bottomMargin=2 * cm
+        )
+
+    def table(self, donnees, col_widths, gabarit, lignes_alternees=False):
+        """
+        Cree un tableau a partir d'un gabarit de style partage
+
+        Args:
+            donnees: Lignes du tableau
+            col_widths: Largeurs des colonnes
+            gabarit: Nom du gabarit ('infos', 'paiement', 'frais', 'impayes')
+            lignes_alternees: Colorer une ligne sur deux (hors entete et total)
+
+        Returns:
+            Table reportlab stylee
+        """
+        table = Table(donnees, colWidths=col_widths)
+        table.setStyle(self.styles_tables[gabarit])
+        if lignes_alternees:
+            table.setStyle(TableStyle([
+                ('BACKGROUND', (0, i), (-1, i), colors.HexColor('#F2F3F4'))
+                for i in range(2, len(donnees) - 1, 2)
+            ]))
+        return table
+
+    def entete(self, titre):
+        """Elements de titre et date de generation communs a tous les PDF"""
+        return [
+            Paragraph(titre, self.styles['TitrePrincipal']),
+            Paragraph(
+                f"Genere le {datetime.now().strftime('%d/%m/%Y a %H:%M')}",
+                self.styles['PiedPage']
+            ),
+            Spacer(1, 0.5 * cm),
+        ]
+
+    def build(self, chemin, elements):
+        """Genere le fichier PDF"""
+        self.document(chemin).build(elements)
+        return chemin
 
 
 class PdfService:
     """Service pour la generation de PDF"""
 
+    # Renderer partage entre les documents (voir get_renderer)
+    _renderer = None
+
     @staticmethod
     def _formater_montant(montant):
         """Formate un montant avec separateurs et devise"""
@@ -56,40 +240,26 @@ class PdfService:
 
     @staticmethod
     def _get_styles():
-        """Retourne les styles pour le PDF"""
-        styles = getSampleStyleSheet()
-
-        styles.add(ParagraphStyle(
-            name='TitrePrincipal',
-            parent=styles['Heading1'],
-            fontSize=16,
-            spaceAfter=6
-        ))
-
-        styles.add(ParagraphStyle(
-            name='SousTitre',
-            parent=styles['Heading2'],
-            fontSize=12,
-            spaceBefore=12,
-            spaceAfter=6
-        ))
-
-        styles.add(ParagraphStyle(
-            name='Info',
-            parent=styles['Normal'],
-            fontSize=10,
-            spaceBefore=2,
-            spaceAfter=2
-        ))
-
-        styles.add(ParagraphStyle(
-            name='PiedPage',
-            parent=styles['Normal'],
-            fontSize=8,
-            textColor=colors.grey
-        ))
-
-        return styles
+        """Retourne les styles pour le PDF (construits une fois par processus)"""
+        global _styles_cache
+        if _styles_cache is None:
+            _styles_cache = _construire_styles()
+        return _styles_cache
+
+    @staticmethod
+    def _get_styles_tables():
+        """Retourne les gabarits de tableaux (construits une fois par processus)"""
+        global _styles_tables_cache
+        if _styles_tables_cache is None:
+            _styles_tables_cache = _construire_styles_tables()
+        return _styles_tables_cache
+
+    @staticmethod
+    def get_renderer():
+        """Retourne le renderer partage, cree et pre-chauffe au premier appel"""
+        if PdfService._renderer is None:
+            PdfService._renderer = PdfRenderer()
+        return PdfService._renderer
 
     @staticmethod
     def generer_pdf_depense(depense):
@@ -102,6 +272,19 @@ class PdfService:
         Returns:
             Chemin du fichier PDF genere
         """
+        # Recuperer les infos
+        adherent = depense.get_adherent()
+        nom_defunt = depense.get_nom_defunt()
+
+        # PDF deja genere pour ce contenu ?
+        empreinte = PdfCache.empreinte(
+            TEMPLATE_VERSION, depense.to_dict(), nom_defunt,
+            adherent.to_dict() if adherent else None
+        )
+        chemin = PdfCache.get('depense', depense.id, empreinte)
+        if chemin:
+            return chemin
+
         # Creer le dossier
         dossier = os.path.join(PDF_OUTPUT_DIR, 'depenses')
         os.makedirs(dossier, exist_ok=True)
@@ -111,30 +294,9 @@ class PdfService:
         nom_fichier = f"depense_{date_fichier}.pdf"
         chemin = PdfService._chemin_unique(os.path.join(dossier, nom_fichier))
 
-        # Recuperer les infos
-        adherent = depense.get_adherent()
-        nom_defunt = depense.get_nom_defunt()
-
-        # Creer le document
-        doc = SimpleDocTemplate(
-            chemin,
-            pagesize=A4,
-            rightMargin=2 * cm,
-            leftMargin=2 * cm,
-            topMargin=2 * cm,
-            bottomMargin=2 * cm
-        )
-
-        styles = PdfService._get_styles()
-        elements = []
-
-        # Titre
-        elements.append(Paragraph("Rapport de depense - Deces", styles['TitrePrincipal']))
-        elements.append(Paragraph(
-            f"Genere le {datetime.now().strftime('%d/%m/%Y a %H:%M')}",
-            styles['PiedPage']
-        ))
-        elements.append(Spacer(1, 0.5 * cm))
+        renderer = PdfService.get_renderer()
+        styles = renderer.styles
+        elements = renderer.entete("Rapport de depense - Deces")
 
         # Section 1 : Informations sur le deces
         elements.append(Paragraph("Informations sur le deces", styles['SousTitre']))
@@ -158,16 +320,7 @@ class PdfService:
         if depense.pays_destination:
             infos_deces.append(["Pays de destination", depense.pays_destination])
 
-        table_infos = Table(infos_deces, colWidths=[5 * cm, 10 * cm])
-        table_infos.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ('TOPPADDING', (0, 0), (-1, -1), 3),
-        ]))
-        elements.append(table_infos)
+        elements.append(renderer.table(infos_deces, [5 * cm, 10 * cm], 'infos'))
         elements.append(Spacer(1, 0.5 * cm))
 
         # Section 2 : Detail des frais
@@ -183,30 +336,8 @@ class PdfService:
         # Ligne total
         donnees_frais.append(["TOTAL", PdfService._formater_montant(depense.montant)])
 
-        table_frais = Table(donnees_frais, colWidths=[8 * cm, 7 * cm])
-        table_frais.setStyle(TableStyle([
-            # Entete
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2C3E50')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-            # Corps
-            ('FONTNAME', (0, 1), (0, -2), 'Helvetica'),
-            ('FONTNAME', (1, 1), (1, -2), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ('TOPPADDING', (0, 0), (-1, -1), 6),
-            # Lignes alternees
-            *[('BACKGROUND', (0, i), (-1, i), colors.HexColor('#F2F3F4'))
-              for i in range(2, len(donnees_frais) - 1, 2)],
-            # Ligne total
-            ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#ECF0F1')),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            # Bordures
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#BDC3C7')),
-        ]))
-        elements.append(table_frais)
+        elements.append(renderer.table(donnees_frais, [8 * cm, 7 * cm], 'frais',
+                                       lignes_alternees=True))
 
         # Notes
         if depense.notes:
@@ -215,8 +346,8 @@ class PdfService:
             elements.append(Paragraph(depense.notes, styles['Info']))
 
         # Generer le PDF
-        doc.build(elements)
-
+        renderer.build(chemin, elements)
+        PdfCache.put('depense', depense.id, empreinte, chemin)
         return chemin
 
     @staticmethod
@@ -233,6 +364,15 @@ class PdfService:
         # Recuperer l'adherent
         adherent = contribution.get_adherent()
 
+        # PDF deja genere pour ce contenu ?
+        empreinte = PdfCache.empreinte(
+            TEMPLATE_VERSION, contribution.to_dict(), adherent.to_dict(),
+            ADMIN_IDS.get(contribution.admin_id)
+        )
+        chemin = PdfCache.get('contribution', contribution.id, empreinte)
+        if chemin:
+            return chemin
+
         # Creer le sous-dossier par adherent
         nom_dossier = f"{adherent.id}_{adherent.nom}_{adherent.prenom}"
         dossier = os.path.join(PDF_OUTPUT_DIR, 'paiements', nom_dossier)
@@ -243,26 +383,9 @@ class PdfService:
         nom_fichier = f"paiement_{date_jour}.pdf"
         chemin = PdfService._chemin_unique(os.path.join(dossier, nom_fichier))
 
-        # Creer le document
-        doc = SimpleDocTemplate(
-            chemin,
-            pagesize=A4,
-            rightMargin=2 * cm,
-            leftMargin=2 * cm,
-            topMargin=2 * cm,
-            bottomMargin=2 * cm
-        )
-
-        styles = PdfService._get_styles()
-        elements = []
-
-        # Titre
-        elements.append(Paragraph("Recu de paiement", styles['TitrePrincipal']))
-        elements.append(Paragraph(
-            f"Genere le {datetime.now().strftime('%d/%m/%Y a %H:%M')}",
-            styles['PiedPage']
-        ))
-        elements.append(Spacer(1, 0.5 * cm))
+        renderer = PdfService.get_renderer()
+        styles = renderer.styles
+        elements = renderer.entete("Recu de paiement")
 
         # Section : Informations adherent
         elements.append(Paragraph("Informations adherent", styles['SousTitre']))
@@ -275,15 +398,7 @@ class PdfService:
         if adherent.telephone:
             infos_adherent.append(["Telephone", adherent.telephone])
 
-        table_adherent = Table(infos_adherent, colWidths=[5 * cm, 10 * cm])
-        table_adherent.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ('TOPPADDING', (0, 0), (-1, -1), 3),
-        ]))
-        elements.append(table_adherent)
+        elements.append(renderer.table(infos_adherent, [5 * cm, 10 * cm], 'infos'))
         elements.append(Spacer(1, 0.5 * cm))
 
         # Section : Details du paiement
@@ -302,18 +417,7 @@ class PdfService:
         if contribution.reference_paiement:
             infos_paiement.insert(3, ["Reference", contribution.reference_paiement])
 
-        table_paiement = Table(infos_paiement, colWidths=[5 * cm, 10 * cm])
-        table_paiement.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ('TOPPADDING', (0, 0), (-1, -1), 3),
-            # Mettre le montant en gras
-            ('FONTNAME', (1, 0), (1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (1, 0), (1, 0), 12),
-        ]))
-        elements.append(table_paiement)
+        elements.append(renderer.table(infos_paiement, [5 * cm, 10 * cm], 'paiement'))
 
         # Notes
         if contribution.notes:
@@ -322,8 +426,8 @@ class PdfService:
             elements.append(Paragraph(contribution.notes, styles['Info']))
 
         # Generer le PDF
-        doc.build(elements)
-
+        renderer.build(chemin, elements)
+        PdfCache.put('contribution', contribution.id, empreinte, chemin)
         return chemin
 
     @staticmethod
@@ -344,24 +448,9 @@ class PdfService:
         nom_fichier = f"impayes_{date_jour}.pdf"
         chemin = PdfService._chemin_unique(os.path.join(dossier, nom_fichier))
 
-        doc = SimpleDocTemplate(
-            chemin,
-            pagesize=A4,
-            rightMargin=2 * cm,
-            leftMargin=2 * cm,
-            topMargin=2 * cm,
-            bottomMargin=2 * cm
-        )
-
-        styles = PdfService._get_styles()
-        elements = []
-
-        elements.append(Paragraph("Liste des adherents avec cotisations impayees", styles['TitrePrincipal']))
-        elements.append(Paragraph(
-            f"Genere le {datetime.now().strftime('%d/%m/%Y a %H:%M')}",
-            styles['PiedPage']
-        ))
-        elements.append(Spacer(1, 0.5 * cm))
+        renderer = PdfService.get_renderer()
+        styles = renderer.styles
+        elements = renderer.entete("Liste des adherents avec cotisations impayees")
 
         if not lignes:
             elements.append(Paragraph("Aucun adherent avec cotisation impayee.", styles['Info']))
@@ -379,23 +468,7 @@ class PdfService:
                 ])
             donnees.append(["", "TOTAL", "", PdfService._formater_montant(total_restant)])
 
-            table = Table(donnees, colWidths=[4 * cm, 4 * cm, 4 * cm, 5 * cm])
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2C3E50')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('ALIGN', (2, 0), (3, -1), 'CENTER'),
-                ('ALIGN', (3, 1), (3, -1), 'RIGHT'),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-                ('TOPPADDING', (0, 0), (-1, -1), 6),
-                *[('BACKGROUND', (0, i), (-1, i), colors.HexColor('#F2F3F4'))
-                  for i in range(2, len(donnees) - 1, 2)],
-                ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#ECF0F1')),
-                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#BDC3C7')),
-            ]))
-            elements.append(table)
+            elements.append(renderer.table(donnees, [4 * cm, 4 * cm, 4 * cm, 5 * cm],
+                                           'impayes', lignes_alternees=True))
 
-        doc.build(elements)
-        return chemin
+        return renderer.build(chemin, elements)
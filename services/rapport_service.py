@@ -35,13 +35,13 @@ class RapportService:
         stats = StatistiqueService.get_statistiques_dashboard(annee_id)
 
         # Tous les paiements de l'annee
-        contributions = Contribution.get_all_for_year(annee.annee)
+        contributions = list(Contribution.get_all_for_year(annee.annee))
 
         # Depenses
         depenses = Depense.get_all_for_annee(annee_id)
 
         # Adherents non payes
-        non_payes = ContributionService.get_adherents_non_payes(annee.annee)
+        non_payes = list(ContributionService.get_adherents_non_payes(annee.annee))
 
         return {
             'annee': annee,
@@ -99,7 +99,7 @@ class RapportService:
             raise ValueError(f"Annee avec ID {annee_id} non trouvee")
 
         # Resume par adherent
-        resume = ContributionService.get_resume_adherents(annee.annee)
+        resume = list(ContributionService.get_resume_adherents(annee.annee))
 
         # Statistiques
         stats = ContributionService.get_statistiques_paiements(annee.annee)
@@ -107,6 +107,9 @@ class RapportService:
         return {
             'annee': annee,
             'resume_adherents': resume,
+            # total_verse (paiements dates de l'annee) et total_paye (appels de
+            # l'annee) : libelles a afficher en tete des colonnes
+            'perimetres': ContributionService.perimetres(annee.annee),
             'statistiques': stats,
             'date_generation': datetime.now().strftime('%d/%m/%Y %H:%M')
         }
@@ -209,7 +212,7 @@ class RapportService:
             raise ValueError(f"Annee avec ID {annee_id} non trouvee")
 
         # Adherents non payes
-        non_payes = ContributionService.get_adherents_non_payes(annee.annee)
+        non_payes = list(ContributionService.get_adherents_non_payes(annee.annee))
 
         return {
             'annee': annee,
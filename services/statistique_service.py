@@ -5,6 +5,7 @@ Logique metier pour les statistiques et calculs (base sur appels/cotisations)
 from models.adherent import Adherent
 from models.appel import AppelDeFonds
 from models.cotisation import Cotisation
+from models.money import Money
 from services.depense_service import DepenseService
 from database.db_manager import DatabaseManager
 from config import CURRENCY_SYMBOL
@@ -14,13 +15,20 @@ class StatistiqueService:
     """Service pour le calcul des statistiques"""
 
     @staticmethod
-    def get_statistiques_dashboard():
+    def get_statistiques_dashboard(annee_id=None):
         """
         Recupere toutes les statistiques pour le tableau de bord
 
+        Args:
+            annee_id: Limiter les montants aux appels de fonds et depenses de
+                      cette annee (rapports annuels) ; defaut: toutes les annees
+
         Returns:
             Dictionnaire avec toutes les statistiques
         """
+        if annee_id is not None:
+            return StatistiqueService._statistiques_annee(annee_id)
+
         db = DatabaseManager()
 
         # Nombre d'adherents actifs
@@ -31,31 +39,32 @@ class StatistiqueService:
         appels_ouverts = AppelDeFonds.get_ouverts()
         nb_appels_ouverts = len(appels_ouverts)
 
-        # Total collecte (toutes cotisations confondues)
+        # Total collecte (toutes cotisations confondues, annees archivees comprises)
         row = db.fetch_one("""
-            SELECT COALESCE(SUM(montant_paye), 0) as total
-            FROM cotisations
+            SELECT (SELECT COALESCE(SUM(montant_paye), 0) FROM cotisations)
+                 + (SELECT COALESCE(SUM(total_collecte), 0) FROM archives_annees) as total
         """)
-        total_collecte = row['total'] if row else 0
+        total_collecte = Money.from_db(row['total'] if row else 0)
 
         # Total depenses (toutes annees)
         row = db.fetch_one("""
-            SELECT COALESCE(SUM(montant), 0) as total
-            FROM depenses
+            SELECT (SELECT COALESCE(SUM(montant), 0) FROM depenses)
+                 + (SELECT COALESCE(SUM(total_depenses), 0) FROM archives_annees) as total
         """)
-        total_depenses = row['total'] if row else 0
+        total_depenses = Money.from_db(row['total'] if row else 0)
 
         # Balance globale
         balance_globale = total_collecte - total_depenses
 
         # Taux de recouvrement global
         row = db.fetch_one("""
-            SELECT COALESCE(SUM(montant_du), 0) as total_attendu,
-                   COALESCE(SUM(montant_paye), 0) as total_paye
-            FROM cotisations
+            SELECT (SELECT COALESCE(SUM(montant_du), 0) FROM cotisations)
+                 + (SELECT COALESCE(SUM(total_attendu), 0) FROM archives_annees) as total_attendu,
+                   (SELECT COALESCE(SUM(montant_paye), 0) FROM cotisations)
+                 + (SELECT COALESCE(SUM(total_collecte), 0) FROM archives_annees) as total_paye
         """)
-        total_attendu = row['total_attendu'] if row else 0
-        total_paye = row['total_paye'] if row else 0
+        total_attendu = Money.from_db(row['total_attendu'] if row else 0)
+        total_paye = Money.from_db(row['total_paye'] if row else 0)
         taux_recouvrement = (total_paye / total_attendu * 100) if total_attendu > 0 else 0
 
         # Nombre de cotisations impayees
@@ -76,6 +85,106 @@ class StatistiqueService:
             'nb_cotisations_impayees': nb_cotisations_impayees
         }
 
+    @staticmethod
+    def _statistiques_annee(annee_id):
+        """Statistiques du tableau de bord pour une seule annee (memes cles, plus annee et nombre_deces)"""
+        from models.annee import Annee
+
+        annee = Annee.get_by_id(annee_id)
+        if not annee:
+            return None
+        db = DatabaseManager()
+
+        row = db.fetch_one("""
+            SELECT COUNT(c.id) as nb_cotisations,
+                   COALESCE(SUM(c.montant_du), 0) as total_attendu,
+                   COALESCE(SUM(c.montant_paye), 0) as total_collecte,
+                   SUM(CASE WHEN c.statut != 'paye' THEN 1 ELSE 0 END) as nb_impayees,
+                   (SELECT COUNT(*) FROM appels_de_fonds WHERE annee = :annee AND cloture = 0)
+                       as nb_appels_ouverts,
+                   (SELECT COUNT(*) FROM adherents WHERE actif = 1) as nb_adherents_actifs,
+                   (SELECT COALESCE(SUM(total_attendu), 0) FROM archives_annees
+                    WHERE annee = :annee) as archive_attendu,
+                   (SELECT COALESCE(SUM(total_collecte), 0) FROM archives_annees
+                    WHERE annee = :annee) as archive_collecte
+            FROM appels_de_fonds a
+            JOIN cotisations c ON c.appel_id = a.id
+            WHERE a.annee = :annee
+        """, {'annee': annee.annee})
+
+        total_attendu = Money.from_db(row['total_attendu'] + row['archive_attendu'])
+        total_collecte = Money.from_db(row['total_collecte'] + row['archive_collecte'])
+        total_depenses = DepenseService.get_total_depenses(annee_id)
+
+        return {
+            'annee': annee.annee,
+            'nb_adherents_actifs': row['nb_adherents_actifs'],
+            'nb_appels_ouverts': row['nb_appels_ouverts'],
+            'total_collecte': total_collecte,
+            'total_depenses': total_depenses,
+            'balance_globale': total_collecte - total_depenses,
+            'taux_recouvrement': (total_collecte / total_attendu * 100) if total_attendu > 0 else 0,
+            'total_attendu': total_attendu,
+            'nb_cotisations_impayees': row['nb_impayees'] or 0,
+            'nombre_deces': DepenseService.get_nombre_deces(annee_id)
+        }
+
+    @staticmethod
+    def get_rollup(dimension, annees=None, mois=None, valeurs=None,
+                   grouper=('annee', 'mois', 'valeur')):
+        """
+        Interroge les agregats mensuels (voir database/rollup.py) pour les graphiques
+
+        Args:
+            dimension: 'mode_paiement', 'admin_id', 'type_paiement', 'poste' ou 'depenses'
+            annees: Annees retenues (defaut: toutes)
+            mois: Mois retenus, 1 a 12 (defaut: tous)
+            valeurs: Valeurs de la dimension retenues (defaut: toutes)
+            grouper: Axes conserves parmi annee, mois et valeur ; les autres sont sommes
+
+        Returns:
+            Liste de dictionnaires (axes de grouper, nombre, total)
+        """
+        from database.rollup import DIMENSIONS
+
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Dimension inconnue : {dimension}")
+        axes = [axe for axe in ('annee', 'mois', 'valeur') if axe in grouper]
+
+        conditions, params = ["dimension = ?"], [dimension]
+        for colonne, retenues in (('annee', annees), ('mois', mois), ('valeur', valeurs)):
+            if retenues:
+                retenues = [str(v) for v in retenues] if colonne == 'valeur' else list(retenues)
+                conditions.append(f"{colonne} IN ({', '.join('?' * len(retenues))})")
+                params.extend(retenues)
+
+        colonnes = ', '.join(axes + ['SUM(nombre) as nombre', 'SUM(total) as total'])
+        query = f"SELECT {colonnes} FROM rollup_mensuel WHERE {' AND '.join(conditions)}"
+        if axes:
+            query += f" GROUP BY {', '.join(axes)} ORDER BY {', '.join(axes)}"
+
+        db = DatabaseManager()
+        return [dict(row, nombre=row['nombre'] or 0, total=Money.from_db(row['total'] or 0))
+                for row in db.fetch_all(query, params)]
+
+    @staticmethod
+    def get_serie_mensuelle(dimension, annee):
+        """
+        Serie mensuelle d'une annee par valeur de la dimension (un point par mois)
+
+        Args:
+            dimension: Dimension des agregats (voir get_rollup)
+            annee: Numero de l'annee
+
+        Returns:
+            Dictionnaire {valeur: [12 totaux Money, janvier a decembre]}
+        """
+        serie = {}
+        for row in StatistiqueService.get_rollup(dimension, annees=[annee]):
+            totaux = serie.setdefault(row['valeur'], [Money(0)] * 12)
+            totaux[row['mois'] - 1] = row['total']
+        return serie
+
     @staticmethod
     def get_alertes():
         """
@@ -88,9 +197,8 @@ class StatistiqueService:
         db = DatabaseManager()
 
         # Alerte: Appels ouverts avec taux faible (< 50%)
-        appels_ouverts = AppelDeFonds.get_ouverts()
-        for appel in appels_ouverts:
-            stats = appel.get_stats()
+        for item in AppelDeFonds.get_all_with_stats(ouverts_only=True):
+            appel, stats = item['appel'], item['stats']
             if stats['taux'] < 50 and stats['total'] > 0:
                 alertes.append({
                     'type': 'taux_faible',
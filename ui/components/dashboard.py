@@ -17,6 +17,7 @@ class Dashboard(tk.Frame):
         super().__init__(parent, bg='#ECF0F1')
         self.main_window = main_window
         self.annee_active = main_window.annee_active
+        self.stale = False
 
         if self.annee_active:
             self.setup_ui()
@@ -338,6 +339,11 @@ class Dashboard(tk.Frame):
         self.alerts_container = tk.Frame(alerts_frame, bg='#ECF0F1')
         self.alerts_container.pack(fill=tk.X)
 
+    def refresh(self):
+        """Recharge les données (appelé par MainWindow si la vue est périmée)"""
+        if self.annee_active:
+            self.load_data()
+
     def load_data(self):
         """Charge les données du dashboard"""
         try:
@@ -7,8 +7,10 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from models.adherent import Adherent
 from models.depense import Depense
+from models.money import Money
 from datetime import datetime
 from config import RELATIONS, CURRENCY_SYMBOL, POSTES_DEPENSES
+from services import PdfService
 
 
 class DepenseForm(tk.Toplevel):
@@ -313,11 +315,10 @@ class DepenseForm(tk.Toplevel):
 
     def update_total(self):
         """Met a jour le total des frais"""
-        total = 0
+        total = Money(0)
         for key, entry in self.poste_entries.items():
             try:
-                val = float(entry.get().strip() or 0)
-                total += val
+                total += Money.from_euros(entry.get())
             except ValueError:
                 pass
         self.total_label.config(
@@ -327,9 +328,9 @@ class DepenseForm(tk.Toplevel):
     def get_poste_value(self, key):
         """Recupere la valeur d'un poste de frais"""
         try:
-            return float(self.poste_entries[key].get().strip() or 0)
+            return Money.from_euros(self.poste_entries[key].get())
         except ValueError:
-            return 0
+            return Money(0)
 
     def validate_fields(self):
         """Valide les champs"""
@@ -433,7 +434,6 @@ class DepenseForm(tk.Toplevel):
 
             # Generer le PDF
             try:
-                from services.pdf_service import PdfService
                 PdfService.generer_pdf_depense(depense)
             except Exception as pdf_err:
                 messagebox.showwarning(
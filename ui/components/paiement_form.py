@@ -6,9 +6,12 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime
 from config import PAYMENT_MODES, CURRENCY_SYMBOL, ADMIN_IDS
+from models.cle_idempotence import CleIdempotence
 from models.contribution import Contribution
 from models.cotisation import Cotisation
 from models.historique import Historique
+from models.money import Money
+from services import PdfService
 
 MOTIFS = ["Cotisation", "Frais d'entree"]
 
@@ -29,6 +32,8 @@ class PaiementForm(tk.Toplevel):
         self.adherent = adherent
         self.result = None
         self._cotisations_impayees = []
+        # Un second clic sur Enregistrer n'enregistre pas un second paiement
+        self._cle_idempotence = CleIdempotence.nouvelle()
 
         self.setup_ui()
         self.center_window()
@@ -60,17 +65,26 @@ class PaiementForm(tk.Toplevel):
         info_content = tk.Frame(info_frame, bg='white')
         info_content.pack(padx=15, pady=10)
 
-        annee_courante = datetime.now().year
-        total_paye = Contribution.get_total_by_adherent(self.adherent.id, annee_courante)
+        # Releve de compte : une seule lecture par cle primaire
+        releve = self.adherent.get_releve()
         infos = [
-            ("Total paye en " + str(annee_courante),
-             f"{total_paye:,.0f} {CURRENCY_SYMBOL}".replace(',', ' ')),
+            ("Total verse",
+             f"{releve.total_verse:,.0f} {CURRENCY_SYMBOL}".replace(',', ' ')),
+            ("Reste a payer",
+             f"{releve.reste_impaye:,.0f} {CURRENCY_SYMBOL} "
+             f"({releve.nb_impayees} cotisation(s))".replace(',', ' ')),
         ]
-        if self.adherent.frais_entree > 0:
-            statut_frais = "Paye" if self.adherent.frais_entree_paye else "Non paye"
+        if releve.dernier_paiement:
+            try:
+                dernier = datetime.strptime(releve.dernier_paiement, '%Y-%m-%d').strftime('%d/%m/%Y')
+            except ValueError:
+                dernier = releve.dernier_paiement
+            infos.append(("Dernier paiement", dernier))
+        if releve.frais_entree > 0:
+            statut_frais = "Paye" if releve.frais_entree_paye else "Non paye"
             infos.append((
                 "Frais d'entree",
-                f"{self.adherent.frais_entree:,.0f} {CURRENCY_SYMBOL} ({statut_frais})".replace(',', ' ')
+                f"{releve.frais_entree:,.0f} {CURRENCY_SYMBOL} ({statut_frais})".replace(',', ' ')
             ))
 
         for label, value in infos:
@@ -232,7 +246,7 @@ class PaiementForm(tk.Toplevel):
                 text=f"Reste a payer: {reste:,.0f} {CURRENCY_SYMBOL}".replace(',', ' ')
             )
             self.montant_entry.delete(0, tk.END)
-            self.montant_entry.insert(0, str(int(reste)))
+            self.montant_entry.insert(0, str(reste))
 
     # ------------------------------------------------------------------
     # Validation et sauvegarde
@@ -246,7 +260,7 @@ class PaiementForm(tk.Toplevel):
             self.montant_entry.focus()
             return None
         try:
-            montant = float(montant_str)
+            montant = Money.from_euros(montant_str)
             if montant <= 0:
                 messagebox.showerror("Erreur", "Le montant doit etre positif")
                 self.montant_entry.focus()
@@ -289,11 +303,13 @@ class PaiementForm(tk.Toplevel):
         try:
             motif = self.motif_var.get()
             if motif == "Cotisation":
-                contribution = self._sauvegarder_cotisation(fields)
+                enregistrer = lambda: self._sauvegarder_cotisation(fields)
             else:
-                contribution = self._sauvegarder_frais_entree(fields)
+                enregistrer = lambda: self._sauvegarder_frais_entree(fields)
+            contribution, deja = CleIdempotence.executer(self._cle_idempotence, enregistrer)
 
-            self._generer_pdf(contribution)
+            if not deja:
+                self._generer_pdf(contribution)
             self.result = True
             self.destroy()
 
@@ -356,7 +372,6 @@ class PaiementForm(tk.Toplevel):
     def _generer_pdf(self, contribution):
         """Genere le recu PDF apres enregistrement"""
         try:
-            from services.pdf_service import PdfService
             PdfService.generer_pdf_paiement(contribution)
         except Exception as pdf_err:
             messagebox.showwarning(
@@ -5,6 +5,37 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from config import APP_NAME, WINDOW_WIDTH, WINDOW_HEIGHT
 from models.annee import Annee
+from services import event_bus
+from utils.lazy import LazyImport
+
+
+# Vues de la zone principale, importees a la premiere navigation
+VUES = {
+    'dashboard': LazyImport('ui.components.dashboard', 'Dashboard'),
+    'adherents': LazyImport('ui.views.adherents_view', 'AdherentsView'),
+    'annees': LazyImport('ui.views.annees_view', 'AnneesView'),
+    'contributions': LazyImport('ui.views.contributions_view', 'ContributionsView'),
+    'depenses': LazyImport('ui.views.depenses_view', 'DepensesView'),
+}
+
+# Vues à recharger selon le type de modification publié sur le bus
+_VUES_PAIEMENTS = ('dashboard', 'adherents', 'annees', 'contributions')
+_VUES_DEPENSES = ('dashboard', 'annees', 'depenses')
+_VUES_ADHERENTS = ('dashboard', 'adherents', 'contributions', 'depenses')
+VUES_PAR_EVENEMENT = {
+    event_bus.ContributionCreee: _VUES_PAIEMENTS,
+    event_bus.ContributionModifiee: _VUES_PAIEMENTS,
+    event_bus.ContributionSupprimee: _VUES_PAIEMENTS,
+    event_bus.PaiementEnregistre: _VUES_PAIEMENTS,
+    event_bus.DepenseCreee: _VUES_DEPENSES,
+    event_bus.DepenseModifiee: _VUES_DEPENSES,
+    event_bus.DepenseSupprimee: _VUES_DEPENSES,
+    event_bus.AdherentCree: _VUES_ADHERENTS,
+    event_bus.AdherentModifie: _VUES_ADHERENTS,
+    event_bus.AdherentSupprime: _VUES_ADHERENTS,
+    event_bus.AppelCree: ('dashboard', 'contributions'),
+    event_bus.AppelCloture: ('dashboard', 'contributions'),
+}
 
 
 class MainWindow(tk.Tk):
@@ -24,8 +55,12 @@ class MainWindow(tk.Tk):
 
         # Variables
         self.current_view = None
+        self.current_view_name = None
         self.annee_active = None
 
+        # Vues deja construites, conservées masquées entre deux navigations
+        self.views = {}
+
         # Récupérer l'année active
         self.load_annee_active()
 
@@ -35,8 +70,13 @@ class MainWindow(tk.Tk):
         self.setup_main_area()
         self.setup_status_bar()
 
-        # Afficher le dashboard au démarrage
-        self.show_dashboard()
+        # Marquer les vues concernées comme périmées à chaque modification
+        for type_evenement in VUES_PAR_EVENEMENT:
+            event_bus.bus.abonner(type_evenement, self.on_data_changed)
+
+        # Afficher le dashboard au démarrage, une fois la fenêtre dessinée
+        # (les requêtes du tableau de bord ne retardent plus son apparition)
+        self.after_idle(self.show_dashboard)
 
         # Gérer la fermeture
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
@@ -176,26 +216,73 @@ class MainWindow(tk.Tk):
         self.status_label.config(text=message)
 
     def clear_main_area(self):
-        """Efface le contenu de la zone principale"""
-        for widget in self.main_container.winfo_children():
-            widget.destroy()
+        """Masque la vue courante (elle reste en cache pour la prochaine visite)"""
+        if self.current_view is not None:
+            self.current_view.pack_forget()
         self.current_view = None
+        self.current_view_name = None
+
+    def show_view(self, name, status):
+        """
+        Affiche une vue de la zone principale
+
+        La vue est construite à la première visite puis conservée masquée :
+        elle n'est rechargée que si elle a été marquée périmée entre-temps.
+
+        Args:
+            name: Clé de la vue dans VUES
+            status: Message de la barre de statut
+        """
+        self.clear_main_area()
+
+        view = self.views.get(name)
+        if view is None:
+            view = VUES[name](self.main_container, self)
+            self.views[name] = view
+        elif view.stale:
+            view.refresh()
+        view.stale = False
+
+        view.pack(fill=tk.BOTH, expand=True)
+        self.current_view = view
+        self.current_view_name = name
+        self.update_status(status)
+
+    def mark_views_stale(self, *names):
+        """
+        Marque des vues en cache comme périmées (toutes si aucun nom n'est donné)
+
+        La vue affichée n'est pas concernée : elle se recharge elle-même
+        après ses propres modifications.
+        """
+        for name, view in self.views.items():
+            if names and name not in names:
+                continue
+            if view is not self.current_view:
+                view.stale = True
+
+    def on_data_changed(self, evenement):
+        """Abonné du bus d'événements : seules les vues concernées seront rechargées"""
+        self.mark_views_stale(*VUES_PAR_EVENEMENT[type(evenement)])
+
+    def discard_views(self, *names):
+        """Détruit des vues en cache : elles seront reconstruites à la prochaine visite"""
+        for name in names:
+            view = self.views.pop(name, None)
+            if view is None:
+                continue
+            if view is self.current_view:
+                self.current_view = None
+                self.current_view_name = None
+            view.destroy()
 
     def show_dashboard(self):
         """Affiche le tableau de bord"""
-        self.clear_main_area()
-        from ui.components.dashboard import Dashboard
-        self.current_view = Dashboard(self.main_container, self)
-        self.current_view.pack(fill=tk.BOTH, expand=True)
-        self.update_status("Tableau de bord")
+        self.show_view('dashboard', "Tableau de bord")
 
     def show_adherents(self):
         """Affiche la vue de gestion des adhérents"""
-        self.clear_main_area()
-        from ui.views.adherents_view import AdherentsView
-        self.current_view = AdherentsView(self.main_container, self)
-        self.current_view.pack(fill=tk.BOTH, expand=True)
-        self.update_status("Gestion des adhérents")
+        self.show_view('adherents', "Gestion des adhérents")
 
     def add_adherent(self):
         """Ouvre le formulaire d'ajout d'adhérent"""
@@ -206,17 +293,12 @@ class MainWindow(tk.Tk):
         if form.result:
             messagebox.showinfo("Succès", "Adhérent ajouté avec succès")
             # Rafraîchir la vue si on est sur la page adhérents
-            if hasattr(self.current_view, '__class__') and \
-               self.current_view.__class__.__name__ == 'AdherentsView':
-                self.current_view.load_adherents()
+            if self.current_view_name == 'adherents':
+                self.current_view.refresh()
 
     def show_annees(self):
         """Affiche la vue de gestion des années"""
-        self.clear_main_area()
-        from ui.views.annees_view import AnneesView
-        self.current_view = AnneesView(self.main_container, self)
-        self.current_view.pack(fill=tk.BOTH, expand=True)
-        self.update_status("Gestion des années")
+        self.show_view('annees', "Gestion des années")
 
     def new_annee(self):
         """Ouvre le formulaire de nouvelle année"""
@@ -228,25 +310,16 @@ class MainWindow(tk.Tk):
             self.refresh_annee_active()
             messagebox.showinfo("Succès", "Année créée avec succès")
             # Rafraîchir la vue si on est sur la page années
-            if hasattr(self.current_view, '__class__') and \
-               self.current_view.__class__.__name__ == 'AnneesView':
-                self.current_view.load_annees()
+            if self.current_view_name == 'annees':
+                self.current_view.refresh()
 
     def show_contributions(self):
         """Affiche la vue d'enregistrement des contributions"""
-        self.clear_main_area()
-        from ui.views.contributions_view import ContributionsView
-        self.current_view = ContributionsView(self.main_container, self)
-        self.current_view.pack(fill=tk.BOTH, expand=True)
-        self.update_status("Enregistrement des contributions")
+        self.show_view('contributions', "Enregistrement des contributions")
 
     def show_depenses(self):
         """Affiche la vue d'enregistrement des dépenses"""
-        self.clear_main_area()
-        from ui.views.depenses_view import DepensesView
-        self.current_view = DepensesView(self.main_container, self)
-        self.current_view.pack(fill=tk.BOTH, expand=True)
-        self.update_status("Enregistrement des dépenses")
+        self.show_view('depenses', "Enregistrement des dépenses")
 
     def show_rapport_annuel(self):
         """Affiche le rapport annuel"""
@@ -293,15 +366,19 @@ class MainWindow(tk.Tk):
         self.load_annee_active()
         self.update_annee_label()
 
-        # Rafraîchir la vue actuelle si c'est le dashboard
-        if isinstance(self.current_view, type(None)) or \
-           hasattr(self.current_view, '__class__') and \
-           self.current_view.__class__.__name__ == 'Dashboard':
+        # Les vues construites pour l'ancienne année active sont reconstruites
+        self.discard_views('dashboard', 'depenses')
+        self.mark_views_stale()
+
+        # Réafficher le dashboard si la vue actuelle a été détruite
+        if self.current_view is None:
             self.show_dashboard()
 
     def on_closing(self):
         """Gère la fermeture de l'application"""
         if messagebox.askokcancel("Quitter", "Voulez-vous vraiment quitter l'application?"):
+            for type_evenement in VUES_PAR_EVENEMENT:
+                event_bus.bus.desabonner(type_evenement, self.on_data_changed)
             self.destroy()
 
 
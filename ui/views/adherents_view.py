@@ -14,10 +14,15 @@ class AdherentsView(tk.Frame):
     def __init__(self, parent, main_window):
         super().__init__(parent, bg='#ECF0F1')
         self.main_window = main_window
+        self.stale = False
 
         self.setup_ui()
         self.load_adherents()
 
+    def refresh(self):
+        """Recharge la liste (appelé par MainWindow si la vue est périmée)"""
+        self.on_search()
+
     def setup_ui(self):
         """Configure l'interface"""
         # En-tête
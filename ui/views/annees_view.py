@@ -15,10 +15,15 @@ class AnneesView(tk.Frame):
     def __init__(self, parent, main_window):
         super().__init__(parent, bg='#ECF0F1')
         self.main_window = main_window
+        self.stale = False
 
         self.setup_ui()
         self.load_annees()
 
+    def refresh(self):
+        """Recharge la liste (appelé par MainWindow si la vue est périmée)"""
+        self.load_annees()
+
     def setup_ui(self):
         """Configure l'interface"""
         # En-tête
@@ -381,6 +386,7 @@ class AnneesView(tk.Frame):
                 f"{count} contribution(s) créée(s) pour l'année {annee.annee}"
             )
             self.load_annees()
+            self.main_window.mark_views_stale()
         except Exception as e:
             messagebox.showerror(
                 "Erreur",
@@ -7,9 +7,11 @@ from tkinter import ttk, messagebox
 from models.adherent import Adherent
 from models.contribution import Contribution
 from models.cotisation import Cotisation
+from models.money import Money
 from ui.components.paiement_form import PaiementForm
 from database.db_manager import DatabaseManager
 from datetime import datetime
+from services import PdfService
 from config import CURRENCY_SYMBOL, ADMIN_IDS
 
 
@@ -20,10 +22,18 @@ class ContributionsView(tk.Frame):
         super().__init__(parent, bg='#ECF0F1')
         self.main_window = main_window
         self.annee_courante = datetime.now().year
+        self.stale = False
 
         self.setup_ui()
         self.load_data()
 
+    def refresh(self):
+        """Recharge les paiements (appele par MainWindow si la vue est perimee)"""
+        if self.search_var.get().strip():
+            self.on_search()
+        else:
+            self.load_data()
+
     def setup_ui(self):
         """Configure l'interface"""
         # En-tete
@@ -224,7 +234,7 @@ class ContributionsView(tk.Frame):
                     row['adherent_id'],
                     row['nom'],
                     row['prenom'],
-                    f"{row['montant']:,.0f} {CURRENCY_SYMBOL}".replace(',', ' '),
+                    f"{Money.from_db(row['montant']):,.0f} {CURRENCY_SYMBOL}".replace(',', ' '),
                     date_str,
                     row['mode_paiement'] or '',
                     admin_name
@@ -406,25 +416,12 @@ class ContributionsView(tk.Frame):
     def on_voir_impayes(self):
         """Affiche la liste des adherents avec des cotisations impayees"""
         try:
-            db = DatabaseManager()
-            query = """
-                SELECT a.id, a.nom, a.prenom,
-                       COUNT(c.id) as nb_impayees,
-                       COALESCE(SUM(c.montant_du - c.montant_paye), 0) as montant_restant
-                FROM adherents a
-                JOIN cotisations c ON c.adherent_id = a.id
-                WHERE c.statut != 'paye'
-                GROUP BY a.id, a.nom, a.prenom
-                ORDER BY a.nom, a.prenom
-            """
-            rows = db.fetch_all(query)
+            lignes = Cotisation.get_impayes_par_adherent()
 
-            if not rows:
+            if not lignes:
                 messagebox.showinfo("Impayes", "Aucun adherent avec cotisation impayee.")
                 return
 
-            lignes = [dict(row) for row in rows]
-
             # Fenetre de liste
             dialog = tk.Toplevel(self)
             dialog.title("Adherents avec cotisations impayees")
@@ -491,7 +488,6 @@ class ContributionsView(tk.Frame):
 
             def exporter_pdf():
                 try:
-                    from services.pdf_service import PdfService
                     chemin = PdfService.generer_pdf_impayes(lignes)
                     messagebox.showinfo("PDF", f"PDF genere:\n{chemin}")
                 except Exception as e:
@@ -17,6 +17,7 @@ class DepensesView(tk.Frame):
         super().__init__(parent, bg='#ECF0F1')
         self.main_window = main_window
         self.annee_active = main_window.annee_active
+        self.stale = False
 
         if self.annee_active:
             self.setup_ui()
@@ -185,6 +186,11 @@ class DepensesView(tk.Frame):
         )
         self.count_label.pack(side=tk.RIGHT, padx=10)
 
+    def refresh(self):
+        """Recharge les donnees (appele par MainWindow si la vue est perimee)"""
+        if self.annee_active:
+            self.load_depenses()
+
     def load_depenses(self):
         """Charge les depenses"""
         try:
@@ -0,0 +1,70 @@
+"""
+Chargement paresseux de modules
+Permet de referencer une classe lourde (PdfService, vues Tkinter...) sans
+importer son module avant la premiere utilisation.
+"""
+import importlib
+import sys
+import threading
+
+
+class LazyImport:
+    """
+    Proxy vers un attribut de module, importe au premier acces.
+
+    Exemple:
+        PdfService = LazyImport('services.pdf_service', 'PdfService')
+        PdfService.generer_pdf_paiement(contribution)  # importe reportlab ici
+    """
+
+    def __init__(self, module, attribut):
+        self._module = module
+        self._attribut = attribut
+        self._cible = None
+        self._verrou = threading.Lock()
+
+    def resoudre(self):
+        """Importe le module si necessaire et retourne l'objet cible"""
+        if self._cible is None:
+            with self._verrou:
+                if self._cible is None:
+                    module = importlib.import_module(self._module)
+                    self._cible = getattr(module, self._attribut)
+        return self._cible
+
+    def est_charge(self):
+        """Indique si le module cible a deja ete importe"""
+        return self._cible is not None
+
+    def __getattr__(self, nom):
+        return getattr(self.resoudre(), nom)
+
+    def __call__(self, *args, **kwargs):
+        return self.resoudre()(*args, **kwargs)
+
+    def __repr__(self):
+        etat = 'charge' if self._cible is not None else 'non charge'
+        return f"LazyImport({self._module}.{self._attribut}, {etat})"
+
+
+def lazy_exports(package, exports):
+    """
+    Construit le __getattr__ (PEP 562) d'un package dont les exports
+    sont importes a la demande.
+
+    Args:
+        package: Nom du package (__name__)
+        exports: Dictionnaire nom exporte -> sous-module relatif
+
+    Returns:
+        Fonction __getattr__ a affecter au niveau du module
+    """
+    def __getattr__(nom):
+        if nom not in exports:
+            raise AttributeError(f"module {package!r} has no attribute {nom!r}")
+        module = importlib.import_module(f"{package}.{exports[nom]}")
+        valeur = getattr(module, nom)
+        # Memoriser pour ne plus passer par __getattr__
+        setattr(sys.modules[package], nom, valeur)
+        return valeur
+    return __getattr__
@@ -33,6 +33,19 @@ def create_app():
     from web.helpers import register_helpers
     register_helpers(app)
 
+    # Compression, cache des fichiers statiques et GET conditionnels
+    # (avant les autres hooks : la compression passe en dernier)
+    from web.cache import init_cache
+    init_cache(app)
+
+    # Mesures par requete (Server-Timing, /_metrics)
+    from web.metrics import init_metrics
+    init_metrics(app)
+
+    # Mises a jour en direct du tableau de bord (/dashboard/flux)
+    from web.sse import init_sse
+    init_sse(app)
+
     # Enregistrer les blueprints
     from web.blueprints.dashboard import dashboard_bp
     from web.blueprints.adherents import adherents_bp
@@ -40,6 +53,7 @@ def create_app():
     from web.blueprints.contributions import contributions_bp
     from web.blueprints.depenses import depenses_bp
     from web.blueprints.annees import annees_bp
+    from web.blueprints.api import api_bp
 
     app.register_blueprint(dashboard_bp)
     app.register_blueprint(adherents_bp, url_prefix='/adherents')
@@ -47,5 +61,11 @@ def create_app():
     app.register_blueprint(contributions_bp, url_prefix='/paiements')
     app.register_blueprint(depenses_bp, url_prefix='/depenses')
     app.register_blueprint(annees_bp, url_prefix='/annees')
+    app.register_blueprint(api_bp, url_prefix='/api/v1')
+
+    # Panneau de profilage SQL (DCOMITE_SQL_PROFILING=1)
+    if db.get_profiler() is not None:
+        from web.blueprints.profilage import init_profilage
+        init_profilage(app)
 
     return app
@@ -3,12 +3,15 @@ Blueprint Adherents - Gestion des membres
 """
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from models.adherent import Adherent
+from models.money import Money
 from datetime import datetime
+from web.cache import conditionnel
 
 adherents_bp = Blueprint('adherents', __name__)
 
 
 @adherents_bp.route('/')
+@conditionnel
 def index():
     q = request.args.get('q', '').strip()
     actifs_only = request.args.get('actifs_only', '1') == '1'
@@ -30,11 +33,13 @@ def detail(id):
     if not adherent:
         return '<div class="modal-body"><div class="alert alert-danger">Adherent non trouve</div></div>'
 
+    releve = adherent.get_releve()
     cotisations = adherent.get_cotisations()
     historique = adherent.get_historique()
 
     return render_template('adherents/detail.html',
                            adherent=adherent,
+                           releve=releve,
                            cotisations=cotisations,
                            historique=historique)
 
@@ -69,7 +74,7 @@ def creer():
     frais_entree = 0
     if frais_entree_str:
         try:
-            frais_entree = float(frais_entree_str)
+            frais_entree = Money.from_euros(frais_entree_str)
             if frais_entree < 0:
                 frais_entree = 0
         except ValueError:
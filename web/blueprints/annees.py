@@ -3,11 +3,13 @@ Blueprint Annees - Gestion des annees
 """
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from models.annee import Annee
+from web.cache import conditionnel
 
 annees_bp = Blueprint('annees', __name__)
 
 
 @annees_bp.route('/')
+@conditionnel
 def index():
     annees = Annee.get_all()
 
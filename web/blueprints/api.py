@@ -0,0 +1,94 @@
+"""
+Blueprint API - API JSON versionnee (/api/v1)
+Lecture des adherents, appels, cotisations, contributions et depenses :
+projection des champs (?fields=), pagination par curseur (?after=, ?limit=),
+filtres simples et ETag fort (304 si rien n'a change depuis If-None-Match)
+"""
+import hashlib
+import json
+
+from flask import Blueprint, request, jsonify, make_response, url_for
+from services.api_service import ApiService, RESSOURCES
+from config import ITEMS_PER_PAGE
+
+api_bp = Blueprint('api', __name__)
+
+# Parametres de requete qui ne sont pas des filtres
+_PARAMETRES = ('fields', 'after', 'limit')
+
+
+def _erreur(message, statut):
+    response = jsonify({'erreur': message})
+    response.status_code = statut
+    return response
+
+
+def _champs_demandes():
+    fields = request.args.get('fields', '').strip()
+    return [champ.strip() for champ in fields.split(',') if champ.strip()] if fields else None
+
+
+def _reponse(etag, construire):
+    """
+    Reponse JSON avec ETag : 304 sans corps si le client a deja cette version,
+    sinon le corps construit par construire()
+    """
+    if etag in request.if_none_match:
+        response = make_response('', 304)
+    else:
+        response = jsonify(construire())
+    response.set_etag(etag)
+    # Le client garde la reponse mais la revalide a chaque fois
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+@api_bp.route('/')
+def index():
+    return jsonify({
+        'version': 'v1',
+        'ressources': {nom: url_for('api.lister', ressource=nom, _external=False)
+                       for nom in RESSOURCES}
+    })
+
+
+@api_bp.route('/<ressource>')
+def lister(ressource):
+    if ressource not in RESSOURCES:
+        return _erreur(f"Ressource inconnue : {ressource}", 404)
+    filtres = {cle: valeur for cle, valeur in request.args.items() if cle not in _PARAMETRES}
+    try:
+        champs = ApiService.champs(ressource, _champs_demandes())
+        apres = int(request.args.get('after', 0))
+        limite = int(request.args.get('limit', ITEMS_PER_PAGE))
+        etag = ApiService.signature(ressource, filtres, (champs, apres, limite))
+    except ValueError as e:
+        return _erreur(str(e), 400)
+
+    def construire():
+        lignes, suivant = ApiService.lister(ressource, champs, filtres, apres, limite)
+        suite = None
+        if suivant is not None:
+            suite = url_for('api.lister', ressource=ressource,
+                            **dict(request.args.items(), after=suivant))
+        return {'data': lignes, 'next_cursor': suivant, 'next': suite}
+
+    return _reponse(etag, construire)
+
+
+@api_bp.route('/<ressource>/<int:id>')
+def detail(ressource, id):
+    if ressource not in RESSOURCES:
+        return _erreur(f"Ressource inconnue : {ressource}", 404)
+    try:
+        champs = ApiService.champs(ressource, _champs_demandes())
+    except ValueError as e:
+        return _erreur(str(e), 400)
+    ligne = ApiService.get(ressource, id, champs)
+    if ligne is None:
+        return _erreur(f"{ressource} {id} introuvable", 404)
+
+    # Lecture par cle primaire : l'ETag est l'empreinte du contenu renvoye
+    contenu = json.dumps(ligne, sort_keys=True, default=str)
+    etag = hashlib.sha256(contenu.encode('utf-8')).hexdigest()[:32]
+    return _reponse(etag, lambda: {'data': ligne})
@@ -5,23 +5,18 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash
 from models.appel import AppelDeFonds
 from models.cotisation import Cotisation
 from models.adherent import Adherent
+from models.money import Money
 from datetime import date
+from web.cache import conditionnel
 
 appels_bp = Blueprint('appels', __name__)
 
 
 @appels_bp.route('/')
+@conditionnel
 def index():
-    appels = AppelDeFonds.get_all()
-
-    # Enrichir chaque appel avec ses stats
-    appels_enriched = []
-    for appel in appels:
-        stats = appel.get_stats()
-        appels_enriched.append({
-            'appel': appel,
-            'stats': stats
-        })
+    # Chaque appel avec ses stats, en une seule requete
+    appels_enriched = AppelDeFonds.get_all_with_stats()
 
     return render_template('appels/index.html', appels=appels_enriched)
 
@@ -65,7 +60,7 @@ def creer():
 
     try:
         annee = int(annee)
-        montant = float(montant)
+        montant = Money.from_euros(montant)
         if montant <= 0:
             raise ValueError()
     except ValueError:
@@ -6,14 +6,18 @@ from models.contribution import Contribution
 from models.cotisation import Cotisation
 from models.adherent import Adherent
 from models.historique import Historique
+from models.cle_idempotence import CleIdempotence
+from models.money import Money
 from services.contribution_service import ContributionService
-from database.db_manager import DatabaseManager
+from services import PdfService
 from config import CURRENCY_SYMBOL
+from web.cache import conditionnel
 
 contributions_bp = Blueprint('contributions', __name__)
 
 
 @contributions_bp.route('/')
+@conditionnel
 def index():
     contributions = ContributionService.get_dernieres_contributions(100)
     return render_template('contributions/index.html', contributions=contributions)
@@ -37,7 +41,8 @@ def form_nouveau():
                            contribution=None,
                            adherents=adherents,
                            title='Enregistrer un paiement',
-                           action_url=url_for('contributions.creer'))
+                           action_url=url_for('contributions.creer'),
+                           cle_idempotence=CleIdempotence.nouvelle())
 
 
 @contributions_bp.route('/api/cotisations/<int:adherent_id>')
@@ -54,19 +59,18 @@ def api_cotisations(adherent_id):
         result.append({
             'id': c.id,
             'appel_info': appel_info,
-            'montant_du': c.montant_du,
-            'montant_paye': c.montant_paye,
-            'reste': c.get_reste_a_payer()
+            'montant_du': float(c.montant_du),
+            'montant_paye': float(c.montant_paye),
+            'reste': float(c.get_reste_a_payer())
         })
 
     adherent = Adherent.get_by_id(adherent_id)
-    frais_impaye = (
+    frais_impaye = bool(
         adherent is not None
-        and adherent.frais_entree
         and adherent.frais_entree > 0
         and not adherent.frais_entree_paye
     )
-    frais_montant = adherent.frais_entree if frais_impaye else 0
+    frais_montant = float(adherent.frais_entree) if frais_impaye else 0
 
     return jsonify({
         'cotisations': result,
@@ -86,13 +90,14 @@ def creer():
     notes = request.form.get('notes', '').strip() or None
     cotisation_id = request.form.get('cotisation_id') or None
     type_paiement = request.form.get('type_paiement', 'cotisation')
+    cle = request.form.get('cle_idempotence', '').strip()
 
     if not adherent_id or not montant_str or not date_paiement:
         flash('Adherent, montant et date sont obligatoires.', 'danger')
         return redirect(url_for('contributions.index'))
 
     try:
-        montant = float(montant_str)
+        montant = Money.from_euros(montant_str)
         if montant <= 0:
             raise ValueError()
     except ValueError:
@@ -101,33 +106,38 @@ def creer():
 
     admin_id_int = int(admin_id) if admin_id else None
     adherent_id_int = int(adherent_id)
-    contribution = None
 
-    if type_paiement == 'frais_entree':
-        contribution = Contribution.create(
-            adherent_id=adherent_id_int,
-            montant=montant,
-            date_paiement=date_paiement,
-            mode_paiement=mode_paiement,
-            reference_paiement=reference_paiement,
-            admin_id=admin_id_int,
-            type_paiement='frais_entree',
-            notes=notes
-        )
-        adherent = Adherent.get_by_id(adherent_id_int)
-        if adherent:
-            adherent.update(frais_entree_paye=1)
-        Historique.log(
-            adherent_id_int, 'frais_entree',
-            f"Paiement frais d'entree: {montant} {CURRENCY_SYMBOL}",
-            montant=montant, admin_id=admin_id_int
-        )
-        flash("Frais d'entree enregistres.", 'success')
-
-    elif cotisation_id:
+    cotisation = None
+    if type_paiement != 'frais_entree' and cotisation_id:
         cotisation = Cotisation.get_by_id(int(cotisation_id))
+        if not cotisation:
+            flash('Cotisation non trouvee.', 'danger')
+            return redirect(url_for('contributions.index'))
+
+    def enregistrer():
+        if type_paiement == 'frais_entree':
+            contribution = Contribution.create(
+                adherent_id=adherent_id_int,
+                montant=montant,
+                date_paiement=date_paiement,
+                mode_paiement=mode_paiement,
+                reference_paiement=reference_paiement,
+                admin_id=admin_id_int,
+                type_paiement='frais_entree',
+                notes=notes
+            )
+            adherent = Adherent.get_by_id(adherent_id_int)
+            if adherent:
+                adherent.update(frais_entree_paye=1)
+            Historique.log(
+                adherent_id_int, 'frais_entree',
+                f"Paiement frais d'entree: {montant} {CURRENCY_SYMBOL}",
+                montant=montant, admin_id=admin_id_int
+            )
+            return contribution
+
         if cotisation:
-            contribution = cotisation.enregistrer_paiement(
+            return cotisation.enregistrer_paiement(
                 montant=montant,
                 date_paiement=date_paiement,
                 mode_paiement=mode_paiement,
@@ -135,12 +145,7 @@ def creer():
                 admin_id=admin_id_int,
                 notes=notes
             )
-            flash('Paiement de cotisation enregistre.', 'success')
-        else:
-            flash('Cotisation non trouvee.', 'danger')
-            return redirect(url_for('contributions.index'))
 
-    else:
         # Paiement libre sans cotisation associee
         contribution = Contribution.create(
             adherent_id=adherent_id_int,
@@ -157,12 +162,26 @@ def creer():
             f"Paiement cotisation: {montant} {CURRENCY_SYMBOL}",
             montant=montant, admin_id=admin_id_int
         )
+        return contribution
+
+    # Un formulaire deja soumis (double clic, POST renvoye) n'enregistre rien de plus
+    contribution, deja = CleIdempotence.executer(
+        cle if CleIdempotence.valide(cle) else None, enregistrer
+    )
+    if deja:
+        flash('Ce paiement a deja ete enregistre.', 'info')
+        return redirect(url_for('contributions.index'))
+
+    if type_paiement == 'frais_entree':
+        flash("Frais d'entree enregistres.", 'success')
+    elif cotisation:
+        flash('Paiement de cotisation enregistre.', 'success')
+    else:
         flash('Paiement enregistre.', 'success')
 
     # Generer le PDF recu
     if contribution:
         try:
-            from services.pdf_service import PdfService
             chemin = PdfService.generer_pdf_paiement(contribution)
             flash(f'Recu PDF genere : {chemin}', 'info')
         except Exception as e:
@@ -187,39 +206,17 @@ def supprimer(id):
 # ------------------------------------------------------------------
 
 @contributions_bp.route('/impayes')
+@conditionnel
 def impayes():
-    db = DatabaseManager()
-    rows = db.fetch_all("""
-        SELECT a.id, a.nom, a.prenom,
-               COUNT(c.id) as nb_impayees,
-               COALESCE(SUM(c.montant_du - c.montant_paye), 0) as montant_restant
-        FROM adherents a
-        JOIN cotisations c ON c.adherent_id = a.id
-        WHERE c.statut != 'paye'
-        GROUP BY a.id, a.nom, a.prenom
-        ORDER BY a.nom, a.prenom
-    """)
-    lignes = [dict(row) for row in rows]
+    lignes = Cotisation.get_impayes_par_adherent()
     total = sum(l['montant_restant'] for l in lignes)
     return render_template('contributions/impayes.html', lignes=lignes, total=total)
 
 
 @contributions_bp.route('/impayes/pdf', methods=['POST'])
 def impayes_pdf():
-    db = DatabaseManager()
-    rows = db.fetch_all("""
-        SELECT a.id, a.nom, a.prenom,
-               COUNT(c.id) as nb_impayees,
-               COALESCE(SUM(c.montant_du - c.montant_paye), 0) as montant_restant
-        FROM adherents a
-        JOIN cotisations c ON c.adherent_id = a.id
-        WHERE c.statut != 'paye'
-        GROUP BY a.id, a.nom, a.prenom
-        ORDER BY a.nom, a.prenom
-    """)
-    lignes = [dict(row) for row in rows]
+    lignes = Cotisation.get_impayes_par_adherent()
     try:
-        from services.pdf_service import PdfService
         chemin = PdfService.generer_pdf_impayes(lignes)
         flash(f'PDF genere : {chemin}', 'success')
     except Exception as e:
@@ -1,10 +1,11 @@
 """
 Blueprint Dashboard - Page d'accueil avec statistiques
 """
-from flask import Blueprint, render_template, redirect, url_for
+from flask import Blueprint, render_template, redirect, url_for, current_app, request
 from services.statistique_service import StatistiqueService
 from services.contribution_service import ContributionService
 from services.depense_service import DepenseService
+from web.cache import conditionnel
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
@@ -15,6 +16,7 @@ def home():
 
 
 @dashboard_bp.route('/dashboard')
+@conditionnel
 def index():
     stats = StatistiqueService.get_statistiques_dashboard()
     alertes = StatistiqueService.get_alertes()
@@ -48,3 +50,10 @@ def index():
                            alertes=alertes,
                            dernieres_contributions=dernieres_contributions,
                            dernieres_depenses=dernieres_depenses)
+
+
+@dashboard_bp.route('/dashboard/flux')
+def flux():
+    """Mises a jour en direct du tableau de bord (server-sent events, web/sse.py)"""
+    diffuseur = current_app.extensions['dcomite_sse']
+    return diffuseur.flux(request.headers.get('Last-Event-ID'))
@@ -5,11 +5,15 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash
 from models.depense import Depense
 from models.adherent import Adherent
 from models.annee import Annee
+from models.money import Money
+from services import PdfService
+from web.cache import conditionnel
 
 depenses_bp = Blueprint('depenses', __name__)
 
 
 @depenses_bp.route('/')
+@conditionnel
 def index():
     annee_active = Annee.get_active()
 
@@ -74,12 +78,11 @@ def creer():
         return redirect(url_for('depenses.index'))
 
     # Recuperer les montants des postes
-    def get_float(name):
-        val = request.form.get(name, '').strip()
+    def get_montant(name):
         try:
-            return float(val) if val else 0
+            return Money.from_euros(request.form.get(name, ''))
         except ValueError:
-            return 0
+            return Money(0)
 
     depense = Depense.create(
         annee_id=annee_active.id,
@@ -89,13 +92,13 @@ def creer():
         defunt_nom=defunt_nom,
         defunt_relation=defunt_relation,
         pays_destination=pays_destination,
-        transport_services=get_float('transport_services'),
-        billet_avion=get_float('billet_avion'),
-        imam=get_float('imam'),
-        mairie=get_float('mairie'),
-        autre1=get_float('autre1'),
-        autre2=get_float('autre2'),
-        autre3=get_float('autre3'),
+        transport_services=get_montant('transport_services'),
+        billet_avion=get_montant('billet_avion'),
+        imam=get_montant('imam'),
+        mairie=get_montant('mairie'),
+        autre1=get_montant('autre1'),
+        autre2=get_montant('autre2'),
+        autre3=get_montant('autre3'),
         notes=request.form.get('notes', '').strip() or None
     )
 
@@ -103,7 +106,6 @@ def creer():
 
     # Generer le PDF
     try:
-        from services.pdf_service import PdfService
         chemin = PdfService.generer_pdf_depense(depense)
         flash(f'PDF depense genere : {chemin}', 'info')
     except Exception as e:
@@ -0,0 +1,69 @@
+"""
+Blueprint Profilage - Panneau de debogage des requetes SQL
+Actif uniquement si le profilage SQL est active (DCOMITE_SQL_PROFILING=1)
+"""
+from flask import Blueprint, render_template, request, redirect, url_for, flash
+from database.db_manager import DatabaseManager
+from config import SQL_PROFILE_PATH
+
+profilage_bp = Blueprint('profilage', __name__)
+
+
+def init_profilage(app):
+    """Enregistre le blueprint et le panneau ajoute en bas de chaque page HTML"""
+    app.register_blueprint(profilage_bp, url_prefix='/_profilage')
+
+    @app.before_request
+    def debut_collecte():
+        profiler = DatabaseManager().get_profiler()
+        if profiler is not None:
+            profiler.debut_collecte()
+
+    @app.after_request
+    def panneau_requetes(response):
+        profiler = DatabaseManager().get_profiler()
+        if profiler is None:
+            return response
+        requetes = profiler.fin_collecte()
+        if (response.mimetype != 'text/html' or response.direct_passthrough
+                or request.blueprint == 'profilage'):
+            return response
+
+        page = response.get_data(as_text=True)
+        if '</body>' not in page:
+            return response
+        panneau = render_template(
+            'components/profilage_panel.html',
+            requetes=requetes,
+            total_ms=sum(r['duree_ms'] for r in requetes),
+            nb_scans=sum(1 for r in requetes if r['scans'])
+        )
+        response.set_data(page.replace('</body>', panneau + '</body>', 1))
+        return response
+
+
+@profilage_bp.route('/')
+def index():
+    profiler = DatabaseManager().get_profiler()
+    tri = request.args.get('tri', 'total_ms')
+    requetes = profiler.rapport(tri=tri) if profiler else []
+    return render_template('profilage/index.html', requetes=requetes, tri=tri,
+                           profiler=profiler)
+
+
+@profilage_bp.route('/exporter', methods=['POST'])
+def exporter():
+    profiler = DatabaseManager().get_profiler()
+    if profiler:
+        chemin = profiler.exporter(SQL_PROFILE_PATH)
+        flash(f'Profil exporte : {chemin}', 'success')
+    return redirect(url_for('profilage.index'))
+
+
+@profilage_bp.route('/reinitialiser', methods=['POST'])
+def reinitialiser():
+    profiler = DatabaseManager().get_profiler()
+    if profiler:
+        profiler.reinitialiser()
+        flash('Statistiques reinitialisees.', 'success')
+    return redirect(url_for('profilage.index'))
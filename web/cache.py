@@ -0,0 +1,221 @@
+"""
+Cache HTTP et compression des reponses
+- compression brotli (si le module brotli est installe) ou gzip des pages HTML,
+  du JSON, du CSS et du JavaScript
+- empreinte ?v= ajoutee aux URLs des fichiers statiques (url_for('static')) :
+  une URL avec la bonne empreinte est mise en cache un an (immutable)
+- GET conditionnels des pages de liste (decorateur conditionnel) : ETag et
+  Last-Modified d'apres le compteur de modifications de la base et la version
+  deployee (templates, fichiers statiques), 304 sans executer la vue quand
+  rien n'a change
+"""
+import gzip
+import hashlib
+import os
+import threading
+import time
+from datetime import date, datetime, timezone
+from functools import wraps
+
+from flask import current_app, make_response, request, session
+from werkzeug.http import is_resource_modified
+from database.db_manager import DatabaseManager
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Types de contenu compresses
+TYPES_COMPRESSES = ('text/html', 'application/json', 'text/css',
+                    'application/javascript', 'text/javascript', 'text/plain')
+
+# En dessous de cette taille (octets), la compression ne vaut pas l'en-tete
+TAILLE_MIN = 500
+
+NIVEAU_GZIP = 6
+QUALITE_BROTLI = 5
+
+# Duree de cache des fichiers statiques avec empreinte (un an)
+DUREE_STATIQUE = 365 * 24 * 3600
+
+
+def compteur_modifications():
+    """Compteur des modifications de la base (DatabaseManager.compteur_modifications)"""
+    return DatabaseManager().compteur_modifications()
+
+
+class _DatesModification:
+    """
+    Date de premiere observation de chaque valeur du compteur (Last-Modified),
+    strictement croissante a la seconde pour ce processus
+    """
+
+    def __init__(self):
+        self._verrou = threading.Lock()
+        self._compteur = None
+        self._date = None
+
+    def date(self, compteur):
+        with self._verrou:
+            if compteur != self._compteur:
+                maintenant = int(time.time())
+                if self._date is not None:
+                    maintenant = max(maintenant, int(self._date.timestamp()) + 1)
+                self._compteur = compteur
+                self._date = datetime.fromtimestamp(maintenant, timezone.utc)
+            return self._date
+
+
+_dates = _DatesModification()
+
+
+def conditionnel(vue):
+    """
+    Decorateur des pages de liste : repond 304 si la page n'a pas change
+    depuis la version du client (If-None-Match / If-Modified-Since)
+    """
+    @wraps(vue)
+    def page(*args, **kwargs):
+        # Un message flash en attente doit etre affiche : pas de 304
+        if session.get('_flashes'):
+            return vue(*args, **kwargs)
+
+        compteur = compteur_modifications()
+        version = current_app.extensions['dcomite_version_pages']
+        cle = f"{request.full_path}|{compteur}|{date.today().isoformat()}|{version}"
+        etag = hashlib.sha256(cle.encode('utf-8')).hexdigest()[:32]
+        modifie_le = _dates.date(compteur)
+
+        if not is_resource_modified(request.environ, etag=etag, last_modified=modifie_le):
+            response = make_response('', 304)
+        else:
+            response = make_response(vue(*args, **kwargs))
+        response.set_etag(etag)
+        response.last_modified = modifie_le
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    return page
+
+
+def _empreinte(fichier):
+    """Empreinte courte du contenu d'un fichier statique (memorisee par date de modification)"""
+    chemin = os.path.join(current_app.static_folder, fichier)
+    try:
+        modifie = os.path.getmtime(chemin)
+    except OSError:
+        return None
+    cle = (fichier, modifie)
+    empreintes = current_app.extensions['dcomite_empreintes']
+    if cle not in empreintes:
+        with open(chemin, 'rb') as f:
+            empreintes[cle] = hashlib.sha256(f.read()).hexdigest()[:12]
+    return empreintes[cle]
+
+
+def _version_pages(app):
+    """
+    Empreinte du code qui produit les pages (APP_VERSION, templates et
+    fichiers statiques) : change a chaque deploiement qui les modifie, ce
+    qui invalide les ETag des pages deja en cache chez les clients.
+    Identique pour tous les workers d'un meme deploiement.
+    """
+    empreinte = hashlib.sha256(app.config.get('APP_VERSION', '').encode('utf-8'))
+    dossiers = [app.static_folder, os.path.join(app.root_path, app.template_folder)]
+    for dossier in dossiers:
+        for racine, sous_dossiers, fichiers in os.walk(dossier):
+            sous_dossiers.sort()
+            for fichier in sorted(fichiers):
+                chemin = os.path.join(racine, fichier)
+                empreinte.update(os.path.relpath(chemin, app.root_path).encode('utf-8'))
+                with open(chemin, 'rb') as f:
+                    empreinte.update(f.read())
+    return empreinte.hexdigest()[:12]
+
+
+def _compresser(donnees, encodage):
+    if encodage == 'br':
+        return brotli.compress(donnees, quality=QUALITE_BROTLI)
+    return gzip.compress(donnees, compresslevel=NIVEAU_GZIP)
+
+
+def init_cache(app):
+    """
+    Installe la compression, l'empreinte des fichiers statiques et la
+    revalidation des ETag compresses (a appeler avant les autres hooks
+    after_request : la compression doit passer en dernier)
+    """
+    app.extensions['dcomite_empreintes'] = {}
+    app.extensions['dcomite_version_pages'] = _version_pages(app)
+    # Fichiers statiques compresses : (chemin, ETag, encodage) -> octets
+    statiques = {}
+
+    @app.url_defaults
+    def empreinte_statique(endpoint, values):
+        if endpoint == 'static' and 'filename' in values and 'v' not in values:
+            empreinte = _empreinte(values['filename'])
+            if empreinte:
+                values['v'] = empreinte
+
+    @app.before_request
+    def etags_compresses():
+        # Une version compressee porte l'ETag suffixe de son encodage :
+        # le client la revalide avec l'ETag d'origine
+        valeur = request.environ.get('HTTP_IF_NONE_MATCH')
+        if valeur:
+            request.environ['HTTP_IF_NONE_MATCH'] = (
+                valeur.replace('-br"', '"').replace('-gzip"', '"')
+            )
+
+    @app.after_request
+    def cache_et_compression(response):
+        if request.endpoint == 'static':
+            empreinte = request.args.get('v')
+            if empreinte and empreinte == _empreinte(request.view_args.get('filename', '')):
+                # send_file positionne no-cache par defaut
+                response.cache_control.no_cache = None
+                response.cache_control.public = True
+                response.cache_control.max_age = DUREE_STATIQUE
+                response.cache_control.immutable = True
+            else:
+                response.cache_control.no_cache = True
+
+        if (response.status_code != 200 or 'Content-Encoding' in response.headers
+                or response.mimetype not in TYPES_COMPRESSES):
+            return response
+        response.vary.add('Accept-Encoding')
+        acceptes = request.accept_encodings
+        if brotli is not None and acceptes['br']:
+            encodage = 'br'
+        elif acceptes['gzip']:
+            encodage = 'gzip'
+        else:
+            return response
+
+        etag, faible = response.get_etag()
+        if response.direct_passthrough:
+            # Fichier statique : compresse une fois par version du fichier
+            cle = (request.path, etag, encodage)
+            if etag and cle in statiques:
+                response.response.close()
+                donnees = statiques[cle]
+            else:
+                response.direct_passthrough = False
+                brut = response.get_data()
+                if len(brut) < TAILLE_MIN:
+                    return response
+                donnees = _compresser(brut, encodage)
+                if etag:
+                    statiques[cle] = donnees
+        else:
+            brut = response.get_data()
+            if len(brut) < TAILLE_MIN:
+                return response
+            donnees = _compresser(brut, encodage)
+
+        response.direct_passthrough = False
+        response.set_data(donnees)
+        response.headers['Content-Encoding'] = encodage
+        if etag:
+            response.set_etag(f"{etag}-{encodage}", weak=faible)
+        return response
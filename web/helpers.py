@@ -2,6 +2,7 @@
 Helpers Jinja2 : filtres et context processors
 """
 from flask import request
+from jinja2 import FileSystemBytecodeCache
 from config import (
     CURRENCY_SYMBOL, ADMIN_IDS, PAYMENT_MODES,
     RELATIONS, POSTES_DEPENSES, APP_NAME, APP_VERSION
@@ -10,9 +11,36 @@ from models.annee import Annee
 from datetime import datetime
 
 
+# Section active du menu selon le blueprint
+SECTIONS = {
+    'dashboard': 'dashboard',
+    'adherents': 'adherents',
+    'appels': 'appels',
+    'contributions': 'paiements',
+    'depenses': 'depenses',
+    'annees': 'annees',
+}
+
+# Donnees communes a tous les templates, constantes pour le processus
+CONSTANTES = {
+    'APP_NAME': APP_NAME,
+    'APP_VERSION': APP_VERSION,
+    'CURRENCY_SYMBOL': CURRENCY_SYMBOL,
+    'PAYMENT_MODES': PAYMENT_MODES,
+    'ADMIN_IDS': ADMIN_IDS,
+    'RELATIONS': RELATIONS,
+    'POSTES_DEPENSES': POSTES_DEPENSES,
+}
+
+
 def register_helpers(app):
     """Enregistre les filtres et context processors Jinja2."""
 
+    # Templates compiles gardes sur disque (repertoire temporaire de
+    # l'utilisateur) : un nouveau processus ou un worker recharge ne les
+    # recompile pas
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
+
     @app.template_filter('format_montant')
     def format_montant(value):
         """Formate un nombre en devise : 1234.5 -> '1 234 EUR'"""
@@ -40,28 +68,13 @@ def register_helpers(app):
 
     @app.context_processor
     def inject_globals():
-        """Rend les donnees communes disponibles dans tous les templates."""
-        annee_active = Annee.get_active()
-
-        # Determiner la section active depuis le nom du blueprint
-        section_map = {
-            'dashboard': 'dashboard',
-            'adherents': 'adherents',
-            'appels': 'appels',
-            'contributions': 'paiements',
-            'depenses': 'depenses',
-            'annees': 'annees',
-        }
-        active_section = section_map.get(request.blueprint, 'dashboard')
-
-        return {
-            'annee_active': annee_active,
-            'active_section': active_section,
-            'APP_NAME': APP_NAME,
-            'APP_VERSION': APP_VERSION,
-            'CURRENCY_SYMBOL': CURRENCY_SYMBOL,
-            'PAYMENT_MODES': PAYMENT_MODES,
-            'ADMIN_IDS': ADMIN_IDS,
-            'RELATIONS': RELATIONS,
-            'POSTES_DEPENSES': POSTES_DEPENSES,
-        }
+        """
+        Rend les donnees communes disponibles dans tous les templates (y compris
+        les fragments des modals) : l'annee active est memorisee par le modele
+        et relue seulement quand la base a change.
+        """
+        return dict(
+            CONSTANTES,
+            annee_active=Annee.get_active_cached(),
+            active_section=SECTIONS.get(request.blueprint, 'dashboard'),
+        )
@@ -0,0 +1,160 @@
+"""
+Metriques des requetes HTTP
+Mesure pour chaque requete le temps total, le temps passe en base, le nombre
+de requetes SQL et le temps de rendu des templates. Les mesures sont
+renvoyees dans l'en-tete Server-Timing et agregees par endpoint (fenetre
+glissante : p50/p95/p99), lisibles au format Prometheus sur /_metrics.
+"""
+import threading
+import time
+from collections import deque
+
+from flask import Response, before_render_template, request, template_rendered
+from database.db_manager import DatabaseManager
+
+# Nombre de requetes conservees par endpoint pour le calcul des quantiles
+TAILLE_FENETRE = 1000
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Mesures suivies : nom Prometheus -> (cle de la mesure, aide)
+MESURES = {
+    'dcomite_http_duree_secondes': ('total', "Duree totale de la requete HTTP"),
+    'dcomite_http_sql_secondes': ('db', "Temps passe dans les requetes SQL"),
+    'dcomite_http_sql_requetes': ('sql', "Nombre de requetes SQL par requete HTTP"),
+    'dcomite_http_rendu_secondes': ('rendu', "Temps de rendu des templates"),
+}
+
+
+class MetriquesEndpoint:
+    """Fenetre glissante et cumuls des mesures d'un endpoint"""
+
+    def __init__(self):
+        self.fenetres = {cle: deque(maxlen=TAILLE_FENETRE) for cle, _ in MESURES.values()}
+        self.sommes = {cle: 0.0 for cle, _ in MESURES.values()}
+        self.nombre = 0
+
+    def ajouter(self, mesure):
+        self.nombre += 1
+        for cle, fenetre in self.fenetres.items():
+            fenetre.append(mesure[cle])
+            self.sommes[cle] += mesure[cle]
+
+    def quantiles(self, cle):
+        """Quantiles de la fenetre glissante (rang le plus proche)"""
+        valeurs = sorted(self.fenetres[cle])
+        if not valeurs:
+            return {q: 0 for q in QUANTILES}
+        return {q: valeurs[min(len(valeurs) - 1, int(q * len(valeurs)))] for q in QUANTILES}
+
+
+class Metriques:
+    """Collecte par requete (par thread) et agregation par endpoint"""
+
+    def __init__(self):
+        self.endpoints = {}
+        self._verrou = threading.Lock()
+        self._local = threading.local()
+
+    # Mesures de la requete en cours (thread courant)
+
+    def debut_requete(self):
+        self._local.courante = {'debut': time.perf_counter(), 'db': 0.0, 'sql': 0,
+                                'rendu': 0.0, 'debut_rendu': None}
+
+    def fin_requete(self):
+        courante = getattr(self._local, 'courante', None)
+        self._local.courante = None
+        if courante is None:
+            return None
+        courante['total'] = time.perf_counter() - courante['debut']
+        return courante
+
+    def sur_requete_sql(self, query, params, duree_ms, nb_lignes):
+        """Ecouteur DatabaseManager"""
+        courante = getattr(self._local, 'courante', None)
+        if courante is not None:
+            courante['db'] += duree_ms / 1000
+            courante['sql'] += 1
+
+    def sur_debut_rendu(self, sender, template, context, **extra):
+        courante = getattr(self._local, 'courante', None)
+        if courante is not None:
+            courante['debut_rendu'] = time.perf_counter()
+
+    def sur_fin_rendu(self, sender, template, context, **extra):
+        courante = getattr(self._local, 'courante', None)
+        if courante is not None and courante['debut_rendu'] is not None:
+            courante['rendu'] += time.perf_counter() - courante['debut_rendu']
+            courante['debut_rendu'] = None
+
+    # Agregation
+
+    def enregistrer(self, endpoint, mesure):
+        with self._verrou:
+            if endpoint not in self.endpoints:
+                self.endpoints[endpoint] = MetriquesEndpoint()
+            self.endpoints[endpoint].ajouter(mesure)
+
+    def exposition_prometheus(self):
+        """Texte au format d'exposition Prometheus (type summary)"""
+        lignes = []
+        with self._verrou:
+            for nom, (cle, aide) in MESURES.items():
+                lignes.append(f"# HELP {nom} {aide} (fenetre de {TAILLE_FENETRE} requetes)")
+                lignes.append(f"# TYPE {nom} summary")
+                for endpoint, metriques in sorted(self.endpoints.items()):
+                    etiquette = f'endpoint="{endpoint}"'
+                    for q, valeur in metriques.quantiles(cle).items():
+                        lignes.append(f'{nom}{{{etiquette},quantile="{q}"}} {valeur:.6g}')
+                    lignes.append(f"{nom}_sum{{{etiquette}}} {metriques.sommes[cle]:.6g}")
+                    lignes.append(f"{nom}_count{{{etiquette}}} {metriques.nombre}")
+        return '\n'.join(lignes) + '\n'
+
+
+def server_timing(mesure):
+    """Valeur de l'en-tete Server-Timing (durees en millisecondes)"""
+    return (f'db;dur={mesure["db"] * 1000:.1f};desc="{mesure["sql"]} requete(s) SQL", '
+            f'rendu;dur={mesure["rendu"] * 1000:.1f}, '
+            f'total;dur={mesure["total"] * 1000:.1f}')
+
+
+# Metriques dont l'ecouteur SQL est installe (un seul par processus)
+_ecouteur_actif = None
+
+
+def init_metrics(app):
+    """
+    Installe les hooks de mesure et l'endpoint /_metrics. L'ecouteur SQL
+    est global au processus (DatabaseManager) : celui d'une application
+    creee precedemment est retire, seule la derniere mesure le temps SQL.
+    """
+    global _ecouteur_actif
+    metriques = Metriques()
+    app.extensions['dcomite_metriques'] = metriques
+
+    db = DatabaseManager()
+    if _ecouteur_actif is not None:
+        db.retirer_ecouteur(_ecouteur_actif)
+    _ecouteur_actif = metriques.sur_requete_sql
+    db.ajouter_ecouteur(_ecouteur_actif)
+    before_render_template.connect(metriques.sur_debut_rendu, app, weak=False)
+    template_rendered.connect(metriques.sur_fin_rendu, app, weak=False)
+
+    @app.before_request
+    def debut_mesure():
+        metriques.debut_requete()
+
+    @app.after_request
+    def fin_mesure(response):
+        mesure = metriques.fin_requete()
+        if mesure is not None:
+            response.headers['Server-Timing'] = server_timing(mesure)
+            metriques.enregistrer(request.endpoint or 'inconnu', mesure)
+        return response
+
+    @app.route('/_metrics')
+    def exposition_metriques():
+        return Response(metriques.exposition_prometheus(),
+                        mimetype='text/plain; version=0.0.4')
+
+    return metriques
@@ -0,0 +1,293 @@
+"""
+Mises a jour en direct du tableau de bord (server-sent events)
+Un seul fil par processus surveille le journal des modifications de la base :
+a chaque ecriture il calcule une fois les deltas (nouveaux paiements, nouvelles
+depenses, suppressions, statistiques, alertes) et les diffuse a tous les
+tableaux de bord connectes sur /dashboard/flux. Le bus d'evenements reveille
+le fil des qu'une ecriture a lieu dans ce processus ; les ecritures des autres
+processus (interface Tkinter, autres workers) sont vues au plus tard apres
+INTERVALLE secondes.
+
+Chaque flux ouvert occupe un thread du serveur : au-dela de WEB_SSE_MAX flux
+par processus, les nouveaux tableaux de bord recoivent 204 (le navigateur ne
+se reconnecte pas) et restent utilisables sans mise a jour en direct.
+"""
+import json
+import queue
+import threading
+import time
+
+from flask import Response
+from config import WEB_SSE_MAX
+from database.db_manager import DatabaseManager
+from models.depense import Depense
+from models.money import Money
+from services.event_bus import bus, Evenement
+from services.statistique_service import StatistiqueService
+
+# Intervalle de verification du compteur de modifications (secondes)
+INTERVALLE = 2.0
+
+# Delai laisse a une ecriture en plusieurs requetes (paiement : contribution,
+# cotisation, historique) pour se terminer avant le calcul des deltas
+REGROUPEMENT = 0.05
+
+# Commentaire envoye aux clients inactifs pour garder la connexion ouverte
+BATTEMENT = 15.0
+
+# Messages en attente par client : au-dela, le client est deconnecte
+# (le navigateur se reconnecte et recoit l'etat complet)
+TAILLE_FILE = 100
+
+# Delai de reconnexion conseille au navigateur (millisecondes)
+RECONNEXION_MS = 5000
+
+
+def _message(evenement, donnees, identifiant=None):
+    """Message au format text/event-stream"""
+    lignes = []
+    if identifiant is not None:
+        lignes.append(f"id: {identifiant}")
+    lignes.append(f"event: {evenement}")
+    lignes.append(f"data: {json.dumps(donnees, separators=(',', ':'))}")
+    return '\n'.join(lignes) + '\n\n'
+
+
+class _Client:
+    """Connexion d'un tableau de bord"""
+
+    def __init__(self):
+        self.file = queue.Queue(maxsize=TAILLE_FILE)
+        self.ferme = False
+
+
+class Diffuseur:
+    """Calcule les deltas une fois par modification et les diffuse aux clients"""
+
+    def __init__(self, app, max_flux=WEB_SSE_MAX):
+        self.app = app
+        self.max_flux = max_flux
+        self._clients = []
+        self._verrou = threading.Lock()
+        self._reveil = threading.Event()
+        self._fil = None
+        self._compteur = None
+        self._stats = None
+        self._alertes = None
+
+    # Abonnements
+
+    def reveiller(self, evenement=None):
+        """Abonne au bus : une ecriture vient d'avoir lieu dans ce processus"""
+        self._reveil.set()
+
+    def flux(self, dernier_id=None):
+        """
+        Reponse text/event-stream d'un client
+
+        Args:
+            dernier_id: En-tete Last-Event-ID (reconnexion) : si la base a
+                        change depuis, le client recoit d'abord l'etat complet
+
+        Returns:
+            Response en streaming, ou 204 si max_flux flux sont deja ouverts
+        """
+        client = _Client()
+        compteur = self._compteur_actuel()
+        if dernier_id is not None and str(dernier_id) != str(compteur):
+            self._envoyer(client, self._messages_etat(compteur))
+
+        with self._verrou:
+            if len(self._clients) >= self.max_flux:
+                # Pas de thread du serveur bloque pour ce client
+                return Response(status=204)
+            self._clients.append(client)
+            if self._fil is None or not self._fil.is_alive():
+                self._compteur = compteur
+                self._fil = threading.Thread(target=self._surveiller, name='dcomite-sse',
+                                             daemon=True)
+                self._fil.start()
+
+        def generer():
+            try:
+                yield f"retry: {RECONNEXION_MS}\n\n"
+                while not client.ferme:
+                    try:
+                        yield client.file.get(timeout=BATTEMENT)
+                    except queue.Empty:
+                        yield ": battement\n\n"
+            finally:
+                self._retirer(client)
+
+        response = Response(generer(), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        # Pas de mise en tampon par un proxy nginx
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+
+    def nb_clients(self):
+        with self._verrou:
+            return len(self._clients)
+
+    def _retirer(self, client):
+        client.ferme = True
+        with self._verrou:
+            if client in self._clients:
+                self._clients.remove(client)
+
+    def _envoyer(self, client, messages):
+        for message in messages:
+            try:
+                client.file.put_nowait(message)
+            except queue.Full:
+                # Client trop lent : deconnecte, il se reconnectera
+                self._retirer(client)
+                return
+
+    # Surveillance
+
+    def _surveiller(self):
+        """Fil de surveillance : s'arrete quand il n'y a plus de client"""
+        while True:
+            if self._reveil.wait(INTERVALLE):
+                time.sleep(REGROUPEMENT)
+            self._reveil.clear()
+            with self._verrou:
+                if not self._clients:
+                    self._fil = None
+                    return
+            try:
+                self._verifier()
+            except Exception as e:
+                print(f"Erreur flux tableau de bord: {e}")
+
+    def _verifier(self):
+        """Diffuse les deltas si le compteur de modifications a change"""
+        compteur = self._compteur_actuel()
+        if compteur == self._compteur:
+            return
+        precedent, self._compteur = self._compteur, compteur
+
+        messages = self._messages_lignes(precedent, compteur)
+        messages.extend(self._messages_etat(compteur, seulement_changements=True))
+        with self._verrou:
+            clients = list(self._clients)
+        for client in clients:
+            self._envoyer(client, messages)
+
+    @staticmethod
+    def _compteur_actuel():
+        return DatabaseManager().compteur_modifications()
+
+    # Deltas
+
+    def _messages_lignes(self, precedent, compteur):
+        """Paiements et depenses ajoutes ou supprimes entre deux valeurs du compteur"""
+        db = DatabaseManager()
+        rows = db.fetch_all("""
+            SELECT table_nom, ligne_id, MAX(id) as ordre FROM journal_modifications
+            WHERE id > ? AND id <= ? AND table_nom IN ('contributions', 'depenses')
+            GROUP BY table_nom, ligne_id
+            ORDER BY ordre
+        """, (precedent or 0, compteur))
+        contributions = [row['ligne_id'] for row in rows if row['table_nom'] == 'contributions']
+        depenses = [row['ligne_id'] for row in rows if row['table_nom'] == 'depenses']
+
+        messages = []
+        if contributions:
+            existantes = self._paiements(contributions)
+            for ligne_id in contributions:
+                if ligne_id in existantes:
+                    messages.append(_message('paiement', existantes[ligne_id], compteur))
+                else:
+                    messages.append(_message('suppression', {'liste': 'paiements', 'id': ligne_id},
+                                             compteur))
+        if depenses:
+            existantes = self._depenses(depenses)
+            for ligne_id in depenses:
+                if ligne_id in existantes:
+                    messages.append(_message('depense', existantes[ligne_id], compteur))
+                else:
+                    messages.append(_message('suppression', {'liste': 'depenses', 'id': ligne_id},
+                                             compteur))
+        return messages
+
+    def _paiements(self, ids):
+        """Lignes "Derniers paiements" des contributions encore presentes"""
+        filtres = self.app.jinja_env.filters
+        db = DatabaseManager()
+        rows = db.fetch_all(f"""
+            SELECT c.id, c.montant, c.date_paiement, a.nom, a.prenom
+            FROM contributions c
+            LEFT JOIN adherents a ON a.id = c.adherent_id
+            WHERE c.id IN ({', '.join('?' * len(ids))})
+        """, ids)
+        return {
+            row['id']: {
+                'id': row['id'],
+                'adherent_nom': f"{row['prenom']} {row['nom']}" if row['nom'] else 'Inconnu',
+                'montant': filtres['format_montant'](Money.from_db(row['montant'])),
+                'date': filtres['format_date'](row['date_paiement']),
+            }
+            for row in rows
+        }
+
+    def _depenses(self, ids):
+        """Lignes "Dernieres depenses" des depenses encore presentes"""
+        filtres = self.app.jinja_env.filters
+        lignes = {}
+        for ligne_id in ids:
+            depense = Depense.get_by_id(ligne_id)
+            if depense:
+                lignes[ligne_id] = {
+                    'id': depense.id,
+                    'defunt_nom': depense.get_nom_defunt(),
+                    'montant': filtres['format_montant'](depense.montant),
+                    'date': filtres['format_date'](depense.date_deces),
+                }
+        return lignes
+
+    def _messages_etat(self, compteur, seulement_changements=False):
+        """
+        Statistiques et alertes du tableau de bord (toujours, ou seulement
+        celles qui ont change depuis la derniere diffusion)
+        """
+        format_montant = self.app.jinja_env.filters['format_montant']
+        stats = StatistiqueService.get_statistiques_dashboard()
+        taux = stats['taux_recouvrement']
+        valeurs = {
+            'nb_adherents_actifs': str(stats['nb_adherents_actifs']),
+            'nb_appels_ouverts': str(stats['nb_appels_ouverts']),
+            'total_collecte': format_montant(stats['total_collecte']),
+            'total_depenses': format_montant(stats['total_depenses']),
+            'balance_globale': format_montant(stats['balance_globale']),
+            'taux_recouvrement': f"{taux:.1f}%",
+            'total_attendu': format_montant(stats['total_attendu']),
+        }
+        stats = {
+            'valeurs': valeurs,
+            'balance_negative': stats['balance_globale'] < 0,
+            'taux': round(float(taux), 2),
+            'attendu': stats['total_attendu'] > 0,
+        }
+        messages = []
+        if not seulement_changements or stats != self._stats:
+            messages.append(_message('stats', stats, compteur))
+
+        alertes = [
+            {'niveau': alerte['niveau'], 'message': alerte['message']}
+            for alerte in StatistiqueService.get_alertes()['alertes']
+        ]
+        if not seulement_changements or alertes != self._alertes:
+            messages.append(_message('alertes', alertes, compteur))
+        if seulement_changements:
+            self._stats, self._alertes = stats, alertes
+        return messages
+
+
+def init_sse(app):
+    """Cree le diffuseur de l'application et l'abonne au bus d'evenements"""
+    diffuseur = Diffuseur(app)
+    bus.abonner(Evenement, diffuseur.reveiller)
+    app.extensions['dcomite_sse'] = diffuseur
+    return diffuseur
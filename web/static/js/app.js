@@ -1,6 +1,7 @@
 /**
  * DComite Web - JavaScript principal
- * Gestion des modals AJAX, recherche table, confirmation suppression
+ * Gestion des modals AJAX, recherche table, confirmation suppression,
+ * mises a jour en direct du tableau de bord
  */
 
 // Charger un contenu HTML dans le modal generique
@@ -37,18 +38,123 @@ function confirmDelete(url, message) {
     }
 }
 
+// Ouvrir le detail d'une ligne de tableau dans le modal
+function rendreCliquable(row) {
+    row.addEventListener('click', function (e) {
+        // Ne pas declencher si clic sur un bouton ou lien dans la ligne
+        if (e.target.closest('a, button')) return;
+        var url = this.dataset.detailUrl;
+        if (url) loadModal(url);
+    });
+}
+
+// Tableau de bord : appliquer les deltas recus de /dashboard/flux
+var NIVEAUX_ALERTES = {
+    critique: ['danger', 'exclamation-octagon'],
+    warning: ['warning', 'exclamation-triangle']
+};
+
+function majStats(delta) {
+    Object.keys(delta.valeurs).forEach(function (cle) {
+        document.querySelectorAll('[data-stat="' + cle + '"]').forEach(function (el) {
+            el.textContent = delta.valeurs[cle];
+        });
+    });
+    document.querySelectorAll('[data-stat="balance_globale"].stat-value').forEach(function (el) {
+        el.classList.toggle('text-danger', delta.balance_negative);
+    });
+
+    var carte = document.getElementById('recouvrement');
+    if (!carte) return;
+    carte.classList.toggle('d-none', !delta.attendu);
+    var barre = carte.querySelector('.progress-bar');
+    var pct = delta.taux;
+    barre.style.width = Math.max(0, Math.min(pct, 100)) + '%';
+    barre.textContent = Math.round(pct) + '%';
+    barre.classList.remove('bg-danger', 'bg-warning', 'bg-info', 'bg-success');
+    barre.classList.add(pct < 25 ? 'bg-danger' : pct < 50 ? 'bg-warning' : pct < 75 ? 'bg-info' : 'bg-success');
+}
+
+function majAlertes(alertes) {
+    var section = document.getElementById('alertes');
+    if (!section) return;
+    section.innerHTML = '';
+    alertes.forEach(function (alerte) {
+        var niveau = NIVEAUX_ALERTES[alerte.niveau] || ['info', 'info-circle'];
+        var div = document.createElement('div');
+        div.className = 'alert alert-' + niveau[0] + ' py-2';
+        var icone = document.createElement('i');
+        icone.className = 'bi bi-' + niveau[1];
+        div.appendChild(icone);
+        div.appendChild(document.createTextNode(' ' + alerte.message));
+        section.appendChild(div);
+    });
+}
+
+// Ajoute ou remplace une ligne des listes "Derniers paiements" / "Dernieres depenses"
+function majLigne(liste, id, cellules) {
+    var tbody = document.querySelector('tbody[data-liste="' + liste + '"]');
+    if (!tbody) return;
+    var row = document.createElement('tr');
+    row.className = 'clickable-row';
+    row.dataset.id = id;
+    row.dataset.detailUrl = tbody.dataset.detailBase + id;
+    cellules.forEach(function (texte) {
+        var td = document.createElement('td');
+        td.textContent = texte;
+        row.appendChild(td);
+    });
+    rendreCliquable(row);
+
+    var existante = tbody.querySelector('tr[data-id="' + id + '"]');
+    if (existante) {
+        tbody.replaceChild(row, existante);
+        return;
+    }
+    // Une ligne ancienne modifiee hors de la liste n'y entre pas
+    var ids = Array.prototype.map.call(tbody.querySelectorAll('tr[data-id]'), function (tr) {
+        return parseInt(tr.dataset.id, 10);
+    });
+    var max = parseInt(tbody.dataset.max, 10);
+    if (ids.length >= max && id < Math.max.apply(null, ids)) return;
+
+    var vide = tbody.querySelector('.ligne-vide');
+    if (vide) vide.remove();
+    tbody.insertBefore(row, tbody.firstChild);
+    while (tbody.querySelectorAll('tr[data-id]').length > max) {
+        tbody.lastElementChild.remove();
+    }
+}
+
+function supprimerLigne(liste, id) {
+    var row = document.querySelector('tbody[data-liste="' + liste + '"] tr[data-id="' + id + '"]');
+    if (row) row.remove();
+}
+
+function ecouterTableauDeBord(url) {
+    if (!window.EventSource) return;
+    var source = new EventSource(url);
+    var donnees = function (handler) {
+        return function (e) { handler(JSON.parse(e.data)); };
+    };
+    source.addEventListener('stats', donnees(majStats));
+    source.addEventListener('alertes', donnees(majAlertes));
+    source.addEventListener('paiement', donnees(function (p) {
+        majLigne('paiements', p.id, [p.adherent_nom, p.montant, p.date]);
+    }));
+    source.addEventListener('depense', donnees(function (d) {
+        majLigne('depenses', d.id, [d.defunt_nom, d.montant, d.date]);
+    }));
+    source.addEventListener('suppression', donnees(function (s) {
+        supprimerLigne(s.liste, s.id);
+    }));
+}
+
 // Initialisation au chargement de la page
 document.addEventListener('DOMContentLoaded', function () {
 
     // Rendre les lignes de tableau cliquables
-    document.querySelectorAll('.clickable-row').forEach(function (row) {
-        row.addEventListener('click', function (e) {
-            // Ne pas declencher si clic sur un bouton ou lien dans la ligne
-            if (e.target.closest('a, button')) return;
-            var url = this.dataset.detailUrl;
-            if (url) loadModal(url);
-        });
-    });
+    document.querySelectorAll('.clickable-row').forEach(rendreCliquable);
 
     // Recherche client-side dans le tableau
     var searchInput = document.getElementById('tableSearch');
@@ -71,6 +177,10 @@ document.addEventListener('DOMContentLoaded', function () {
         });
     }
 
+    // Tableau de bord : mises a jour en direct
+    var dashboard = document.getElementById('dashboard');
+    if (dashboard && dashboard.dataset.fluxUrl) ecouterTableauDeBord(dashboard.dataset.fluxUrl);
+
     // Auto-dismiss des flash messages apres 5 secondes
     document.querySelectorAll('.alert-dismissible').forEach(function (alert) {
         setTimeout(function () {
@@ -0,0 +1,28 @@
+"""
+Point d'entree WSGI de production pour DComite
+- gunicorn (Linux/macOS), plusieurs processus : gunicorn -c gunicorn.conf.py wsgi:app
+- waitress (Windows, ou sans gunicorn), un processus multi-thread : python wsgi.py
+Le serveur de developpement reste web_app.py.
+"""
+from config import DATABASE_PATH, WEB_HOST, WEB_PORT, WEB_THREADS
+from database.db_manager import DatabaseManager
+from web import create_app
+
+app = create_app()
+
+
+def servir():
+    """Sert l'application avec waitress (WEB_HOST, WEB_PORT, WEB_THREADS)"""
+    try:
+        from waitress import serve
+    except ImportError:
+        print("waitress n'est pas installe : pip install waitress")
+        raise SystemExit(1)
+
+    DatabaseManager.activer_wal(DATABASE_PATH)
+    print(f"DComite sur http://{WEB_HOST}:{WEB_PORT} ({WEB_THREADS} threads)")
+    serve(app, host=WEB_HOST, port=WEB_PORT, threads=WEB_THREADS)
+
+
+if __name__ == '__main__':
+    servir()